@@ -0,0 +1 @@
+"""Benchmark suite for Safe Let Stays (see benchmarks/run.py)."""
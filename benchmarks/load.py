@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+"""
+Safe Let Stays - Load Test Harness
+==================================
+Runs the app under a multi-worker server against local Stripe, Mailjet and
+Guesty stubs (benchmarks/stubs.py) and drives scripted booking journeys at
+a fixed concurrency, reporting throughput and tail latencies per step.
+
+Each virtual user logs in once as a seeded synthetic account, then loops
+over the journey until the run ends:
+
+    search    GET  /properties/ with dates, area and guests
+    detail    GET  /property/<slug>/
+    checkout  POST /create-checkout-session/<id>/  (redirect to the Stripe stub)
+    webhook   POST /webhook/stripe/  (signed checkout.session.completed;
+                   confirms the booking and queues the receipt email)
+    receipt   GET  /receipt/<booking_id>/
+
+Queued emails are delivered to the Mailjet stub by a deliver_emails worker
+running alongside the server, as in production.
+
+Every journey comes from its own X-Forwarded-For address, so the per-IP
+rate limits see many clients rather than one very busy one.
+
+Servers:
+    gunicorn  gunicorn safeletstays.wsgi (pre-fork, sync workers)
+    uvicorn   uvicorn safeletstays.asgi (ASGI workers)
+    wsgiref   stdlib threaded WSGI server forked into N workers - no extra
+              dependencies, for a quick local run
+
+Usage:
+    python benchmarks/load.py --server gunicorn --workers 4 --concurrency 16 --duration 60
+    python benchmarks/load.py --server wsgiref --stub-latency-ms 80 --output load.json
+"""
+
+import argparse
+import hmac
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from hashlib import sha256
+from urllib.parse import urlsplit
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from benchmarks.stubs import GuestyStub, MailjetStub, StripeStub  # noqa: E402
+
+SETTINGS_MODULE = 'benchmarks.load_settings'
+SERVERS = ('gunicorn', 'uvicorn', 'wsgiref')
+STEPS = ('login', 'search', 'detail', 'checkout', 'webhook', 'receipt')
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DURATION = 30
+DEFAULT_WORKERS = 4
+REQUEST_TIMEOUT = 30
+READY_TIMEOUT = 60
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+def server_command(server: str, workers: int, port: int) -> list:
+    """Command line that runs the app on 127.0.0.1:port."""
+    if server == 'gunicorn':
+        return [
+            sys.executable, '-m', 'gunicorn', 'safeletstays.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+        ]
+    if server == 'uvicorn':
+        return [
+            sys.executable, '-m', 'uvicorn', 'safeletstays.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning',
+        ]
+    return [sys.executable, os.path.abspath(__file__), '--serve', str(port), '--workers', str(workers)]
+
+
+def mail_worker_command() -> list:
+    """Command line for the outbox delivery worker."""
+    return [sys.executable, 'manage.py', 'deliver_emails', '--watch', '--interval', '1']
+
+
+def serve_wsgiref(port: int, workers: int) -> None:
+    """
+    Serve the app with the stdlib threaded WSGI server in `workers` forked
+    processes sharing one listening socket (the wsgiref server mode).
+    """
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+    import django
+    django.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    application = get_wsgi_application()
+    server = Server(('127.0.0.1', port), QuietHandler)
+    server.set_app(application)
+    connections.close_all()  # Never share a database connection across fork()
+    for _ in range(workers - 1):
+        if os.fork() == 0:
+            break
+    server.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        try:
+            if requests.get(f'{base_url}/', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'Server not ready after {READY_TIMEOUT}s')
+
+
+# =============================================================================
+# JOURNEYS
+# =============================================================================
+
+class StepStats:
+    """Thread-safe latency samples and error counts per step."""
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.journeys = 0
+        self._lock = threading.Lock()
+
+    def record(self, step: str, elapsed_ms: float, error: str = None) -> None:
+        with self._lock:
+            self.timings[step].append(elapsed_ms)
+            if error:
+                self.errors[step] += 1
+                self.error_samples.setdefault(step, error)
+
+    def journey_done(self) -> None:
+        with self._lock:
+            self.journeys += 1
+
+
+class StepFailed(Exception):
+    pass
+
+
+def sign_stripe_payload(payload: str, secret: str) -> str:
+    """Stripe-Signature header value for a webhook payload."""
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+class VirtualUser:
+    """One logged-in client running journeys back to back."""
+
+    _addresses = itertools.count(1)
+
+    def __init__(self, index: int, context: dict, stats: StepStats):
+        self.base = context['base_url']
+        self.context = context
+        self.stats = stats
+        self.rng = random.Random(index)
+        self.http = requests.Session()
+        self.username = context['usernames'][index % len(context['usernames'])]
+
+    def _request(self, step: str, method: str, path: str, expect: int, **kwargs) -> requests.Response:
+        kwargs.setdefault('headers', {})['X-Forwarded-For'] = self.address
+        start = time.perf_counter()
+        try:
+            response = self.http.request(
+                method, f'{self.base}{path}', allow_redirects=False, timeout=REQUEST_TIMEOUT, **kwargs,
+            )
+        except requests.RequestException as e:
+            self.stats.record(step, (time.perf_counter() - start) * 1000, f'{type(e).__name__}: {e}')
+            raise StepFailed(step)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != expect:
+            self.stats.record(step, elapsed, f'HTTP {response.status_code}: {response.text[:200]}')
+            raise StepFailed(step)
+        self.stats.record(step, elapsed)
+        return response
+
+    def _new_address(self) -> None:
+        n = next(self._addresses)
+        self.address = f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+    def login(self) -> None:
+        self._new_address()
+        self.http.get(f'{self.base}/accounts/login/', timeout=REQUEST_TIMEOUT)
+        self._request('login', 'POST', '/accounts/login/', 302, data={
+            'username': self.username,
+            'password': self.context['password'],
+            'csrfmiddlewaretoken': self.http.cookies.get('csrftoken', ''),
+        })
+
+    def journey(self) -> None:
+        self._new_address()
+        rng = self.rng
+        prop = self.context['properties'][rng.randrange(len(self.context['properties']))]
+        check_in = date.today() + timedelta(days=rng.randint(14, 300))
+        check_out = check_in + timedelta(days=rng.choice((1, 2, 3, 5, 7)))
+        guests = rng.randint(1, prop['capacity'])
+
+        self._request('search', 'GET', '/properties/', 200, params={
+            'location': prop['area'], 'check_in': check_in.isoformat(), 'check_out': check_out.isoformat(),
+            'guests': guests,
+        })
+        self._request('detail', 'GET', f"/property/{prop['slug']}/", 200)
+
+        response = self._request('checkout', 'POST', f"/create-checkout-session/{prop['id']}/", 302, data={
+            'checkin': check_in.isoformat(), 'checkout': check_out.isoformat(), 'guests': guests,
+            'csrfmiddlewaretoken': self.http.cookies.get('csrftoken', ''),
+        })
+        session = self.context['stripe'].session(urlsplit(response.headers['Location']).path.rsplit('/', 1)[-1])
+        if session is None:
+            self.stats.record('checkout', 0, f"Unknown Stripe session in {response.headers['Location']}")
+            raise StepFailed('checkout')
+
+        payload = json.dumps({
+            'id': f"evt_{session['id']}", 'object': 'event', 'type': 'checkout.session.completed',
+            'data': {'object': {**session, 'status': 'complete', 'payment_status': 'paid'}},
+        })
+        self._request('webhook', 'POST', '/webhook/stripe/', 200, data=payload, headers={
+            'Content-Type': 'application/json',
+            'Stripe-Signature': sign_stripe_payload(payload, self.context['webhook_secret']),
+        })
+        self._request('receipt', 'GET', f"/receipt/{session['client_reference_id']}/", 200)
+
+    def run(self, deadline: float, max_journeys: int) -> None:
+        try:
+            self.login()
+        except StepFailed:
+            return
+        done = 0
+        while time.monotonic() < deadline and (not max_journeys or done < max_journeys):
+            try:
+                self.journey()
+                self.stats.journey_done()
+            except StepFailed:
+                pass
+            done += 1
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def summarise(stats: StepStats, elapsed: float) -> dict:
+    from benchmarks.run import percentile
+
+    steps = {}
+    for step in STEPS:
+        samples = stats.timings.get(step)
+        if not samples:
+            continue
+        steps[step] = {
+            'requests': len(samples),
+            'errors': stats.errors.get(step, 0),
+            'rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(samples, 0.50), 1),
+            'p95_ms': round(percentile(samples, 0.95), 1),
+            'p99_ms': round(percentile(samples, 0.99), 1),
+            'max_ms': round(max(samples), 1),
+        }
+    return {
+        'elapsed_s': round(elapsed, 1),
+        'journeys': stats.journeys,
+        'journeys_per_s': round(stats.journeys / elapsed, 2),
+        'steps': steps,
+        'errors': stats.error_samples,
+    }
+
+
+def print_report(summary: dict) -> None:
+    print(f"\n{'step':<10}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print('-' * 72)
+    for step, s in summary['steps'].items():
+        print(
+            f"{step:<10}{s['requests']:>9}{s['errors']:>8}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}"
+        )
+    print(f"\n{summary['journeys']} complete journeys in {summary['elapsed_s']}s "
+          f"({summary['journeys_per_s']}/s)")
+    for step, error in summary['errors'].items():
+        print(f'  first {step} error: {error}')
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def prepare_database(args) -> dict:
+    """Migrate and seed the throwaway database; return what the journeys need."""
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+
+    from yourapp.models import Property
+    from yourapp.synthetic import SYNTHETIC_PASSWORD, generate
+
+    call_command('migrate', verbosity=0)
+    counts = generate(properties=args.properties, bookings=args.bookings, users=args.users, searches=0,
+                      seed=args.seed)
+    properties = list(
+        Property.objects.values('id', 'slug', 'area', 'capacity')
+    )
+    usernames = [f'synthetic-user-{i}' for i in range(args.users)]
+    connections.close_all()
+    return {
+        'counts': counts,
+        'properties': properties,
+        'usernames': usernames,
+        'password': SYNTHETIC_PASSWORD,
+        'webhook_secret': settings.STRIPE_WEBHOOK_SECRET,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the booking journey against local API stubs.')
+    parser.add_argument('--server', choices=SERVERS, default='gunicorn')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Server worker processes')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Virtual users')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='Seconds to run')
+    parser.add_argument('--journeys', type=int, default=0, help='Stop each user after this many (0 = no limit)')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='Added to every stub API call')
+    parser.add_argument('--properties', type=int, default=500)
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the summary as JSON here')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)  # wsgiref worker entry
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve_wsgiref(args.serve, args.workers)
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix='load-')
+    stubs = {
+        'stripe': StripeStub(latency_ms=args.stub_latency_ms),
+        'mailjet': MailjetStub(latency_ms=args.stub_latency_ms),
+        'guesty': GuestyStub(latency_ms=args.stub_latency_ms),
+    }
+    for stub in stubs.values():
+        stub.start()
+    os.environ.update({
+        'DJANGO_SETTINGS_MODULE': SETTINGS_MODULE,
+        'LOAD_DATABASE': os.path.join(workdir, 'load.sqlite3'),
+        'LOAD_MEDIA_ROOT': os.path.join(workdir, 'media'),
+        'STRIPE_API_BASE': stubs['stripe'].url,
+        'MAILJET_API_URL': f"{stubs['mailjet'].url}/",
+        'GUESTY_API_BASE_URL': f"{stubs['guesty'].url}/v1",
+    })
+
+    process = mail_worker = None
+    try:
+        print(f'Seeding {args.properties} properties, {args.bookings} bookings, {args.users} users...')
+        context = prepare_database(args)
+        context['stripe'] = stubs['stripe']
+
+        port = free_port()
+        context['base_url'] = f'http://127.0.0.1:{port}'
+        process = subprocess.Popen(
+            server_command(args.server, args.workers, port), cwd=BASE_DIR, start_new_session=True,
+        )
+        wait_until_ready(context['base_url'], process)
+        mail_worker = subprocess.Popen(mail_worker_command(), cwd=BASE_DIR, start_new_session=True,
+                                       stdout=subprocess.DEVNULL)
+        print(f'{args.server} with {args.workers} workers on {context["base_url"]}; '
+              f'{args.concurrency} users for {args.duration:g}s')
+
+        stats = StepStats()
+        users = [VirtualUser(i, context, stats) for i in range(args.concurrency)]
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=user.run, args=(started + args.duration, args.journeys), daemon=True)
+            for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        for child in (process, mail_worker):
+            if child and child.poll() is None:
+                os.killpg(child.pid, signal.SIGTERM)
+                child.wait(timeout=30)
+        for stub in stubs.values():
+            stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarise(stats, elapsed)
+    summary['stubs'] = {name: stub.requests for name, stub in stubs.items()}
+    print_report(summary)
+    print(f"Stub API calls: {', '.join(f'{name} {count}' for name, count in summary['stubs'].items())}")
+
+    if args.output:
+        summary['meta'] = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'server': args.server,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'stub_latency_ms': args.stub_latency_ms,
+            'dataset': context['counts'],
+        }
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+            f.write('\n')
+        print(f'Summary written to {args.output}')
+
+    failed = sum(s['errors'] for s in summary['steps'].values())
+    return 1 if failed or not summary['journeys'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Safe Let Stays - Load Test Settings
+===================================
+The development settings adjusted for benchmarks/load.py: a throwaway
+SQLite database shared by every server worker, DEBUG off over plain HTTP,
+one fixed SECRET_KEY (sessions and CSRF tokens must be valid on every
+worker), and fixed credentials for the local Stripe/Mailjet/Guesty stubs.
+
+The stub URLs arrive through the usual environment variables
+(STRIPE_API_BASE, MAILJET_API_URL, GUESTY_API_BASE_URL), set by the harness.
+"""
+
+import os
+
+os.environ.setdefault('DEBUG', 'False')  # Read by settings.py at import
+
+from safeletstays.settings import *  # noqa: E402,F401,F403
+
+SECRET_KEY = 'load-test-only-secret-key-not-for-production'
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['LOAD_DATABASE'],
+        'OPTIONS': {
+            # Several worker processes write at once: wait for the lock
+            # rather than failing, and take it up front to avoid deadlocks
+            'timeout': 30,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
+    }
+}
+MEDIA_ROOT = os.environ['LOAD_MEDIA_ROOT']
+
+# Plain HTTP on localhost
+SESSION_COOKIE_SECURE = False
+CSRF_COOKIE_SECURE = False
+SECURE_SSL_REDIRECT = False
+SECURE_HSTS_SECONDS = 0
+
+STRIPE_SECRET_KEY = 'sk_test_load'
+STRIPE_PUBLISHABLE_KEY = 'pk_test_load'
+STRIPE_WEBHOOK_SECRET = 'whsec_load'
+MAILJET_API_KEY = 'load'
+MAILJET_API_SECRET = 'load'
+GUESTY_API_KEY = 'load'
+GUESTY_WEBHOOK_SECRET = 'load'
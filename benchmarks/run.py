@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""
+Safe Let Stays - Benchmark Runner
+=================================
+Times the main request paths against a seeded synthetic dataset and
+records query counts and p50/p95 latencies to JSON, optionally comparing
+them with a stored baseline so regressions are caught before deploy.
+
+Runs in a throwaway test database (the dev database is never touched) and
+measures warm-cache, steady-state timings: each scenario is run a few times
+untimed first, then ITERATIONS times with a wall-clock timer.
+
+Usage:
+    python benchmarks/run.py
+    python benchmarks/run.py --compare benchmarks/baseline.json
+    python benchmarks/run.py --output benchmarks/baseline.json   # refresh the baseline
+    python benchmarks/run.py --only properties --iterations 50
+
+Exit status is 1 if --compare finds a regression: more queries than the
+baseline, or a p95 more than --tolerance slower (and at least --min-delta-ms).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'safeletstays.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks.seed import BENCH_GUEST, BENCH_STAFF, seed  # noqa: E402
+
+DEFAULT_ITERATIONS = 30
+WARMUP_ITERATIONS = 3
+DEFAULT_TOLERANCE = 0.25  # 25% slower p95 counts as a regression
+DEFAULT_MIN_DELTA_MS = 2.0  # ...but only if it is also this many ms slower
+BULK_RECEIPTS = 50  # Receipts rendered per run of the bulk_receipts scenario
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+def build_scenarios():
+    """
+    Name -> callable for every benchmarked path.
+
+    Request scenarios return the response (checked for status 200 during
+    warm-up); other scenarios return None.
+    """
+    from django.contrib.auth.models import User
+    from yourapp.models import Booking, Property
+    from yourapp.utils import generate_receipt_pdf, render_receipt_pdf as render_pdf
+
+    anonymous = Client()
+    guest = Client()
+    guest.force_login(User.objects.get(username=BENCH_GUEST))
+    staff = Client()
+    staff.force_login(User.objects.get(username=BENCH_STAFF))
+
+    detail_slug = Property.objects.order_by('id').values_list('slug', flat=True)[Property.objects.count() // 2]
+    receipt_booking = Booking.objects.select_related('booked_property').filter(user__username=BENCH_GUEST).first()
+
+    check_in = timezone.localdate() + timedelta(days=30)
+    dates = {
+        'check_in': check_in.strftime(settings.DATE_FORMAT_ISO),
+        'check_out': (check_in + timedelta(days=5)).strftime(settings.DATE_FORMAT_ISO),
+    }
+    properties_url = reverse('properties')
+    property_filters = {
+        'properties': {},
+        'properties_location': {'location': 'Kelham'},
+        'properties_guests': {'guests': '4'},
+        'properties_beds': {'beds': '2'},
+        'properties_dates': dates,
+        'properties_dates_sorted': {**dates, 'sort': 'price_asc'},
+        'properties_all_filters': {**dates, 'location': 'Kelham', 'guests': '2', 'beds': '1', 'sort': 'price_desc'},
+    }
+
+    def render_receipt_pdf():
+        receipt_booking.receipt_pdf = None
+        generate_receipt_pdf(receipt_booking)
+
+    # Bulk regeneration: rendering only, storage excluded
+    receipt_batch = list(Booking.objects.select_related('booked_property').order_by('id')[:BULK_RECEIPTS])
+
+    def render_receipt_batch():
+        for booking in receipt_batch:
+            render_pdf(booking)
+
+    scenarios = {
+        'homepage': lambda: anonymous.get(reverse('homepage')),
+        'property_detail': lambda: anonymous.get(reverse('property_detail', kwargs={'slug': detail_slug})),
+        'my_bookings': lambda: guest.get(reverse('my_bookings')),
+        'staff_panel': lambda: staff.get(reverse('staff_panel')),
+        'generate_receipt_pdf': render_receipt_pdf,
+        'bulk_receipts': render_receipt_batch,
+    }
+    for name, params in property_filters.items():
+        scenarios[name] = (lambda p: lambda: anonymous.get(properties_url, p))(params)
+    return scenarios
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(name, func, iterations):
+    """Warm up, count queries for one run, then time `iterations` runs."""
+    for _ in range(WARMUP_ITERATIONS):
+        response = func()
+        if response is not None and response.status_code != 200:
+            raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    # Read now: later requests clear the connection's query log
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'iterations': iterations,
+        'queries': query_count,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(min(timings), 3),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """List regressions of results against a baseline results dict."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+        slower = current['p95_ms'] - previous['p95_ms']
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance) and slower >= min_delta_ms:
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms "
+                f"(+{slower / previous['p95_ms']:.0%})"
+            )
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"\n{'scenario':<26}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}{'base p95':>10}")
+    print('-' * 64)
+    for name, r in sorted(results.items()):
+        base = (baseline or {}).get(name, {}).get('p95_ms')
+        base = f'{base:.1f}' if base is not None else '-'
+        print(f"{name:<26}{r['queries']:>8}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{base:>10}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the main Safe Let Stays request paths.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--only', action='append', help='Run scenarios whose name starts with this (repeatable)')
+    parser.add_argument('--properties', type=int, default=500)
+    parser.add_argument('--bookings', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=os.path.join(BASE_DIR, 'benchmarks', 'results.json'))
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    media_root = tempfile.mkdtemp(prefix='bench-media-')
+    # Production-like: DEBUG off (no query logging or debug templates)
+    setup_test_environment(debug=False)
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        # Receipts go to a temp dir; background work runs inline so it is timed
+        with override_settings(MEDIA_ROOT=media_root, BACKGROUND_TASKS_EAGER=True, TELEMETRY_SERVER_TIMING=False):
+            cache.clear()
+            started = time.perf_counter()
+            counts = seed(properties=args.properties, bookings=args.bookings, users=args.users,
+                          random_seed=args.seed)
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+
+            scenarios = build_scenarios()
+            if args.only:
+                scenarios = {n: f for n, f in scenarios.items() if any(n.startswith(o) for o in args.only)}
+
+            results = {}
+            for name, func in scenarios.items():
+                results[name] = measure(name, func, args.iterations)
+                print(f"  {name}: p50 {results[name]['p50_ms']:.1f}ms, {results[name]['queries']} queries")
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            'database': connection.vendor,
+            'iterations': args.iterations,
+            'dataset': counts,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print('\nREGRESSIONS:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
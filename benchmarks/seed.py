@@ -0,0 +1,50 @@
+"""
+Safe Let Stays - Benchmark Dataset
+==================================
+Seeds a deterministic dataset for the benchmark runner using the synthetic
+data generator (yourapp.synthetic), adds the two benchmark accounts, then
+rebuilds the daily analytics rollups the bookings would normally maintain.
+"""
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from yourapp.analytics import rebuild_rollups
+from yourapp.models import Booking
+from yourapp.synthetic import generate
+
+# Benchmark accounts (password for both: BENCH_PASSWORD)
+BENCH_GUEST = 'bench_guest'
+BENCH_STAFF = 'bench_staff'
+BENCH_PASSWORD = 'bench-password-123'
+
+
+def seed(properties: int = 500, bookings: int = 20000, users: int = 200, guest_bookings: int = 50,
+         random_seed: int = 42) -> dict:
+    """
+    Create the benchmark dataset in an empty database.
+
+    Args:
+        properties: Number of properties
+        bookings: Number of bookings spread across them
+        users: Number of guest accounts (plus the two bench accounts)
+        guest_bookings: Bookings owned by the bench guest (for my_bookings)
+        random_seed: Seed so every run builds the same data
+
+    Returns:
+        Dict of row counts created
+    """
+    counts = generate(properties=properties, bookings=bookings, users=users, searches=0, seed=random_seed)
+
+    # create() rather than bulk_create so the post_save signal adds their profiles
+    password = make_password(BENCH_PASSWORD)
+    guest = User.objects.create(username=BENCH_GUEST, email='bench_guest@example.com', password=password)
+    User.objects.create(
+        username=BENCH_STAFF, email='bench_staff@example.com', password=password, is_staff=True,
+    )
+    owned = list(Booking.objects.order_by('id').values_list('id', flat=True)[:guest_bookings])
+    Booking.objects.filter(id__in=owned).update(user=guest)
+
+    counts['users'] += 2
+    counts['rollups'] = rebuild_rollups()
+    return counts
@@ -0,0 +1,218 @@
+"""
+Safe Let Stays - Local API Stubs
+================================
+Stand-ins for Stripe, Mailjet and Guesty so the checkout, webhook and
+receipt flows can be load-tested offline. Each stub is a small threaded
+HTTP server answering just enough of the real API for the app's client
+libraries, with an optional fixed latency to mimic the network round trip.
+
+The app is pointed at them with the STRIPE_API_BASE, MAILJET_API_URL and
+GUESTY_API_BASE_URL settings. Stdlib only: safe to import before Django is
+configured.
+
+Usage:
+    stripe = StripeStub(latency_ms=80)
+    base_url = stripe.start()
+    ...
+    stripe.stop()
+"""
+
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes every request to the owning stub's handle()."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as the real APIs allow
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, payload = self.server.stub.handle(self.command, urlsplit(self.path).path, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        pass  # One line per request would swamp the load test output
+
+
+class StubServer:
+    """
+    Base class: a JSON API on a background thread.
+
+    Subclasses implement route(method, path, body) -> (status, payload).
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency_ms: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency_ms / 1000
+        self.address = (host, port)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> str:
+        """Start serving and return the base URL."""
+        self._server = ThreadingHTTPServer(self.address, _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'{self.name}-stub', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.route(method, path, body)
+
+    def route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        raise NotImplementedError
+
+
+# =============================================================================
+# STRIPE
+# =============================================================================
+
+class StripeStub(StubServer):
+    """
+    Checkout Sessions API: create and retrieve.
+
+    Sessions are kept in memory so the load harness can build the matching
+    checkout.session.completed webhook with session(id).
+    """
+
+    name = 'stripe'
+    SESSION_PATH = re.compile(r'^/v1/checkout/sessions/(?P<id>[\w-]+)$')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    def session(self, session_id: str) -> Optional[Dict]:
+        return self.sessions.get(session_id)
+
+    def route(self, method, path, body):
+        if method == 'POST' and path == '/v1/checkout/sessions':
+            # Stripe sends form-encoded params; nested keys stay flattened (metadata[booking_id])
+            params = dict(parse_qsl(body.decode()))
+            session_id = f'cs_test_load{next(self._ids):08d}'
+            session = {
+                'id': session_id,
+                'object': 'checkout.session',
+                'mode': params.get('mode', 'payment'),
+                'status': 'open',
+                'payment_status': 'unpaid',
+                'client_reference_id': params.get('client_reference_id'),
+                'customer_email': params.get('customer_email'),
+                'amount_total': int(params.get('line_items[0][price_data][unit_amount]', 0)),
+                'currency': params.get('line_items[0][price_data][currency]', 'gbp'),
+                'metadata': {
+                    key[len('metadata['):-1]: value for key, value in params.items() if key.startswith('metadata[')
+                },
+                'success_url': params.get('success_url'),
+                'cancel_url': params.get('cancel_url'),
+                'url': f'{self.url}/pay/{session_id}',
+            }
+            self.sessions[session_id] = session
+            return 200, session
+
+        match = self.SESSION_PATH.match(path)
+        if method == 'GET' and match and match['id'] in self.sessions:
+            return 200, self.sessions[match['id']]
+
+        return 404, {'error': {
+            'type': 'invalid_request_error',
+            'message': f'Unrecognized request URL ({method} {path})',
+        }}
+
+
+# =============================================================================
+# MAILJET
+# =============================================================================
+
+class MailjetStub(StubServer):
+    """Send API v3.1: accepts every message."""
+
+    name = 'mailjet'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.messages = 0
+        self._ids = itertools.count(1)
+
+    def route(self, method, path, body):
+        if method != 'POST' or path.rstrip('/') != '/v3.1/send':
+            return 404, {'ErrorMessage': f'Unknown resource: {path}', 'StatusCode': 404}
+        messages = json.loads(body or b'{}').get('Messages', [])
+        with self._lock:
+            self.messages += len(messages)
+        return 200, {'Messages': [
+            {
+                'Status': 'success',
+                'To': [
+                    {'Email': to.get('Email'), 'MessageID': next(self._ids), 'MessageHref': ''}
+                    for to in message.get('To', [])
+                ],
+            }
+            for message in messages
+        ]}
+
+
+# =============================================================================
+# GUESTY
+# =============================================================================
+
+class GuestyStub(StubServer):
+    """
+    Open API v1: empty listings, reservations and calendars.
+
+    Enough for availability lookups and syncs to complete without touching
+    the real account.
+    """
+
+    name = 'guesty'
+    CALENDAR_PATH = re.compile(r'^/v1/availability-pricing/api/calendar/listings/(?P<id>[\w-]+)$')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ids = itertools.count(1)
+
+    def route(self, method, path, body):
+        if self.CALENDAR_PATH.match(path):
+            return 200, {'status': 200, 'data': {'days': []}}
+        if method == 'GET' and path in ('/v1/listings', '/v1/reservations', '/v1/guests'):
+            return 200, {'results': [], 'count': 0, 'limit': 100, 'skip': 0}
+        if method == 'POST' and path == '/v1/reservations':
+            return 200, {'_id': f'res_load{next(self._ids):08d}', 'status': 'confirmed', **json.loads(body or b'{}')}
+        if method == 'GET' and path.startswith('/v1/listings/'):
+            return 200, {'_id': path.rsplit('/', 1)[-1], 'title': 'Load test listing', 'active': True}
+        return 200, {}
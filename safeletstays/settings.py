@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so request timings cover the whole stack (see yourapp/telemetry.py)
+    'yourapp.telemetry.TelemetryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,7 +72,8 @@ WSGI_APPLICATION = 'safeletstays.wsgi.application'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for telemetry
+        'BACKEND': 'yourapp.telemetry.InstrumentedTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -168,7 +171,9 @@ X_FRAME_OPTIONS = 'DENY'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Times every call to WRAPPED_BACKEND for telemetry
+        'BACKEND': 'yourapp.telemetry.InstrumentedCache',
+        'WRAPPED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'safeletstays-cache',
         'TIMEOUT': 300,
         'OPTIONS': {
@@ -193,6 +198,13 @@ DATA_UPLOAD_MAX_NUMBER_FIELDS = 100
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# File handlers queue records for a background writer thread (see
+# yourapp/log_handlers.py) so request threads never block on log I/O.
+# Under overload, sub-ERROR records are sampled and then dropped.
+# Workers share the files, so rotate them with logrotate; the handlers
+# reopen a file once it has been moved.
+LOG_QUEUE_SIZE = 10000
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -213,14 +225,16 @@ LOGGING = {
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
+            'class': 'yourapp.log_handlers.QueuedFileHandler',
             'filename': LOGS_DIR / 'security.log',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'security',
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'yourapp.log_handlers.QueuedFileHandler',
             'filename': LOGS_DIR / 'error.log',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'verbose',
         },
     },
@@ -245,7 +259,19 @@ LOGGING = {
 
 
 # =============================================================================
-# GUESTY API INTEGRATION (Uncomment when ready to use)
+# TELEMETRY (see yourapp/telemetry.py)
+# =============================================================================
+
+# Server-Timing header on responses: True, 'staff' (staff users only) or False
+TELEMETRY_SERVER_TIMING = True
+# Seconds between each worker writing its histograms to the shared cache
+TELEMETRY_FLUSH_INTERVAL = 10
+# Bearer token that lets a Prometheus scraper read /staff/metrics (optional)
+TELEMETRY_METRICS_TOKEN = os.environ.get('TELEMETRY_METRICS_TOKEN', '')
+
+
+# =============================================================================
+# GUESTY API INTEGRATION
 # =============================================================================
 # 
 # To activate Guesty integration:
@@ -254,20 +280,15 @@ LOGGING = {
 #    GUESTY_API_KEY=your_api_key_here
 #    GUESTY_API_SECRET=your_api_secret_here
 #    GUESTY_WEBHOOK_SECRET=your_webhook_secret_here
-# 3. Install python-dotenv: pip install python-dotenv
-# 4. Uncomment the settings below
-# 5. Uncomment the code in yourapp/guesty_integration.py
-# 6. Uncomment the Guesty fields in yourapp/models.py
-# 7. Run migrations: python manage.py makemigrations && python manage.py migrate
-# 8. Add API endpoints to urls.py
-#
-# from dotenv import load_dotenv
-# load_dotenv()
-#
-# GUESTY_API_KEY = os.environ.get('GUESTY_API_KEY', '')
-# GUESTY_API_SECRET = os.environ.get('GUESTY_API_SECRET', '')
-# GUESTY_WEBHOOK_SECRET = os.environ.get('GUESTY_WEBHOOK_SECRET', '')
+# 3. Set guesty_listing_id on each property (admin > Properties)
+# 4. Schedule `python manage.py sync_guesty_properties` (e.g. nightly)
 #
+GUESTY_API_KEY = os.environ.get('GUESTY_API_KEY', '')
+GUESTY_API_SECRET = os.environ.get('GUESTY_API_SECRET', '')
+GUESTY_WEBHOOK_SECRET = os.environ.get('GUESTY_WEBHOOK_SECRET', '')
+# API root; point at a local stub for load tests (benchmarks/load.py)
+GUESTY_API_BASE_URL = os.environ.get('GUESTY_API_BASE_URL', 'https://open-api.guesty.com/v1')
+
 # # Cache configuration for Guesty API responses
 # CACHES = {
 #     'default': {
@@ -314,6 +335,8 @@ LOGGING = {
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+# API root override (empty = Stripe's own); load tests point it at a local stub
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', '')
 
 
 LOGIN_REDIRECT_URL = '/my-bookings/'
@@ -328,12 +351,25 @@ LOGOUT_REDIRECT_URL = '/'
 # Mailjet API Configuration
 MAILJET_API_KEY = os.environ.get('MAILJET_API_KEY')
 MAILJET_API_SECRET = os.environ.get('MAILJET_API_SECRET')
+MAILJET_API_URL = os.environ.get('MAILJET_API_URL', 'https://api.mailjet.com/')
+
+# Outbox delivery rate (messages per second) for the deliver_emails worker
+MAIL_SEND_RATE = float(os.environ.get('MAIL_SEND_RATE', '10'))
 
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Safe Let Stays <daniel@webflare.studio>')
 SERVER_EMAIL = os.environ.get('SERVER_EMAIL', 'daniel@webflare.studio')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# =============================================================================
+# PDF RECEIPTS (see yourapp/receipts.py)
+# =============================================================================
+# ASCII85-encode PDF streams. This is ReportLab's rl_config.useA85, set once at
+# startup (AppConfig.ready), so it applies to every PDF the process renders.
+# Receipts are only served as binary files and the pure-Python encoder was
+# the slowest step of rendering them, so it is off.
+PDF_ASCII85 = False
+
 # =============================================================================
 # BUSINESS INFORMATION
 # =============================================================================
@@ -70,6 +70,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so request timings cover the whole stack (see yourapp/telemetry.py)
+    'yourapp.telemetry.TelemetryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,7 +91,8 @@ ROOT_URLCONF = 'safeletstays.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for telemetry
+        'BACKEND': 'yourapp.telemetry.InstrumentedTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -211,6 +214,10 @@ else:
         }
     }
 
+# Time every cache call for telemetry (see yourapp/telemetry.py)
+CACHES['default']['WRAPPED_BACKEND'] = CACHES['default']['BACKEND']
+CACHES['default']['BACKEND'] = 'yourapp.telemetry.InstrumentedCache'
+
 # =============================================================================
 # FILE UPLOAD SECURITY
 # =============================================================================
@@ -314,6 +321,15 @@ DATE_FORMAT_DISPLAY = '%d %b %Y'  # e.g., "17 Jan 2026"
 DATE_FORMAT_DISPLAY_FULL = '%A, %d %b %Y'  # e.g., "Friday, 17 Jan 2026"
 DATE_FORMAT_ISO = '%Y-%m-%d'  # e.g., "2026-01-17"
 
+# =============================================================================
+# PDF RECEIPTS (see yourapp/receipts.py)
+# =============================================================================
+# ASCII85-encode PDF streams. This is ReportLab's rl_config.useA85, set once at
+# startup (AppConfig.ready), so it applies to every PDF the process renders.
+# Receipts are only served as binary files and the pure-Python encoder was
+# the slowest step of rendering them, so it is off.
+PDF_ASCII85 = False
+
 # =============================================================================
 # STRIPE INTEGRATION
 # =============================================================================
@@ -321,6 +337,19 @@ DATE_FORMAT_ISO = '%Y-%m-%d'  # e.g., "2026-01-17"
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+# API root override (empty = Stripe's own); load tests point it at a local stub
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', '')
+
+
+# =============================================================================
+# GUESTY API INTEGRATION
+# =============================================================================
+
+GUESTY_API_KEY = os.environ.get('GUESTY_API_KEY', '')
+GUESTY_API_SECRET = os.environ.get('GUESTY_API_SECRET', '')
+GUESTY_WEBHOOK_SECRET = os.environ.get('GUESTY_WEBHOOK_SECRET', '')
+# API root; point at a local stub for load tests (benchmarks/load.py)
+GUESTY_API_BASE_URL = os.environ.get('GUESTY_API_BASE_URL', 'https://open-api.guesty.com/v1')
 
 
 # =============================================================================
@@ -333,6 +362,10 @@ SERVER_EMAIL = os.environ.get('SERVER_EMAIL', 'daniel@webflare.studio')
 # Mailjet API Configuration
 MAILJET_API_KEY = os.environ.get('MAILJET_API_KEY')
 MAILJET_API_SECRET = os.environ.get('MAILJET_API_SECRET')
+MAILJET_API_URL = os.environ.get('MAILJET_API_URL', 'https://api.mailjet.com/')
+
+# Outbox delivery rate (messages per second) for the deliver_emails worker
+MAIL_SEND_RATE = float(os.environ.get('MAIL_SEND_RATE', '10'))
 
 # =============================================================================
 # LOGGING
@@ -342,6 +375,13 @@ MAILJET_API_SECRET = os.environ.get('MAILJET_API_SECRET')
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# File handlers queue records for a background writer thread (see
+# yourapp/log_handlers.py) so request threads never block on log I/O.
+# Under overload, sub-ERROR records are sampled and then dropped.
+# Workers share the files, so rotate them with logrotate; the handlers
+# reopen a file once it has been moved.
+LOG_QUEUE_SIZE = 10000
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -358,14 +398,16 @@ LOGGING = {
     'handlers': {
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'yourapp.log_handlers.QueuedFileHandler',
             'filename': BASE_DIR / 'logs' / 'django_error.log',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'verbose',
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
+            'class': 'yourapp.log_handlers.QueuedFileHandler',
             'filename': BASE_DIR / 'logs' / 'security.log',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'security',
         },
     },
@@ -388,6 +430,18 @@ LOGGING = {
     },
 }
 
+
+# =============================================================================
+# TELEMETRY (see yourapp/telemetry.py)
+# =============================================================================
+
+# Server-Timing header on responses: True, 'staff' (staff users only) or False
+TELEMETRY_SERVER_TIMING = 'staff'
+# Seconds between each worker writing its histograms to the shared cache
+TELEMETRY_FLUSH_INTERVAL = 10
+# Bearer token that lets a Prometheus scraper read /staff/metrics (optional)
+TELEMETRY_METRICS_TOKEN = os.environ.get('TELEMETRY_METRICS_TOKEN', '')
+
 # =============================================================================
 # PYTHONANYWHERE STATIC FILES CONFIGURATION
 # =============================================================================
@@ -23,12 +23,23 @@ urlpatterns = [
     path('staff/add/', views.add_property_view, name='add_property'),
     path('staff/edit/<int:pk>/', views.edit_property_view, name='edit_property'),
     path('staff/delete/<int:pk>/', views.delete_property_view, name='delete_property'),
+    path('staff/properties/import/', views.bulk_import_properties, name='bulk_import_properties'),
+    path('staff/properties/prices/', views.bulk_update_prices, name='bulk_update_prices'),
+    path('staff/properties/reorder/', views.bulk_reorder_homepage, name='bulk_reorder_homepage'),
+    path('staff/metrics', views.metrics_view, name='metrics'),
+    path('staff/export/bookings.csv', views.export_bookings_csv, name='export_bookings_csv'),
+    
+    # Availability API
+    path('api/properties/availability/', views.api_batch_availability, name='api_batch_availability'),
     
     # Stripe Payment
     path('create-checkout-session/<int:property_id>/', views.create_checkout_session, name='create_checkout_session'),
     path('payment-success/', views.payment_success, name='payment_success'),
     path('payment-cancel/', views.payment_cancel, name='payment_cancel'),
     path('webhook/stripe/', views.stripe_webhook, name='stripe_webhook'),
+    
+    # Guesty
+    path('api/webhooks/guesty/', views.guesty_webhook, name='guesty_webhook'),
 ]
 
 # Only serve static files in development - in production use whitenoise or nginx (INEFF-06)
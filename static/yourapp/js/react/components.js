@@ -397,10 +397,17 @@ const PropertyCard = ({ property, variant = 'default', style }) => {
                     </div>
                 )}
                 <div className="property-card__footer">
-                    <div className="property-card__price">
-                        <span className="property-card__price-amount">£{property.pricePerNight}</span>
-                        <span className="property-card__price-unit">/night</span>
-                    </div>
+                    {property.stayTotal ? (
+                        <div className="property-card__price">
+                            <span className="property-card__price-amount">£{property.stayTotal}</span>
+                            <span className="property-card__price-unit">total for {property.stayNights} night{property.stayNights > 1 ? 's' : ''}</span>
+                        </div>
+                    ) : (
+                        <div className="property-card__price">
+                            <span className="property-card__price-amount">£{property.pricePerNight}</span>
+                            <span className="property-card__price-unit">/night</span>
+                        </div>
+                    )}
                     <span className="property-card__cta">View Details <Icons.ArrowRight /></span>
                 </div>
             </div>
@@ -1,5 +1,14 @@
-from django.contrib import admin
-from .models import Property, Booking, Profile, Destination, RecentSearch
+from django.contrib import admin, messages
+from .models import (
+    Property, Booking, Profile, Destination, RecentSearch, GuestyWebhookEvent, RateOverride, OutboundEmail,
+)
+
+
+class RateOverrideInline(admin.TabularInline):
+    model = RateOverride
+    extra = 0
+    fields = ('label', 'start_date', 'end_date', 'nightly_price', 'uplift_percent')
+
 
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
@@ -19,6 +28,13 @@ class PropertyAdmin(admin.ModelAdmin):
         ('Property Details', {
             'fields': ('price_from', 'beds', 'baths', 'capacity', 'parking', 'distance_to_stadium_mins')
         }),
+        ('Pricing', {
+            'fields': ('cleaning_fee', 'weekend_uplift_percent', 'weekly_discount_percent', 'monthly_discount_percent'),
+            'description': (
+                'The nightly rate is "Price from". '
+                'Date-specific prices and uplifts are set under Rate overrides below.'
+            ),
+        }),
         ('Search & SEO', {
             'fields': ('tags', 'keywords')
         }),
@@ -26,7 +42,26 @@ class PropertyAdmin(admin.ModelAdmin):
             'fields': ('is_featured', 'show_on_homepage', 'homepage_order'),
             'description': 'Control where this property appears on the website. Set "Show on homepage" and adjust "Homepage order" to feature in the Top Properties section.'
         }),
+        ('Guesty Integration', {
+            'fields': ('guesty_listing_id', 'guesty_last_synced'),
+            'classes': ('collapse',),
+        }),
     )
+    readonly_fields = ('guesty_last_synced',)
+    inlines = [RateOverrideInline]
+    actions = ['sync_from_guesty']
+    
+    @admin.action(description='Sync selected properties from Guesty')
+    def sync_from_guesty(self, request, queryset):
+        from .guesty_integration import sync_properties_from_guesty
+        
+        try:
+            summary = sync_properties_from_guesty(queryset)
+        except ValueError as e:
+            # API key not configured
+            self.message_user(request, str(e), level=messages.ERROR)
+            return
+        self.message_user(request, f"Successfully synced {summary['synced']} properties from Guesty.")
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -76,3 +111,22 @@ class RecentSearchAdmin(admin.ModelAdmin):
     list_filter = ('searched_at',)
     search_fields = ('location', 'user__username')
     readonly_fields = ('searched_at',)
+
+
+@admin.register(GuestyWebhookEvent)
+class GuestyWebhookEventAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'event_type', 'reservation_id', 'listing_id', 'received_at', 'processed_at', 'attempts', 'failed_at',
+    )
+    list_filter = ('event_type', 'processed_at', 'failed_at')
+    search_fields = ('reservation_id', 'listing_id')
+    readonly_fields = ('received_at',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'template', 'booking', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('template', 'status')
+    search_fields = ('booking__guest_email', 'message_id')
+    readonly_fields = ('created_at', 'sent_at', 'message_id')
+    raw_id_fields = ('booking',)
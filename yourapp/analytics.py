@@ -0,0 +1,295 @@
+"""
+Booking Analytics for Safe Let Stays
+Occupancy, ADR and RevPAR for the staff panel, read from DailyRollup rows.
+
+Each booking contributes one rollup "night" per night of its stay, keyed by
+(property, day, source, status), with its accommodation revenue spread
+evenly across those nights and an arrival on its check-in day. Booking
+saves and deletes apply the difference between the old and new
+contribution (see the receivers in models.py); bulk writes that bypass
+signals (the Guesty reservation upsert) call refresh_rollups_for() and the
+rebuild_daily_rollups command recomputes any range from scratch.
+
+    occupancy = nights sold / nights available (properties x days)
+    ADR       = revenue / nights sold
+    RevPAR    = revenue / nights available
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Booking, DailyRollup, Property
+from .pricing import to_pence, from_pence
+
+logger = logging.getLogger(__name__)
+
+# Booking fields a rollup contribution depends on
+ROLLUP_FIELDS = (
+    'booked_property_id', 'check_in', 'check_out', 'source', 'status',
+    'nightly_rate', 'cleaning_fee', 'discount', 'total_price',
+)
+
+# Statuses counted as sold nights in occupancy/ADR/RevPAR
+SOLD_STATUSES = ('confirmed', 'completed')
+
+ANALYTICS_DEFAULT_DAYS = 30
+ROLLUP_BATCH_SIZE = 1000
+
+
+# ============================================================================
+# CONTRIBUTIONS
+# ============================================================================
+
+def booking_contributions(row: Optional[Dict], start: date = None, end: date = None) -> Dict[tuple, List[int]]:
+    """
+    Rollup contribution of one booking.
+
+    Args:
+        row: Booking values for ROLLUP_FIELDS (None contributes nothing)
+        start: Only include days on or after this date
+        end: Only include days before this date
+
+    Returns:
+        Dict mapping (property_id, day, source, status) to
+        [nights, revenue_pence, arrivals]
+    """
+    contributions = {}
+    if not row or not row['check_in'] or not row['check_out']:
+        return contributions
+    nights = (row['check_out'] - row['check_in']).days
+    if nights <= 0:
+        return contributions
+
+    # Accommodation revenue: total less cleaning, else rate x nights less discount
+    if row['total_price'] is not None:
+        revenue = to_pence(row['total_price']) - to_pence(row['cleaning_fee'])
+    else:
+        revenue = to_pence(row['nightly_rate']) * nights - to_pence(row['discount'])
+    share, remainder = divmod(max(revenue, 0), nights)
+
+    for i in range(nights):
+        day = row['check_in'] + timedelta(days=i)
+        if (start and day < start) or (end and day >= end):
+            continue
+        key = (row['booked_property_id'], day, row['source'], row['status'])
+        contributions[key] = [1, share + (1 if i < remainder else 0), 1 if i == 0 else 0]
+    return contributions
+
+
+def _merge(totals: Dict[tuple, List[int]], contributions: Dict[tuple, List[int]], sign: int = 1) -> None:
+    """Add (or with sign=-1 subtract) contributions into totals."""
+    for key, values in contributions.items():
+        current = totals.setdefault(key, [0, 0, 0])
+        for i, value in enumerate(values):
+            current[i] += sign * value
+
+
+def booking_rollup_values(booking) -> Dict:
+    """ROLLUP_FIELDS of a Booking instance as a dict."""
+    return {field: getattr(booking, field) for field in ROLLUP_FIELDS}
+
+
+# ============================================================================
+# INCREMENTAL MAINTENANCE
+# ============================================================================
+
+def apply_rollup_deltas(deltas: Dict[tuple, List[int]]) -> None:
+    """
+    Apply contribution differences to the rollup table.
+
+    Reads the affected rows once, then bulk updates, creates and deletes
+    (rows that drop to zero are removed) inside one transaction.
+
+    Args:
+        deltas: Output of booking_contributions() merged with signs
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+
+    property_ids = {key[0] for key in deltas}
+    days = [key[1] for key in deltas]
+
+    with transaction.atomic():
+        existing = {
+            (row.rollup_property_id, row.day, row.source, row.status): row
+            for row in DailyRollup.objects.select_for_update().filter(
+                rollup_property_id__in=property_ids, day__gte=min(days), day__lte=max(days)
+            )
+        }
+        to_create, to_update, to_delete = [], [], []
+        for key, (nights, revenue, arrivals) in deltas.items():
+            row = existing.get(key)
+            if row is None:
+                if nights <= 0 and arrivals <= 0:
+                    # Nothing to remove (row already gone); rebuild fixes any drift
+                    continue
+                row = DailyRollup(
+                    rollup_property_id=key[0], day=key[1], source=key[2], status=key[3],
+                    revenue=Decimal('0'),
+                )
+                to_create.append(row)
+            elif row.nights + nights <= 0 and row.arrivals + arrivals <= 0:
+                to_delete.append(row.pk)
+                continue
+            else:
+                to_update.append(row)
+            row.nights += nights
+            row.revenue += from_pence(revenue)
+            row.arrivals += arrivals
+
+        if to_update:
+            DailyRollup.objects.bulk_update(to_update, ['nights', 'revenue', 'arrivals'], batch_size=ROLLUP_BATCH_SIZE)
+        if to_create:
+            DailyRollup.objects.bulk_create(to_create, batch_size=ROLLUP_BATCH_SIZE)
+        if to_delete:
+            DailyRollup.objects.filter(pk__in=to_delete).delete()
+
+
+def update_rollups_for_booking(previous: Optional[Dict], current: Optional[Dict]) -> None:
+    """
+    Move a booking's contribution from its previous to its current state.
+
+    Args:
+        previous: ROLLUP_FIELDS values before the change (None if new)
+        current: ROLLUP_FIELDS values after the change (None if deleted)
+    """
+    if previous == current:
+        return
+    deltas = {}
+    _merge(deltas, booking_contributions(previous), sign=-1)
+    _merge(deltas, booking_contributions(current))
+    apply_rollup_deltas(deltas)
+
+
+def rebuild_rollups(property_ids: Iterable[int] = None, start: date = None, end: date = None) -> int:
+    """
+    Recompute rollups from bookings for a scope.
+
+    Args:
+        property_ids: Limit to these properties (default: all)
+        start: First day to rebuild (default: unbounded)
+        end: Day after the last day to rebuild (default: unbounded)
+
+    Returns:
+        Number of rollup rows written
+    """
+    rollups = DailyRollup.objects.all()
+    bookings = Booking.objects.all()
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        rollups = rollups.filter(rollup_property_id__in=property_ids)
+        bookings = bookings.filter(booked_property_id__in=property_ids)
+    if start:
+        rollups = rollups.filter(day__gte=start)
+        bookings = bookings.filter(check_out__gt=start)
+    if end:
+        rollups = rollups.filter(day__lt=end)
+        bookings = bookings.filter(check_in__lt=end)
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    for row in bookings.values(*ROLLUP_FIELDS).iterator(chunk_size=ROLLUP_BATCH_SIZE):
+        _merge(totals, booking_contributions(row, start, end))
+
+    rows = [
+        DailyRollup(
+            rollup_property_id=key[0], day=key[1], source=key[2], status=key[3],
+            nights=nights, revenue=from_pence(revenue), arrivals=arrivals,
+        )
+        for key, (nights, revenue, arrivals) in totals.items()
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        DailyRollup.objects.bulk_create(rows, batch_size=ROLLUP_BATCH_SIZE)
+    return len(rows)
+
+
+def refresh_rollups_for(rows: Iterable[Dict]) -> None:
+    """
+    Rebuild rollups covering bookings written without signals.
+
+    Args:
+        rows: Dicts with booked_property_id, check_in and check_out for
+            every booking state touched (before and after the write)
+    """
+    rows = [r for r in rows if r.get('booked_property_id') and r.get('check_in') and r.get('check_out')]
+    if not rows:
+        return
+    rebuild_rollups(
+        property_ids={r['booked_property_id'] for r in rows},
+        start=min(r['check_in'] for r in rows),
+        end=max(r['check_out'] for r in rows),
+    )
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def _ratio(numerator, denominator, places: str = '0.01') -> Decimal:
+    if not denominator:
+        return Decimal('0').quantize(Decimal(places))
+    return (Decimal(numerator) / Decimal(denominator)).quantize(Decimal(places))
+
+
+def get_performance(start: date, end: date, available_per_day: int = None) -> Dict:
+    """
+    Occupancy, ADR and RevPAR per day and for the whole period.
+
+    Args:
+        start: First day of the period
+        end: Day after the last day of the period
+        available_per_day: Rentable properties per day (default: counted)
+
+    Returns:
+        Dict with 'days' (one entry per day), 'totals' and 'by_source'
+    """
+    if available_per_day is None:
+        available_per_day = Property.objects.count()
+    sold = DailyRollup.objects.filter(day__gte=start, day__lt=end, status__in=SOLD_STATUSES)
+
+    per_day = {
+        row['day']: row
+        for row in sold.values('day').annotate(nights_sold=Sum('nights'), revenue_total=Sum('revenue'))
+    }
+    by_source = list(
+        sold.values('source')
+        .annotate(nights_sold=Sum('nights'), revenue_total=Sum('revenue'))
+        .order_by('-revenue_total')
+    )
+
+    days = []
+    for i in range((end - start).days):
+        day = start + timedelta(days=i)
+        row = per_day.get(day, {})
+        nights = row.get('nights_sold') or 0
+        revenue = row.get('revenue_total') or Decimal('0')
+        days.append({
+            'day': day.isoformat(),
+            'nights': nights,
+            'revenue': str(revenue),
+            'occupancy': str(_ratio(nights * 100, available_per_day, '0.1')),
+            'adr': str(_ratio(revenue, nights)),
+            'revpar': str(_ratio(revenue, available_per_day)),
+        })
+
+    nights_total = sum(day['nights'] for day in days)
+    revenue_total = sum((Decimal(day['revenue']) for day in days), Decimal('0'))
+    available_total = available_per_day * len(days)
+    return {
+        'days': days,
+        'totals': {
+            'nights': nights_total,
+            'revenue': revenue_total,
+            'occupancy': _ratio(nights_total * 100, available_total, '0.1'),
+            'adr': _ratio(revenue_total, nights_total),
+            'revpar': _ratio(revenue_total, available_total),
+        },
+        'by_source': by_source,
+    }
@@ -20,5 +20,25 @@ class YourappConfig(AppConfig):
         Import signal handlers here.
         """
         # Import signals to ensure they are registered
-        # The signals are already defined in models.py using decorators
-        pass
+        # Model signals are defined in models.py using decorators; custom
+        # signals and their receivers live in signals.py
+        from . import signals  # noqa: F401
+        
+        # Cache versions bumped on catalogue and booking writes
+        from . import versioning
+        versioning.install()
+        
+        # Time SQL on every connection for request telemetry
+        from . import telemetry
+        telemetry.install()
+        
+        from django.conf import settings
+        
+        # ReportLab stream encoding is process-wide (see settings.PDF_ASCII85)
+        from reportlab import rl_config
+        rl_config.useA85 = int(getattr(settings, 'PDF_ASCII85', True))
+        
+        # Optional Stripe API root (load tests run against a local stub)
+        if settings.STRIPE_API_BASE:
+            import stripe
+            stripe.api_base = settings.STRIPE_API_BASE
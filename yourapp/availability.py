@@ -0,0 +1,143 @@
+"""
+Local Availability Store for Safe Let Stays
+Answers "which nights are taken?" for many properties at once from the
+Booking table (kept in step with Guesty by the reservation sync and
+webhooks), so search pages never fan out to the Guesty API per card.
+
+Results come back in one of two compact shapes per property:
+    ranges  [["2025-01-05", "2025-01-08"], ...]  booked nights as
+            half-open [start, end) date ranges, merged and clipped
+    bitset  "0e0"  one bit per night from the window start, packed
+            most-significant-bit first into hex (bit 0 = start date)
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from .models import Booking
+
+# Statuses that do not hold dates (everything else blocks the calendar)
+NON_BLOCKING_STATUSES = ('inquiry', 'canceled')
+
+# Request guards for the batch endpoint
+MAX_BATCH_PROPERTIES = 50
+MAX_RANGE_NIGHTS = 366
+
+DateRange = Tuple[date, date]
+
+
+def get_booked_ranges(
+    property_ids: Iterable[int],
+    start: date,
+    end: date
+) -> Dict[int, List[DateRange]]:
+    """
+    Get booked night ranges for several properties in a single query.
+
+    Args:
+        property_ids: Property primary keys
+        start: First night of the window
+        end: Day after the last night of the window (exclusive)
+
+    Returns:
+        Dict mapping every requested id to a sorted list of merged
+        [start, end) ranges clipped to the window (empty when free)
+    """
+    property_ids = list(dict.fromkeys(property_ids))
+    ranges = {pk: [] for pk in property_ids}
+    if not property_ids or start >= end:
+        return ranges
+
+    for pk, check_in, check_out in _booked_stays(property_ids, start, end):
+        _add_stay(ranges[pk], check_in, check_out, start, end)
+    return ranges
+
+
+async def aget_booked_ranges(
+    property_ids: Iterable[int],
+    start: date,
+    end: date
+) -> Dict[int, List[DateRange]]:
+    """Async get_booked_ranges(), for async views."""
+    property_ids = list(dict.fromkeys(property_ids))
+    ranges = {pk: [] for pk in property_ids}
+    if not property_ids or start >= end:
+        return ranges
+
+    async for pk, check_in, check_out in _booked_stays(property_ids, start, end):
+        _add_stay(ranges[pk], check_in, check_out, start, end)
+    return ranges
+
+
+def _booked_stays(property_ids: List[int], start: date, end: date):
+    return (
+        Booking.objects
+        .filter(booked_property_id__in=property_ids, check_in__lt=end, check_out__gt=start)
+        .exclude(status__in=NON_BLOCKING_STATUSES)
+        .order_by('booked_property_id', 'check_in')
+        .values_list('booked_property_id', 'check_in', 'check_out')
+    )
+
+
+def _add_stay(merged: List[DateRange], check_in: date, check_out: date, start: date, end: date) -> None:
+    range_start, range_end = max(check_in, start), min(check_out, end)
+    if merged and range_start <= merged[-1][1]:
+        # Overlapping or back-to-back stays collapse into one range
+        merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+    else:
+        merged.append((range_start, range_end))
+
+
+def ranges_to_bitset(ranges: List[DateRange], start: date, nights: int) -> str:
+    """
+    Pack booked ranges into a hex bitset with one bit per night.
+
+    Args:
+        ranges: Booked [start, end) ranges inside the window
+        start: First night of the window (bit 0)
+        nights: Number of nights in the window
+
+    Returns:
+        Hex string of ceil(nights / 4) characters
+    """
+    if nights <= 0:
+        return ''
+    bits = 0
+    for range_start, range_end in ranges:
+        first = (range_start - start).days
+        length = (range_end - range_start).days
+        bits |= ((1 << length) - 1) << (nights - first - length)
+    width = (nights + 3) // 4
+    # Pad on the right so bit 0 is always the leading bit of the first digit
+    return format(bits << (width * 4 - nights), f'0{width}x')
+
+
+def serialize_availability(
+    ranges: Dict[int, List[DateRange]],
+    start: date,
+    end: date,
+    fmt: str = 'ranges'
+) -> Dict[str, Dict]:
+    """
+    Shape get_booked_ranges() output for a JSON response.
+
+    Args:
+        ranges: Output of get_booked_ranges()
+        start: First night of the window
+        end: Day after the last night of the window
+        fmt: 'ranges' or 'bitset'
+
+    Returns:
+        Dict keyed by property id (as a string, for JSON) with an
+        'available' flag and the booked nights in the requested shape
+    """
+    nights = (end - start).days
+    result = {}
+    for pk, booked in ranges.items():
+        entry = {'available': not booked}
+        if fmt == 'bitset':
+            entry['bitset'] = ranges_to_bitset(booked, start, nights)
+        else:
+            entry['booked'] = [[s.isoformat(), e.isoformat()] for s, e in booked]
+        result[str(pk)] = entry
+    return result
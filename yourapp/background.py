@@ -0,0 +1,64 @@
+"""
+Background Jobs for Safe Let Stays
+Runs short, best-effort jobs (cache refreshes, file generation) on a small
+process-wide thread pool so request threads can return immediately.
+
+Durable work that must survive a restart belongs in a management command
+driven worker instead.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_MAX_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Create the shared pool on first use (after any fork by the WSGI server)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_MAX_WORKERS', BACKGROUND_MAX_WORKERS),
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(func: Callable, args: tuple, kwargs: dict):
+    """Run a job, logging failures and releasing the thread's DB connections."""
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Background job {func.__name__} failed: {e}", exc_info=True)
+    finally:
+        connections.close_all()
+
+
+def submit(func: Callable, *args, **kwargs) -> Future:
+    """
+    Run func(*args, **kwargs) in the background.
+
+    Set BACKGROUND_TASKS_EAGER = True in settings to run jobs inline
+    (useful in tests and one-off scripts).
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            logger.error(f"Background job {func.__name__} failed: {e}", exc_info=True)
+            future.set_exception(e)
+        return future
+    return _get_executor().submit(_run, func, args, kwargs)
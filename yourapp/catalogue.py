@@ -0,0 +1,261 @@
+"""
+Bulk Catalogue Operations for Safe Let Stays
+Import, reprice and reorder many properties at once.
+
+Each operation validates everything up front, writes with one
+bulk_create/bulk_update inside a transaction, and then sends a single
+catalogue_changed signal (see signals.py) once the transaction commits,
+rather than a post_save per property.
+"""
+
+import csv
+import io
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Sequence
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .forms import PropertyImportForm
+from .models import Property
+from .pricing import to_pence, from_pence, percent_to_bp, apply_bp
+from .signals import catalogue_changed
+
+logger = logging.getLogger(__name__)
+
+MAX_IMPORT_ROWS = 1000
+MAX_IMPORT_BYTES = 5 * 1024 * 1024  # 5 MB
+BULK_BATCH_SIZE = 500
+
+# Sanity bounds for a single bulk price change
+MIN_PRICE_CHANGE_PERCENT = -90
+MAX_PRICE_CHANGE_PERCENT = 500
+
+
+class CatalogueError(ValueError):
+    """A bulk operation was rejected; nothing was written."""
+
+    def __init__(self, message: str, errors: Dict = None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+def _notify(property_ids: List[int], action: str) -> None:
+    """Send catalogue_changed once the surrounding transaction commits."""
+    transaction.on_commit(
+        lambda: catalogue_changed.send(sender=Property, property_ids=property_ids, action=action)
+    )
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def parse_import_file(content: bytes, filename: str = '') -> List[Dict]:
+    """
+    Parse an uploaded CSV or JSON property list.
+
+    Args:
+        content: Raw file bytes
+        filename: Original name, used to pick the format (.json, else CSV)
+
+    Returns:
+        List of row dicts keyed by Property field name
+
+    Raises:
+        CatalogueError: If the file is too large, malformed or has too many rows
+    """
+    if len(content) > MAX_IMPORT_BYTES:
+        raise CatalogueError(f'File too large (maximum {MAX_IMPORT_BYTES // (1024 * 1024)} MB).')
+    try:
+        text = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise CatalogueError('File must be UTF-8 encoded.')
+
+    if filename.lower().endswith('.json'):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise CatalogueError(f'Invalid JSON: {e}')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise CatalogueError('JSON must be a list of objects.')
+    else:
+        rows = [
+            {key.strip(): value for key, value in row.items() if key}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+
+    if not rows:
+        raise CatalogueError('No rows found.')
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise CatalogueError(f'Too many rows (maximum {MAX_IMPORT_ROWS}).')
+    return rows
+
+
+def _unique_slugs(titles: Sequence[str]) -> List[str]:
+    """Slugs for new properties that clash with neither the table nor each other."""
+    taken = set(Property.objects.values_list('slug', flat=True))
+    slugs = []
+    for title in titles:
+        base = slugify(title) or 'property'
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def import_properties(rows: Iterable[Dict]) -> List[Property]:
+    """
+    Validate and create many properties in one transaction.
+
+    Every row goes through PropertyImportForm (the same sanitising as the
+    staff property form); if any row fails nothing is created.
+
+    Args:
+        rows: Row dicts keyed by Property field name
+
+    Returns:
+        The created properties
+
+    Raises:
+        CatalogueError: With errors keyed by row number (1-based)
+    """
+    defaults = {
+        field.name: field.get_default()
+        for field in Property._meta.concrete_fields
+        if field.has_default() and field.name in PropertyImportForm.Meta.fields
+    }
+
+    instances, errors = [], {}
+    for number, row in enumerate(rows, start=1):
+        data = {**defaults, **{key: value for key, value in row.items() if value not in (None, '')}}
+        form = PropertyImportForm(data=data)
+        if form.is_valid():
+            instances.append(form.save(commit=False))
+        else:
+            errors[number] = {field: [str(e) for e in errs] for field, errs in form.errors.items()}
+    if errors:
+        raise CatalogueError(f'{len(errors)} rows failed validation.', errors)
+
+    now = timezone.now()
+    for instance, slug in zip(instances, _unique_slugs([p.title for p in instances])):
+        # bulk_create skips save() and auto_now, so fill those in here
+        instance.slug = slug
+        instance.created_at = instance.updated_at = now
+
+    with transaction.atomic():
+        created = Property.objects.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+        if created and created[0].pk is None:
+            # Backends without RETURNING: look the new rows up by slug
+            by_slug = dict(Property.objects.filter(slug__in=[p.slug for p in created]).values_list('slug', 'id'))
+            for p in created:
+                p.pk = by_slug[p.slug]
+        _notify([p.pk for p in created], 'import')
+
+    logger.info(f"Bulk imported {len(created)} properties")
+    return created
+
+
+# ============================================================================
+# PRICES & ORDERING
+# ============================================================================
+
+def adjust_prices(percent, area: str = None, property_ids: Iterable[int] = None) -> int:
+    """
+    Change the base nightly rate (price_from) of many properties by a percentage.
+
+    Args:
+        percent: Change in percent (e.g. 10 or -5.5), rounded to the penny
+        area: Limit to properties in this area (case-insensitive)
+        property_ids: Limit to these properties
+
+    Returns:
+        Number of properties repriced
+
+    Raises:
+        CatalogueError: If the percentage is out of bounds or no scope is given
+    """
+    try:
+        percent = Decimal(str(percent))
+    except InvalidOperation:
+        raise CatalogueError('Change must be a number.')
+    if not percent.is_finite() or not MIN_PRICE_CHANGE_PERCENT <= percent <= MAX_PRICE_CHANGE_PERCENT:
+        raise CatalogueError(
+            f'Change must be between {MIN_PRICE_CHANGE_PERCENT}% and {MAX_PRICE_CHANGE_PERCENT}%.'
+        )
+    if not area and property_ids is None:
+        raise CatalogueError('Choose an area or properties to reprice.')
+
+    properties = Property.objects.only('id', 'price_from', 'updated_at')
+    if area:
+        properties = properties.filter(area__iexact=area)
+    if property_ids is not None:
+        properties = properties.filter(pk__in=list(property_ids))
+
+    bp = percent_to_bp(percent)
+    now = timezone.now()
+    with transaction.atomic():
+        changed = []
+        for p in properties.select_for_update():
+            p.price_from = max(from_pence(apply_bp(to_pence(p.price_from), bp)), from_pence(100))
+            # bulk_update skips auto_now; updated_at feeds the pricing cache key
+            p.updated_at = now
+            changed.append(p)
+        Property.objects.bulk_update(changed, ['price_from', 'updated_at'], batch_size=BULK_BATCH_SIZE)
+        _notify([p.pk for p in changed], 'price')
+
+    logger.info(f"Bulk repriced {len(changed)} properties by {percent}% (area={area or 'any'})")
+    return len(changed)
+
+
+def reorder_homepage(property_ids: Sequence[int]) -> int:
+    """
+    Set the homepage Top Properties list in one write.
+
+    Listed properties are shown in the given order; any other property
+    currently on the homepage is taken off it.
+
+    Args:
+        property_ids: Property ids, first shown first
+
+    Returns:
+        Number of properties whose homepage settings changed
+
+    Raises:
+        CatalogueError: If an id is repeated or unknown
+    """
+    property_ids = [int(pk) for pk in property_ids]
+    if len(set(property_ids)) != len(property_ids):
+        raise CatalogueError('Each property can only appear once.')
+
+    position = {pk: order for order, pk in enumerate(property_ids, start=1)}
+    now = timezone.now()
+    with transaction.atomic():
+        properties = list(
+            Property.objects.select_for_update()
+            .filter(Q(pk__in=property_ids) | Q(show_on_homepage=True))
+        )
+        unknown = set(property_ids) - {p.pk for p in properties}
+        if unknown:
+            raise CatalogueError(f"Unknown property ids: {', '.join(map(str, sorted(unknown)))}")
+
+        changed = []
+        for p in properties:
+            shown, order = (True, position[p.pk]) if p.pk in position else (False, 0)
+            if (p.show_on_homepage, p.homepage_order) != (shown, order):
+                p.show_on_homepage, p.homepage_order, p.updated_at = shown, order, now
+                changed.append(p)
+        Property.objects.bulk_update(
+            changed, ['show_on_homepage', 'homepage_order', 'updated_at'], batch_size=BULK_BATCH_SIZE
+        )
+        if changed:
+            _notify([p.pk for p in changed], 'reorder')
+
+    logger.info(f"Homepage reordered: {len(property_ids)} shown, {len(changed)} changed")
+    return len(changed)
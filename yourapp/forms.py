@@ -119,6 +119,29 @@ class PropertyForm(forms.ModelForm):
         return image
 
 
+class PropertyImportForm(PropertyForm):
+    """Validates one row of a bulk property import (no image upload)."""
+
+    class Meta(PropertyForm.Meta):
+        fields = [
+            'title', 'short_description', 'description',
+            'area', 'city', 'postcode',
+            'price_from', 'cleaning_fee', 'beds', 'baths', 'capacity', 'parking',
+            'distance_to_stadium_mins', 'tags', 'keywords', 'is_featured',
+            'show_on_homepage', 'homepage_order', 'guesty_listing_id',
+        ]
+
+    def clean_area(self):
+        area = sanitize_text(self.cleaned_data.get('area', ''))
+        validate_no_scripts(area)
+        return area
+
+    def clean_city(self):
+        city = sanitize_text(self.cleaned_data.get('city', ''))
+        validate_no_scripts(city)
+        return city
+
+
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from .models import Profile
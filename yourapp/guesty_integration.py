@@ -9,8 +9,9 @@ SETUP INSTRUCTIONS:
 2. Add the following to your .env file or settings:
    - GUESTY_API_KEY=your_api_key_here
    - GUESTY_API_SECRET=your_api_secret_here (if using OAuth)
-3. Uncomment the code sections below
-4. Run migrations if needed for any new model fields
+3. Link properties to listings via Property.guesty_listing_id (admin or staff panel)
+4. Run `python manage.py sync_guesty_properties` (e.g. nightly from cron) and
+   `python manage.py sync_guesty_reservations` (e.g. every few minutes)
 5. Set up webhook endpoints in Guesty dashboard pointing to your server
 
 API Documentation: https://docs.guesty.com/
@@ -19,719 +20,1592 @@ Author: Safe Let Stays
 Created: November 2025
 """
 
-# import requests
-# import json
-# import logging
-# from datetime import datetime, timedelta
-# from typing import Optional, List, Dict, Any
-# from django.conf import settings
-# from django.core.cache import cache
-# from django.utils import timezone
+import requests
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional, List, Dict, Any
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .telemetry import timed
+from .versioning import bump as bump_versions
 
-# logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
-# # Guesty API Configuration
-# GUESTY_API_BASE_URL = "https://open-api.guesty.com/v1"
-# GUESTY_API_KEY = getattr(settings, 'GUESTY_API_KEY', None)
-# GUESTY_API_SECRET = getattr(settings, 'GUESTY_API_SECRET', None)
-# 
-# # Cache settings (in seconds)
-# AVAILABILITY_CACHE_TTL = 300  # 5 minutes
-# PROPERTY_CACHE_TTL = 3600  # 1 hour
-# 
-# # Rate limiting settings
-# API_RATE_LIMIT_CALLS = 100
-# API_RATE_LIMIT_PERIOD = 60  # seconds
+# Guesty API Configuration
+GUESTY_API_BASE_URL = getattr(settings, 'GUESTY_API_BASE_URL', "https://open-api.guesty.com/v1")
+GUESTY_API_KEY = getattr(settings, 'GUESTY_API_KEY', None)
+GUESTY_API_SECRET = getattr(settings, 'GUESTY_API_SECRET', None)
+
+# Cache settings (in seconds)
+AVAILABILITY_CACHE_TTL = 300  # 5 minutes
+PROPERTY_CACHE_TTL = 3600  # 1 hour
+CACHE_STALE_TTL = 3600  # How long past its TTL a response may still be served stale
+NEGATIVE_CACHE_TTL = 30  # How long a failed lookup is remembered
+REFRESH_LOCK_TTL = 60  # Upper bound on a background refresh (request timeout is 30s)
+
+# Rate limiting settings
+API_RATE_LIMIT_CALLS = 100
+API_RATE_LIMIT_PERIOD = 60  # seconds
+
+# Bulk sync settings
+SYNC_MAX_WORKERS = 8
+SYNC_BULK_BATCH_SIZE = 500
+
+# Webhook inbox settings
+WEBHOOK_BATCH_SIZE = 500  # Inbox events applied per transaction
+WEBHOOK_MAX_ATTEMPTS = 5  # Failed runs before an event is parked
 
 
 # ============================================================================
-# API CLIENT CLASS
+# CLIENT-SIDE RATE LIMITING
 # ============================================================================
 
-# class GuestyAPIClient:
-#     """
-#     Main client for interacting with Guesty API.
-#     
-#     Usage:
-#         client = GuestyAPIClient()
-#         availability = client.get_availability('property_id', '2025-01-01', '2025-01-07')
-#     """
-#     
-#     def __init__(self, api_key: str = None):
-#         """
-#         Initialize the Guesty API client.
-#         
-#         Args:
-#             api_key: Optional API key. If not provided, uses settings.GUESTY_API_KEY
-#         """
-#         self.api_key = api_key or GUESTY_API_KEY
-#         self.base_url = GUESTY_API_BASE_URL
-#         self.session = requests.Session()
-#         self._setup_session()
-#     
-#     def _setup_session(self):
-#         """Configure the requests session with default headers."""
-#         self.session.headers.update({
-#             'Authorization': f'Bearer {self.api_key}',
-#             'Content-Type': 'application/json',
-#             'Accept': 'application/json',
-#         })
-#     
-#     def _make_request(
-#         self, 
-#         method: str, 
-#         endpoint: str, 
-#         params: Dict = None, 
-#         data: Dict = None,
-#         use_cache: bool = True,
-#         cache_ttl: int = AVAILABILITY_CACHE_TTL
-#     ) -> Optional[Dict]:
-#         """
-#         Make an API request to Guesty.
-#         
-#         Args:
-#             method: HTTP method (GET, POST, PUT, DELETE)
-#             endpoint: API endpoint (without base URL)
-#             params: Query parameters
-#             data: Request body data
-#             use_cache: Whether to use caching for GET requests
-#             cache_ttl: Cache time-to-live in seconds
-#             
-#         Returns:
-#             API response as dictionary or None on error
-#         """
-#         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-#         cache_key = f"guesty:{endpoint}:{json.dumps(params or {}, sort_keys=True)}"
-#         
-#         # Check cache for GET requests
-#         if method.upper() == 'GET' and use_cache:
-#             cached = cache.get(cache_key)
-#             if cached:
-#                 logger.debug(f"Cache hit for {endpoint}")
-#                 return cached
-#         
-#         try:
-#             response = self.session.request(
-#                 method=method.upper(),
-#                 url=url,
-#                 params=params,
-#                 json=data,
-#                 timeout=30
-#             )
-#             response.raise_for_status()
-#             result = response.json()
-#             
-#             # Cache successful GET responses
-#             if method.upper() == 'GET' and use_cache:
-#                 cache.set(cache_key, result, cache_ttl)
-#             
-#             return result
-#             
-#         except requests.exceptions.HTTPError as e:
-#             logger.error(f"Guesty API HTTP error: {e.response.status_code} - {e.response.text}")
-#             return None
-#         except requests.exceptions.RequestException as e:
-#             logger.error(f"Guesty API request error: {str(e)}")
-#             return None
-#         except json.JSONDecodeError as e:
-#             logger.error(f"Guesty API JSON decode error: {str(e)}")
-#             return None
-#     
-#     # ========================================================================
-#     # PROPERTY METHODS
-#     # ========================================================================
-#     
-#     def get_listings(self, limit: int = 100, skip: int = 0) -> Optional[List[Dict]]:
-#         """
-#         Get all listings from Guesty.
-#         
-#         Args:
-#             limit: Maximum number of listings to return
-#             skip: Number of listings to skip (for pagination)
-#             
-#         Returns:
-#             List of listing dictionaries
-#         """
-#         response = self._make_request(
-#             'GET',
-#             '/listings',
-#             params={'limit': limit, 'skip': skip},
-#             cache_ttl=PROPERTY_CACHE_TTL
-#         )
-#         return response.get('results', []) if response else None
-#     
-#     def get_listing(self, listing_id: str) -> Optional[Dict]:
-#         """
-#         Get a specific listing by ID.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             
-#         Returns:
-#             Listing dictionary
-#         """
-#         return self._make_request(
-#             'GET',
-#             f'/listings/{listing_id}',
-#             cache_ttl=PROPERTY_CACHE_TTL
-#         )
-#     
-#     # ========================================================================
-#     # AVAILABILITY METHODS
-#     # ========================================================================
-#     
-#     def get_availability(
-#         self, 
-#         listing_id: str, 
-#         start_date: str, 
-#         end_date: str
-#     ) -> Optional[Dict]:
-#         """
-#         Get availability calendar for a listing.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             start_date: Start date (YYYY-MM-DD format)
-#             end_date: End date (YYYY-MM-DD format)
-#             
-#         Returns:
-#             Availability data with blocked dates and pricing
-#         """
-#         return self._make_request(
-#             'GET',
-#             f'/availability-pricing/api/calendar/listings/{listing_id}',
-#             params={
-#                 'startDate': start_date,
-#                 'endDate': end_date
-#             }
-#         )
-#     
-#     def get_blocked_dates(
-#         self, 
-#         listing_id: str, 
-#         start_date: str, 
-#         end_date: str
-#     ) -> List[str]:
-#         """
-#         Get list of blocked/unavailable dates for a listing.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             start_date: Start date (YYYY-MM-DD format)
-#             end_date: End date (YYYY-MM-DD format)
-#             
-#         Returns:
-#             List of blocked date strings in YYYY-MM-DD format
-#         """
-#         availability = self.get_availability(listing_id, start_date, end_date)
-#         blocked_dates = []
-#         
-#         if availability and 'data' in availability:
-#             for day in availability['data'].get('days', []):
-#                 if day.get('status') in ['booked', 'blocked', 'unavailable']:
-#                     blocked_dates.append(day.get('date'))
-#                 # Also check if minimum stay requirements block the date
-#                 elif not day.get('available', True):
-#                     blocked_dates.append(day.get('date'))
-#         
-#         return blocked_dates
-#     
-#     def check_availability(
-#         self, 
-#         listing_id: str, 
-#         check_in: str, 
-#         check_out: str, 
-#         guests: int = 1
-#     ) -> Dict[str, Any]:
-#         """
-#         Check if specific dates are available for booking.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             check_in: Check-in date (YYYY-MM-DD format)
-#             check_out: Check-out date (YYYY-MM-DD format)
-#             guests: Number of guests
-#             
-#         Returns:
-#             Dictionary with availability status and pricing info
-#         """
-#         blocked_dates = self.get_blocked_dates(listing_id, check_in, check_out)
-#         
-#         # Parse dates to check each night
-#         start = datetime.strptime(check_in, '%Y-%m-%d')
-#         end = datetime.strptime(check_out, '%Y-%m-%d')
-#         
-#         unavailable_nights = []
-#         current = start
-#         while current < end:
-#             date_str = current.strftime('%Y-%m-%d')
-#             if date_str in blocked_dates:
-#                 unavailable_nights.append(date_str)
-#             current += timedelta(days=1)
-#         
-#         is_available = len(unavailable_nights) == 0
-#         
-#         # Get pricing if available
-#         pricing = None
-#         if is_available:
-#             pricing = self.get_quote(listing_id, check_in, check_out, guests)
-#         
-#         return {
-#             'available': is_available,
-#             'unavailable_nights': unavailable_nights,
-#             'pricing': pricing,
-#             'check_in': check_in,
-#             'check_out': check_out,
-#             'guests': guests
-#         }
-#     
-#     def update_availability(
-#         self, 
-#         listing_id: str, 
-#         dates: List[str], 
-#         status: str = 'blocked',
-#         note: str = None
-#     ) -> bool:
-#         """
-#         Update availability for specific dates (block/unblock).
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             dates: List of dates to update (YYYY-MM-DD format)
-#             status: 'available' or 'blocked'
-#             note: Optional note for the block
-#             
-#         Returns:
-#             True if successful, False otherwise
-#         """
-#         data = {
-#             'listingId': listing_id,
-#             'dates': dates,
-#             'status': status
-#         }
-#         if note:
-#             data['note'] = note
-#         
-#         response = self._make_request(
-#             'PUT',
-#             f'/availability-pricing/api/calendar/listings/{listing_id}',
-#             data=data
-#         )
-#         
-#         # Invalidate cache
-#         if response:
-#             cache.delete_pattern(f"guesty:*{listing_id}*")
-#         
-#         return response is not None
-#     
-#     # ========================================================================
-#     # RESERVATION/BOOKING METHODS
-#     # ========================================================================
-#     
-#     def get_reservations(
-#         self, 
-#         listing_id: str = None,
-#         status: str = None,
-#         start_date: str = None,
-#         end_date: str = None,
-#         limit: int = 100
-#     ) -> Optional[List[Dict]]:
-#         """
-#         Get reservations with optional filters.
-#         
-#         Args:
-#             listing_id: Filter by listing ID
-#             status: Filter by status (confirmed, canceled, inquiry, etc.)
-#             start_date: Filter by check-in after this date
-#             end_date: Filter by check-in before this date
-#             limit: Maximum number of results
-#             
-#         Returns:
-#             List of reservation dictionaries
-#         """
-#         params = {'limit': limit}
-#         
-#         if listing_id:
-#             params['listingId'] = listing_id
-#         if status:
-#             params['status'] = status
-#         if start_date:
-#             params['checkInDateFrom'] = start_date
-#         if end_date:
-#             params['checkInDateTo'] = end_date
-#         
-#         response = self._make_request('GET', '/reservations', params=params)
-#         return response.get('results', []) if response else None
-#     
-#     def get_reservation(self, reservation_id: str) -> Optional[Dict]:
-#         """
-#         Get a specific reservation by ID.
-#         
-#         Args:
-#             reservation_id: Guesty reservation ID
-#             
-#         Returns:
-#             Reservation dictionary
-#         """
-#         return self._make_request('GET', f'/reservations/{reservation_id}')
-#     
-#     def create_reservation(
-#         self,
-#         listing_id: str,
-#         check_in: str,
-#         check_out: str,
-#         guest_name: str,
-#         guest_email: str,
-#         guest_phone: str = None,
-#         guests: int = 1,
-#         notes: str = None,
-#         source: str = 'Direct'
-#     ) -> Optional[Dict]:
-#         """
-#         Create a new reservation in Guesty.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             check_in: Check-in date (YYYY-MM-DD format)
-#             check_out: Check-out date (YYYY-MM-DD format)
-#             guest_name: Guest's full name
-#             guest_email: Guest's email address
-#             guest_phone: Guest's phone number (optional)
-#             guests: Number of guests
-#             notes: Internal notes (optional)
-#             source: Booking source (default: 'Direct')
-#             
-#         Returns:
-#             Created reservation dictionary
-#         """
-#         data = {
-#             'listingId': listing_id,
-#             'checkInDateLocalized': check_in,
-#             'checkOutDateLocalized': check_out,
-#             'status': 'confirmed',
-#             'source': source,
-#             'guestsCount': guests,
-#             'guest': {
-#                 'fullName': guest_name,
-#                 'email': guest_email,
-#             }
-#         }
-#         
-#         if guest_phone:
-#             data['guest']['phone'] = guest_phone
-#         if notes:
-#             data['notes'] = notes
-#         
-#         response = self._make_request('POST', '/reservations', data=data)
-#         
-#         # Invalidate availability cache for this listing
-#         if response:
-#             cache.delete_pattern(f"guesty:*{listing_id}*")
-#         
-#         return response
-#     
-#     def cancel_reservation(self, reservation_id: str, reason: str = None) -> bool:
-#         """
-#         Cancel a reservation.
-#         
-#         Args:
-#             reservation_id: Guesty reservation ID
-#             reason: Cancellation reason (optional)
-#             
-#         Returns:
-#             True if successful, False otherwise
-#         """
-#         data = {'status': 'canceled'}
-#         if reason:
-#             data['cancellationReason'] = reason
-#         
-#         response = self._make_request(
-#             'PUT',
-#             f'/reservations/{reservation_id}',
-#             data=data
-#         )
-#         return response is not None
-#     
-#     # ========================================================================
-#     # PRICING/QUOTE METHODS
-#     # ========================================================================
-#     
-#     def get_quote(
-#         self, 
-#         listing_id: str, 
-#         check_in: str, 
-#         check_out: str, 
-#         guests: int = 1
-#     ) -> Optional[Dict]:
-#         """
-#         Get a price quote for a stay.
-#         
-#         Args:
-#             listing_id: Guesty listing ID
-#             check_in: Check-in date (YYYY-MM-DD format)
-#             check_out: Check-out date (YYYY-MM-DD format)
-#             guests: Number of guests
-#             
-#         Returns:
-#             Quote dictionary with pricing breakdown
-#         """
-#         data = {
-#             'listingId': listing_id,
-#             'checkInDateLocalized': check_in,
-#             'checkOutDateLocalized': check_out,
-#             'guestsCount': guests
-#         }
-#         
-#         return self._make_request('POST', '/reservations/quotes', data=data)
-#     
-#     # ========================================================================
-#     # GUEST METHODS
-#     # ========================================================================
-#     
-#     def get_guest(self, guest_id: str) -> Optional[Dict]:
-#         """
-#         Get guest information by ID.
-#         
-#         Args:
-#             guest_id: Guesty guest ID
-#             
-#         Returns:
-#             Guest dictionary
-#         """
-#         return self._make_request('GET', f'/guests/{guest_id}')
-#     
-#     def search_guests(self, email: str = None, phone: str = None) -> Optional[List[Dict]]:
-#         """
-#         Search for guests by email or phone.
-#         
-#         Args:
-#             email: Guest email to search
-#             phone: Guest phone to search
-#             
-#         Returns:
-#             List of matching guest dictionaries
-#         """
-#         params = {}
-#         if email:
-#             params['email'] = email
-#         if phone:
-#             params['phone'] = phone
-#         
-#         response = self._make_request('GET', '/guests', params=params)
-#         return response.get('results', []) if response else None
+class TokenBucket:
+    """
+    Thread-safe token bucket for throttling outbound API calls.
+
+    Holds up to ``capacity`` tokens and refills at ``capacity / period`` tokens
+    per second, so bursts are allowed but the sustained rate never exceeds the
+    Guesty quota. Shared by every client in the process.
+    """
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.fill_rate = capacity / float(period)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, sleeping until one is available.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if a token was taken, False if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.fill_rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# Process-wide limiter so concurrent sync workers share one quota
+api_rate_limiter = TokenBucket(API_RATE_LIMIT_CALLS, API_RATE_LIMIT_PERIOD)
 
 
 # ============================================================================
-# HELPER FUNCTIONS
+# LISTING CACHE VERSIONING
 # ============================================================================
 
-# def get_guesty_client() -> GuestyAPIClient:
-#     """
-#     Get a configured Guesty API client instance.
-#     
-#     Returns:
-#         GuestyAPIClient instance
-#         
-#     Raises:
-#         ValueError: If API key is not configured
-#     """
-#     if not GUESTY_API_KEY:
-#         raise ValueError(
-#             "Guesty API key not configured. "
-#             "Set GUESTY_API_KEY in your Django settings."
-#         )
-#     return GuestyAPIClient()
+LISTING_CACHE_VERSION_KEY = "guesty:listing-version:{listing_id}"
+
+
+def get_listing_cache_version(listing_id: str) -> int:
+    """
+    Get the current cache generation for a listing.
+    
+    Every cached response scoped to the listing embeds this number in its key,
+    so bumping it orphans all of them at once (they then expire via TTL).
+    
+    Args:
+        listing_id: Guesty listing ID
+        
+    Returns:
+        Current version number
+    """
+    key = LISTING_CACHE_VERSION_KEY.format(listing_id=listing_id)
+    # Seed from the clock rather than 1 so a version evicted from the cache
+    # can never restart below one that stale entries were written under
+    return cache.get_or_set(key, time.time_ns() // 1_000_000, timeout=None)
+
+
+def invalidate_listing_cache(listing_id: str) -> None:
+    """
+    Invalidate all cached Guesty responses for a listing.
+    
+    A single atomic incr on the listing's version key, so it is O(1) on every
+    cache backend (no key pattern scans, no django-redis dependency).
+    
+    Args:
+        listing_id: Guesty listing ID
+    """
+    key = LISTING_CACHE_VERSION_KEY.format(listing_id=listing_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version stored yet (or evicted) - start a fresh generation
+        if not cache.add(key, time.time_ns() // 1_000_000, timeout=None):
+            cache.incr(key)
 
 
-# def get_property_blocked_dates(property_obj, months_ahead: int = 6) -> List[str]:
-#     """
-#     Get blocked dates for a property from Guesty.
-#     
-#     Args:
-#         property_obj: Django Property model instance
-#         months_ahead: Number of months ahead to check
-#         
-#     Returns:
-#         List of blocked date strings (YYYY-MM-DD format)
-#     """
-#     if not hasattr(property_obj, 'guesty_listing_id') or not property_obj.guesty_listing_id:
-#         return []
-#     
-#     try:
-#         client = get_guesty_client()
-#         start_date = timezone.now().strftime('%Y-%m-%d')
-#         end_date = (timezone.now() + timedelta(days=months_ahead * 30)).strftime('%Y-%m-%d')
-#         
-#         return client.get_blocked_dates(
-#             property_obj.guesty_listing_id,
-#             start_date,
-#             end_date
-#         )
-#     except Exception as e:
-#         logger.error(f"Error fetching Guesty blocked dates: {str(e)}")
-#         return []
+# ============================================================================
+# API CLIENT CLASS
+# ============================================================================
 
+class GuestyAPIClient:
+    """
+    Main client for interacting with Guesty API.
+    
+    Usage:
+        client = GuestyAPIClient()
+        availability = client.get_availability('property_id', '2025-01-01', '2025-01-07')
+    """
+    
+    def __init__(self, api_key: str = None, rate_limiter: TokenBucket = None):
+        """
+        Initialize the Guesty API client.
+        
+        Args:
+            api_key: Optional API key. If not provided, uses settings.GUESTY_API_KEY
+            rate_limiter: Optional token bucket. Defaults to the process-wide limiter
+        """
+        self.api_key = api_key or GUESTY_API_KEY
+        self.base_url = GUESTY_API_BASE_URL
+        self.rate_limiter = rate_limiter or api_rate_limiter
+        self.session = requests.Session()
+        self._setup_session()
+    
+    def _setup_session(self):
+        """Configure the requests session with default headers."""
+        self.session.headers.update({
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+        # Size the connection pool for concurrent sync workers
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=SYNC_MAX_WORKERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _make_request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        params: Dict = None, 
+        data: Dict = None,
+        use_cache: bool = True,
+        cache_ttl: int = AVAILABILITY_CACHE_TTL,
+        listing_id: str = None,
+        block: bool = True
+    ) -> Optional[Dict]:
+        """
+        Make an API request to Guesty.
+        
+        Cached GET responses are served stale-while-revalidate: once past
+        cache_ttl the stale copy is returned immediately and a single
+        background refresh is scheduled. Failed lookups are cached briefly as
+        negative entries so an outage is not retried on every request.
+        
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            data: Request body data
+            use_cache: Whether to use caching for GET requests
+            cache_ttl: Cache time-to-live in seconds
+            listing_id: Listing the response belongs to, so the cached copy
+                is dropped by invalidate_listing_cache()
+            block: On a cold cache miss, wait for the API (True) or return
+                None at once and warm the cache in the background (False)
+            
+        Returns:
+            API response as dictionary or None on error
+        """
+        method = method.upper()
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        
+        if method != 'GET' or not use_cache:
+            return self._send(method, url, params, data)
+        
+        # Hash the params so keys stay memcached-safe (no spaces, bounded length)
+        params_digest = hashlib.md5(json.dumps(params or {}, sort_keys=True).encode()).hexdigest()
+        cache_key = f"guesty:{endpoint}:{params_digest}"
+        if listing_id:
+            cache_key = f"guesty:listing:{listing_id}:v{get_listing_cache_version(listing_id)}:{cache_key}"
+        
+        entry = cache.get(cache_key)
+        if entry is not None:
+            if time.time() >= entry['fresh_until']:
+                self._schedule_refresh(cache_key, url, params, cache_ttl)
+            else:
+                logger.debug(f"Cache hit for {endpoint}")
+            return entry['value']
+        
+        if not block:
+            self._schedule_refresh(cache_key, url, params, cache_ttl)
+            return None
+        
+        return self._refresh(cache_key, url, params, cache_ttl)
+    
+    def _send(self, method: str, url: str, params: Dict = None, data: Dict = None) -> Optional[Dict]:
+        """Perform a rate-limited HTTP call, returning the JSON body or None on error."""
+        self.rate_limiter.acquire()
+        
+        try:
+            with timed('guesty'):
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=data,
+                    timeout=30
+                )
+            response.raise_for_status()
+            return response.json()
+            
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Guesty API HTTP error: {e.response.status_code} - {e.response.text}")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Guesty API request error: {str(e)}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"Guesty API JSON decode error: {str(e)}")
+            return None
+    
+    def _refresh(self, cache_key: str, url: str, params: Dict, cache_ttl: int) -> Optional[Dict]:
+        """Fetch a GET response and store it in the cache envelope."""
+        result = self._send('GET', url, params)
+        now = time.time()
+        
+        if result is not None:
+            cache.set(cache_key, {
+                'value': result,
+                'fresh_until': now + cache_ttl,
+                'negative': False,
+            }, cache_ttl + CACHE_STALE_TTL)
+            return result
+        
+        entry = cache.get(cache_key)
+        if entry is not None and not entry['negative']:
+            # Keep serving the last good copy; retry after the negative TTL
+            entry['fresh_until'] = now + NEGATIVE_CACHE_TTL
+            cache.set(cache_key, entry, NEGATIVE_CACHE_TTL + CACHE_STALE_TTL)
+            return entry['value']
+        
+        cache.set(cache_key, {
+            'value': None,
+            'fresh_until': now + NEGATIVE_CACHE_TTL,
+            'negative': True,
+        }, NEGATIVE_CACHE_TTL)
+        return None
+    
+    def _schedule_refresh(self, cache_key: str, url: str, params: Dict, cache_ttl: int) -> None:
+        """Start one background refresh per key; concurrent callers skip it."""
+        from yourapp import background
+        
+        lock_key = f"{cache_key}:refresh-lock"
+        if not cache.add(lock_key, 1, REFRESH_LOCK_TTL):
+            return
+        
+        def refresh():
+            try:
+                self._refresh(cache_key, url, params, cache_ttl)
+            finally:
+                cache.delete(lock_key)
+        
+        background.submit(refresh)
+    
+    # ========================================================================
+    # PROPERTY METHODS
+    # ========================================================================
+    
+    def get_listings(self, limit: int = 100, skip: int = 0) -> Optional[List[Dict]]:
+        """
+        Get all listings from Guesty.
+        
+        Args:
+            limit: Maximum number of listings to return
+            skip: Number of listings to skip (for pagination)
+            
+        Returns:
+            List of listing dictionaries
+        """
+        response = self._make_request(
+            'GET',
+            '/listings',
+            params={'limit': limit, 'skip': skip},
+            cache_ttl=PROPERTY_CACHE_TTL
+        )
+        return response.get('results', []) if response else None
+    
+    def get_listing(self, listing_id: str, use_cache: bool = True) -> Optional[Dict]:
+        """
+        Get a specific listing by ID.
+        
+        Args:
+            listing_id: Guesty listing ID
+            use_cache: Set False to bypass the cache (e.g. for scheduled syncs)
+            
+        Returns:
+            Listing dictionary
+        """
+        return self._make_request(
+            'GET',
+            f'/listings/{listing_id}',
+            use_cache=use_cache,
+            cache_ttl=PROPERTY_CACHE_TTL,
+            listing_id=listing_id
+        )
+    
+    # ========================================================================
+    # AVAILABILITY METHODS
+    # ========================================================================
+    
+    def get_availability(
+        self, 
+        listing_id: str, 
+        start_date: str, 
+        end_date: str,
+        block: bool = True
+    ) -> Optional[Dict]:
+        """
+        Get availability calendar for a listing.
+        
+        Args:
+            listing_id: Guesty listing ID
+            start_date: Start date (YYYY-MM-DD format)
+            end_date: End date (YYYY-MM-DD format)
+            block: Wait for the API on a cold cache (False returns None
+                immediately and warms the cache in the background)
+            
+        Returns:
+            Availability data with blocked dates and pricing
+        """
+        return self._make_request(
+            'GET',
+            f'/availability-pricing/api/calendar/listings/{listing_id}',
+            params={
+                'startDate': start_date,
+                'endDate': end_date
+            },
+            listing_id=listing_id,
+            block=block
+        )
+    
+    def get_blocked_dates(
+        self, 
+        listing_id: str, 
+        start_date: str, 
+        end_date: str,
+        block: bool = True
+    ) -> List[str]:
+        """
+        Get list of blocked/unavailable dates for a listing.
+        
+        Args:
+            listing_id: Guesty listing ID
+            start_date: Start date (YYYY-MM-DD format)
+            end_date: End date (YYYY-MM-DD format)
+            block: Wait for the API on a cold cache (see get_availability)
+            
+        Returns:
+            List of blocked date strings in YYYY-MM-DD format
+        """
+        availability = self.get_availability(listing_id, start_date, end_date, block=block)
+        blocked_dates = []
+        
+        if availability and 'data' in availability:
+            for day in availability['data'].get('days', []):
+                if day.get('status') in ['booked', 'blocked', 'unavailable']:
+                    blocked_dates.append(day.get('date'))
+                # Also check if minimum stay requirements block the date
+                elif not day.get('available', True):
+                    blocked_dates.append(day.get('date'))
+        
+        return blocked_dates
+    
+    def check_availability(
+        self, 
+        listing_id: str, 
+        check_in: str, 
+        check_out: str, 
+        guests: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Check if specific dates are available for booking.
+        
+        Args:
+            listing_id: Guesty listing ID
+            check_in: Check-in date (YYYY-MM-DD format)
+            check_out: Check-out date (YYYY-MM-DD format)
+            guests: Number of guests
+            
+        Returns:
+            Dictionary with availability status and pricing info
+        """
+        blocked_dates = self.get_blocked_dates(listing_id, check_in, check_out)
+        
+        # Parse dates to check each night
+        start = datetime.strptime(check_in, '%Y-%m-%d')
+        end = datetime.strptime(check_out, '%Y-%m-%d')
+        
+        unavailable_nights = []
+        current = start
+        while current < end:
+            date_str = current.strftime('%Y-%m-%d')
+            if date_str in blocked_dates:
+                unavailable_nights.append(date_str)
+            current += timedelta(days=1)
+        
+        is_available = len(unavailable_nights) == 0
+        
+        # Get pricing if available
+        pricing = None
+        if is_available:
+            pricing = self.get_quote(listing_id, check_in, check_out, guests)
+        
+        return {
+            'available': is_available,
+            'unavailable_nights': unavailable_nights,
+            'pricing': pricing,
+            'check_in': check_in,
+            'check_out': check_out,
+            'guests': guests
+        }
+    
+    def update_availability(
+        self, 
+        listing_id: str, 
+        dates: List[str], 
+        status: str = 'blocked',
+        note: str = None
+    ) -> bool:
+        """
+        Update availability for specific dates (block/unblock).
+        
+        Args:
+            listing_id: Guesty listing ID
+            dates: List of dates to update (YYYY-MM-DD format)
+            status: 'available' or 'blocked'
+            note: Optional note for the block
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        data = {
+            'listingId': listing_id,
+            'dates': dates,
+            'status': status
+        }
+        if note:
+            data['note'] = note
+        
+        response = self._make_request(
+            'PUT',
+            f'/availability-pricing/api/calendar/listings/{listing_id}',
+            data=data
+        )
+        
+        # Invalidate cache
+        if response:
+            invalidate_listing_cache(listing_id)
+        
+        return response is not None
+    
+    # ========================================================================
+    # RESERVATION/BOOKING METHODS
+    # ========================================================================
+    
+    def get_reservations(
+        self, 
+        listing_id: str = None,
+        status: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = 100
+    ) -> Optional[List[Dict]]:
+        """
+        Get reservations with optional filters.
+        
+        Args:
+            listing_id: Filter by listing ID
+            status: Filter by status (confirmed, canceled, inquiry, etc.)
+            start_date: Filter by check-in after this date
+            end_date: Filter by check-in before this date
+            limit: Maximum number of results
+            
+        Returns:
+            List of reservation dictionaries
+        """
+        params = {'limit': limit}
+        
+        if listing_id:
+            params['listingId'] = listing_id
+        if status:
+            params['status'] = status
+        if start_date:
+            params['checkInDateFrom'] = start_date
+        if end_date:
+            params['checkInDateTo'] = end_date
+        
+        response = self._make_request('GET', '/reservations', params=params, listing_id=listing_id)
+        return response.get('results', []) if response else None
+    
+    def get_reservation(self, reservation_id: str) -> Optional[Dict]:
+        """
+        Get a specific reservation by ID.
+        
+        Args:
+            reservation_id: Guesty reservation ID
+            
+        Returns:
+            Reservation dictionary
+        """
+        return self._make_request('GET', f'/reservations/{reservation_id}')
+    
+    def get_reservations_updated_since(
+        self,
+        updated_since: str = None,
+        limit: int = 100,
+        skip: int = 0
+    ) -> Optional[Dict]:
+        """
+        Get a page of reservations changed at or after a timestamp.
+        
+        Results are sorted by lastUpdatedAt ascending so callers can page
+        through them and advance a high-water-mark cursor.
+        
+        Args:
+            updated_since: ISO 8601 timestamp (None returns all reservations)
+            limit: Page size
+            skip: Number of reservations to skip (for pagination)
+            
+        Returns:
+            Response dictionary with 'results' and 'count'
+        """
+        params = {
+            'limit': limit,
+            'skip': skip,
+            'sort': 'lastUpdatedAt',
+        }
+        if updated_since:
+            params['filters'] = json.dumps([
+                {'field': 'lastUpdatedAt', 'operator': '$gte', 'value': updated_since}
+            ])
+        
+        return self._make_request('GET', '/reservations', params=params, use_cache=False)
+    
+    def create_reservation(
+        self,
+        listing_id: str,
+        check_in: str,
+        check_out: str,
+        guest_name: str,
+        guest_email: str,
+        guest_phone: str = None,
+        guests: int = 1,
+        notes: str = None,
+        source: str = 'Direct'
+    ) -> Optional[Dict]:
+        """
+        Create a new reservation in Guesty.
+        
+        Args:
+            listing_id: Guesty listing ID
+            check_in: Check-in date (YYYY-MM-DD format)
+            check_out: Check-out date (YYYY-MM-DD format)
+            guest_name: Guest's full name
+            guest_email: Guest's email address
+            guest_phone: Guest's phone number (optional)
+            guests: Number of guests
+            notes: Internal notes (optional)
+            source: Booking source (default: 'Direct')
+            
+        Returns:
+            Created reservation dictionary
+        """
+        data = {
+            'listingId': listing_id,
+            'checkInDateLocalized': check_in,
+            'checkOutDateLocalized': check_out,
+            'status': 'confirmed',
+            'source': source,
+            'guestsCount': guests,
+            'guest': {
+                'fullName': guest_name,
+                'email': guest_email,
+            }
+        }
+        
+        if guest_phone:
+            data['guest']['phone'] = guest_phone
+        if notes:
+            data['notes'] = notes
+        
+        response = self._make_request('POST', '/reservations', data=data)
+        
+        # Invalidate availability cache for this listing
+        if response:
+            invalidate_listing_cache(listing_id)
+        
+        return response
+    
+    def cancel_reservation(self, reservation_id: str, reason: str = None) -> bool:
+        """
+        Cancel a reservation.
+        
+        Args:
+            reservation_id: Guesty reservation ID
+            reason: Cancellation reason (optional)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        data = {'status': 'canceled'}
+        if reason:
+            data['cancellationReason'] = reason
+        
+        response = self._make_request(
+            'PUT',
+            f'/reservations/{reservation_id}',
+            data=data
+        )
+        return response is not None
+    
+    # ========================================================================
+    # PRICING/QUOTE METHODS
+    # ========================================================================
+    
+    def get_quote(
+        self, 
+        listing_id: str, 
+        check_in: str, 
+        check_out: str, 
+        guests: int = 1
+    ) -> Optional[Dict]:
+        """
+        Get a price quote for a stay.
+        
+        Args:
+            listing_id: Guesty listing ID
+            check_in: Check-in date (YYYY-MM-DD format)
+            check_out: Check-out date (YYYY-MM-DD format)
+            guests: Number of guests
+            
+        Returns:
+            Quote dictionary with pricing breakdown
+        """
+        data = {
+            'listingId': listing_id,
+            'checkInDateLocalized': check_in,
+            'checkOutDateLocalized': check_out,
+            'guestsCount': guests
+        }
+        
+        return self._make_request('POST', '/reservations/quotes', data=data)
+    
+    # ========================================================================
+    # GUEST METHODS
+    # ========================================================================
+    
+    def get_guest(self, guest_id: str) -> Optional[Dict]:
+        """
+        Get guest information by ID.
+        
+        Args:
+            guest_id: Guesty guest ID
+            
+        Returns:
+            Guest dictionary
+        """
+        return self._make_request('GET', f'/guests/{guest_id}')
+    
+    def search_guests(self, email: str = None, phone: str = None) -> Optional[List[Dict]]:
+        """
+        Search for guests by email or phone.
+        
+        Args:
+            email: Guest email to search
+            phone: Guest phone to search
+            
+        Returns:
+            List of matching guest dictionaries
+        """
+        params = {}
+        if email:
+            params['email'] = email
+        if phone:
+            params['phone'] = phone
+        
+        response = self._make_request('GET', '/guests', params=params)
+        return response.get('results', []) if response else None
 
-# def sync_property_from_guesty(property_obj) -> bool:
-#     """
-#     Sync property data from Guesty to local database.
-#     
-#     Args:
-#         property_obj: Django Property model instance with guesty_listing_id
-#         
-#     Returns:
-#         True if sync successful, False otherwise
-#     """
-#     if not hasattr(property_obj, 'guesty_listing_id') or not property_obj.guesty_listing_id:
-#         return False
-#     
-#     try:
-#         client = get_guesty_client()
-#         listing = client.get_listing(property_obj.guesty_listing_id)
-#         
-#         if not listing:
-#             return False
-#         
-#         # Update property fields from Guesty data
-#         # Customize this mapping based on your Property model fields
-#         property_obj.title = listing.get('title', property_obj.title)
-#         property_obj.description = listing.get('publicDescription', {}).get('summary', property_obj.description)
-#         property_obj.beds = listing.get('bedrooms', property_obj.beds)
-#         property_obj.baths = listing.get('bathrooms', property_obj.baths)
-#         property_obj.capacity = listing.get('accommodates', property_obj.capacity)
-#         
-#         # Get base price
-#         prices = listing.get('prices', {})
-#         if prices.get('basePrice'):
-#             property_obj.price_from = prices['basePrice']
-#         
-#         property_obj.save()
-#         return True
-#         
-#     except Exception as e:
-#         logger.error(f"Error syncing property from Guesty: {str(e)}")
-#         return False
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+def get_guesty_client() -> GuestyAPIClient:
+    """
+    Get a configured Guesty API client instance.
+    
+    Returns:
+        GuestyAPIClient instance
+        
+    Raises:
+        ValueError: If API key is not configured
+    """
+    if not GUESTY_API_KEY:
+        raise ValueError(
+            "Guesty API key not configured. "
+            "Set GUESTY_API_KEY in your Django settings."
+        )
+    return GuestyAPIClient()
+
+
+def get_property_blocked_dates(property_obj, months_ahead: int = 6) -> List[str]:
+    """
+    Get blocked dates for a property from Guesty.
+    
+    Args:
+        property_obj: Django Property model instance
+        months_ahead: Number of months ahead to check
+        
+    Returns:
+        List of blocked date strings (YYYY-MM-DD format)
+    """
+    if not hasattr(property_obj, 'guesty_listing_id') or not property_obj.guesty_listing_id:
+        return []
+    
+    try:
+        client = get_guesty_client()
+        start_date = timezone.now().strftime('%Y-%m-%d')
+        end_date = (timezone.now() + timedelta(days=months_ahead * 30)).strftime('%Y-%m-%d')
+        
+        # Never hold a page render on Guesty: a cold cache returns no blocked
+        # dates now and is warmed in the background for the next request.
+        return client.get_blocked_dates(
+            property_obj.guesty_listing_id,
+            start_date,
+            end_date,
+            block=False
+        )
+    except Exception as e:
+        logger.error(f"Error fetching Guesty blocked dates: {str(e)}")
+        return []
+
+
+def _apply_listing(property_obj, listing: Dict) -> List[str]:
+    """
+    Copy Guesty listing data onto a property without saving it.
+    
+    Args:
+        property_obj: Django Property model instance
+        listing: Listing dictionary from the Guesty API
+        
+    Returns:
+        Names of the fields whose values actually changed
+    """
+    # Customize this mapping based on your Property model fields
+    incoming = {
+        'title': listing.get('title'),
+        'description': (listing.get('publicDescription') or {}).get('summary'),
+        'beds': listing.get('bedrooms'),
+        'baths': listing.get('bathrooms'),
+        'capacity': listing.get('accommodates'),
+    }
+    
+    # Get base price
+    base_price = (listing.get('prices') or {}).get('basePrice')
+    if base_price:
+        try:
+            incoming['price_from'] = Decimal(str(base_price)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            logger.warning(f"Ignoring invalid Guesty base price: {base_price}")
+    
+    changed = []
+    for field, value in incoming.items():
+        if value is not None and getattr(property_obj, field) != value:
+            setattr(property_obj, field, value)
+            changed.append(field)
+    return changed
+
+
+def sync_property_from_guesty(property_obj) -> bool:
+    """
+    Sync property data from Guesty to local database.
+    
+    Args:
+        property_obj: Django Property model instance with guesty_listing_id
+        
+    Returns:
+        True if sync successful, False otherwise
+    """
+    if not getattr(property_obj, 'guesty_listing_id', None):
+        return False
+    
+    try:
+        client = get_guesty_client()
+        listing = client.get_listing(property_obj.guesty_listing_id)
+        
+        if not listing:
+            return False
+        
+        changed = _apply_listing(property_obj, listing)
+        property_obj.guesty_last_synced = timezone.now()
+        property_obj.save(update_fields=changed + ['guesty_last_synced', 'updated_at'])
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error syncing property from Guesty: {str(e)}")
+        return False
+
+
+def sync_properties_from_guesty(
+    properties=None,
+    client: GuestyAPIClient = None,
+    max_workers: int = SYNC_MAX_WORKERS
+) -> Dict[str, int]:
+    """
+    Sync many properties from Guesty in one pass.
+    
+    Listings are fetched concurrently on a thread pool (throttled by the shared
+    token bucket) and all changes are written back with a single bulk_update
+    limited to the fields that actually changed.
+    
+    Args:
+        properties: Property queryset or iterable (defaults to all linked properties)
+        client: Optional GuestyAPIClient instance
+        max_workers: Number of concurrent listing fetches
+        
+    Returns:
+        Counts of synced, updated and failed properties
+    """
+    from yourapp.models import Property
+    
+    if properties is None:
+        properties = Property.objects.exclude(guesty_listing_id__isnull=True)
+    properties = [p for p in properties if p.guesty_listing_id]
+    summary = {'synced': 0, 'updated': 0, 'failed': 0}
+    if not properties:
+        return summary
+    
+    client = client or get_guesty_client()
+    synced_at = timezone.now()
+    changed_fields = set()
+    to_update = []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(client.get_listing, prop.guesty_listing_id, use_cache=False): prop
+            for prop in properties
+        }
+        for future in as_completed(futures):
+            prop = futures[future]
+            try:
+                listing = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching Guesty listing {prop.guesty_listing_id}: {str(e)}")
+                listing = None
+            
+            if not listing:
+                summary['failed'] += 1
+                continue
+            
+            changed = _apply_listing(prop, listing)
+            if changed:
+                # bulk_update() bypasses auto_now, so stamp it ourselves
+                prop.updated_at = synced_at
+                changed_fields.update(changed)
+                summary['updated'] += 1
+            prop.guesty_last_synced = synced_at
+            to_update.append(prop)
+            summary['synced'] += 1
+    
+    if to_update:
+        fields = sorted(changed_fields) + ['guesty_last_synced']
+        if changed_fields:
+            fields.append('updated_at')
+        Property.objects.bulk_update(to_update, fields, batch_size=SYNC_BULK_BATCH_SIZE)
+        if changed_fields:
+            bump_versions(Property)
+    
+    logger.info(
+        f"Guesty property sync: {summary['synced']} synced, "
+        f"{summary['updated']} updated, {summary['failed']} failed"
+    )
+    return summary
+
+
+def update_properties_from_listings(listings: Dict[str, Dict]) -> int:
+    """
+    Apply listing payloads (e.g. from listing.updated webhooks) to the
+    properties linked to them, with one bulk_update of the changed fields.
+    
+    Args:
+        listings: Listing payloads keyed by Guesty listing id
+        
+    Returns:
+        Number of properties changed
+    """
+    from yourapp.models import Property
+    
+    if not listings:
+        return 0
+    
+    updated_at = timezone.now()
+    changed_fields = set()
+    to_update = []
+    for prop in Property.objects.filter(guesty_listing_id__in=list(listings)):
+        changed = _apply_listing(prop, listings[prop.guesty_listing_id])
+        if changed:
+            # bulk_update() bypasses auto_now, so stamp it ourselves
+            prop.updated_at = updated_at
+            changed_fields.update(changed)
+            to_update.append(prop)
+    
+    if to_update:
+        fields = sorted(changed_fields) + ['updated_at']
+        Property.objects.bulk_update(to_update, fields, batch_size=SYNC_BULK_BATCH_SIZE)
+        bump_versions(Property)
+    return len(to_update)
+
+
+# Guesty reservation status -> local Booking status
+RESERVATION_STATUS_MAP = {
+    'inquiry': 'inquiry',
+    'awaiting_payment': 'awaiting_payment',
+    'reserved': 'pending',
+    'confirmed': 'confirmed',
+    'checked_in': 'confirmed',
+    'checked_out': 'completed',
+    'closed': 'completed',
+    'canceled': 'canceled',
+    'cancelled': 'canceled',
+    'declined': 'canceled',
+    'expired': 'canceled',
+}
+
+# Guesty reservation source -> local Booking source
+RESERVATION_SOURCE_MAP = {
+    'airbnb': 'airbnb',
+    'airbnb2': 'airbnb',
+    'booking.com': 'booking',
+    'bookingcom': 'booking',
+    'vrbo': 'vrbo',
+    'homeaway': 'vrbo',
+    'website': 'direct',
+    'direct': 'direct',
+}
+
+# Booking fields overwritten when a reservation is re-synced
+RESERVATION_SYNC_FIELDS = [
+    'booked_property', 'guest_name', 'guest_email', 'guest_phone',
+    'check_in', 'check_out', 'guests', 'status', 'source',
+    'nightly_rate', 'cleaning_fee', 'total_price', 'updated_at',
+]
+
+RESERVATION_SYNC_CURSOR = 'guesty_reservations'
+RESERVATION_SYNC_PAGE_SIZE = 100
+
+
+def _money(value) -> Optional[Decimal]:
+    """Convert a Guesty money value to a 2dp Decimal (None if missing/invalid)."""
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _reservation_updated_at(reservation: Dict) -> Optional[datetime]:
+    """Return the reservation's last-modified timestamp as an aware datetime."""
+    from django.utils.dateparse import parse_datetime
+    
+    value = reservation.get('lastUpdatedAt') or reservation.get('updatedAt')
+    return parse_datetime(value) if value else None
+
+
+def _reservation_values(reservation: Dict) -> Dict[str, Any]:
+    """
+    Booking field values carried by a reservation payload.
+    
+    Only keys present in the payload produce values, so a webhook delta
+    that leaves out e.g. `guest` or `money` leaves those fields alone.
+    nightly_rate is derived later, once the stay dates are known.
+    
+    Raises:
+        ValueError: If a stay date is present but malformed
+    """
+    from django.utils.dateparse import parse_date
+    
+    values = {}
+    for key, field in (('checkInDateLocalized', 'check_in'), ('checkOutDateLocalized', 'check_out')):
+        if reservation.get(key):
+            value = parse_date(str(reservation[key])[:10])
+            if value is None:
+                raise ValueError(f"Unparseable {key} {reservation[key]!r}")
+            values[field] = value
+    
+    guest = reservation.get('guest')
+    if isinstance(guest, dict):
+        if 'fullName' in guest:
+            values['guest_name'] = (guest['fullName'] or 'Guest')[:200]
+        if 'email' in guest:
+            values['guest_email'] = guest['email'] or ''
+        if 'phone' in guest:
+            values['guest_phone'] = (guest['phone'] or '')[:50]
+    
+    money = reservation.get('money')
+    if isinstance(money, dict):
+        if 'fareAccommodation' in money:
+            values['accommodation'] = _money(money['fareAccommodation'])
+        if 'fareCleaning' in money:
+            values['cleaning_fee'] = _money(money['fareCleaning']) or Decimal('0')
+        if 'totalPrice' in money:
+            values['total_price'] = _money(money['totalPrice'])
+    
+    if 'guestsCount' in reservation:
+        values['guests'] = reservation['guestsCount'] or 1
+    if 'status' in reservation:
+        status = str(reservation['status'] or '').lower()
+        values['status'] = RESERVATION_STATUS_MAP.get(status, 'pending')
+    if 'source' in reservation:
+        source = str(reservation['source'] or '').lower()
+        values['source'] = RESERVATION_SOURCE_MAP.get(source, 'guesty')
+    return values
+
+
+# Values for fields a new reservation's payload leaves out
+RESERVATION_DEFAULTS = {
+    'guest_name': 'Guest', 'guest_email': '', 'guest_phone': '', 'guests': 1,
+    'status': 'pending', 'source': 'guesty', 'nightly_rate': None,
+    'cleaning_fee': Decimal('0'), 'total_price': None,
+}
+
+
+def booking_from_reservation(reservation: Dict, property_id: int = None, existing: Dict = None):
+    """
+    Build an unsaved Booking from a Guesty reservation payload.
+    
+    Fields the payload does not carry keep their current values when the
+    booking already exists (`existing`), or take RESERVATION_DEFAULTS.
+    
+    Args:
+        reservation: Reservation dictionary from the Guesty API or a webhook
+        property_id: Local Property primary key for the reservation's listing
+            (None to keep the existing booking's property)
+        existing: Current RESERVATION_SYNC_FIELDS values of the local booking
+        
+    Returns:
+        Unsaved Booking instance, or None if the booking is new and the
+        payload lacks stay dates or a linked listing
+        
+    Raises:
+        ValueError: If a stay date is present but malformed
+    """
+    from yourapp.models import Booking
+    
+    values = dict(existing or RESERVATION_DEFAULTS)
+    incoming = _reservation_values(reservation)
+    has_fare = 'accommodation' in incoming
+    accommodation = incoming.pop('accommodation', None)
+    values.update(incoming)
+    if property_id:
+        values['booked_property_id'] = property_id
+    if not values.get('booked_property_id') or not values.get('check_in') or not values.get('check_out'):
+        return None
+    
+    if has_fare:
+        nights = max((values['check_out'] - values['check_in']).days, 1)
+        values['nightly_rate'] = (accommodation / nights).quantize(Decimal('0.01')) if accommodation else None
+    
+    return Booking(guesty_reservation_id=reservation['_id'], **values)
+
+
+def upsert_reservations(reservations: List[Dict], batch_size: int = RESERVATION_SYNC_PAGE_SIZE,
+                        strict: bool = False) -> int:
+    """
+    Insert or update Bookings for a batch of Guesty reservations.
+    
+    Uses bulk_create(update_conflicts=True) keyed on guesty_reservation_id,
+    so each batch is a single upsert statement. Partial payloads (webhook
+    deltas) are merged over the existing bookings, so fields they omit keep
+    their values. Reservations for listings not linked to a local property
+    are skipped.
+    
+    Args:
+        reservations: Reservation dictionaries (later entries win on duplicate IDs)
+        batch_size: Rows per INSERT statement
+        strict: Raise instead of logging and skipping a reservation that
+            cannot be written (malformed or missing stay dates)
+        
+    Returns:
+        Number of bookings written
+        
+    Raises:
+        ValueError: In strict mode, if a reservation cannot be written
+    """
+    from yourapp.models import Booking, Property
+    
+    # Collapse duplicates - ON CONFLICT cannot touch the same row twice
+    latest = {r['_id']: r for r in reservations if r.get('_id')}
+    listing_ids = {r.get('listingId') for r in latest.values() if r.get('listingId')}
+    property_ids = dict(
+        Property.objects.filter(guesty_listing_id__in=listing_ids)
+        .values_list('guesty_listing_id', 'pk')
+    )
+    fields = ['booked_property_id' if f == 'booked_property' else f
+              for f in RESERVATION_SYNC_FIELDS if f != 'updated_at']
+    existing = {
+        row.pop('guesty_reservation_id'): row
+        for row in Booking.objects.filter(guesty_reservation_id__in=list(latest)).values(
+            'guesty_reservation_id', *fields
+        )
+    }
+    
+    bookings = []
+    for reservation_id, reservation in latest.items():
+        property_id = property_ids.get(reservation.get('listingId'))
+        current = existing.get(reservation_id)
+        if not property_id and not current:
+            logger.debug(f"Skipping reservation {reservation_id} for unlinked listing")
+            continue
+        try:
+            booking = booking_from_reservation(reservation, property_id, current)
+            if booking is None:
+                raise ValueError(f"Reservation {reservation_id} is new but has no stay dates")
+        except ValueError as e:
+            if strict:
+                raise
+            logger.warning(f"Skipping Guesty reservation {reservation_id}: {e}")
+            continue
+        bookings.append(booking)
+    
+    if bookings:
+        from yourapp.analytics import refresh_rollups_for
+        
+        # bulk_create skips signals, so rebuild rollups over old and new stays
+        previous = [
+            {key: row[key] for key in ('booked_property_id', 'check_in', 'check_out')}
+            for row in existing.values()
+        ]
+        Booking.objects.bulk_create(
+            bookings,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['guesty_reservation_id'],
+            update_fields=RESERVATION_SYNC_FIELDS,
+        )
+        refresh_rollups_for(previous + [
+            {'booked_property_id': b.booked_property_id, 'check_in': b.check_in, 'check_out': b.check_out}
+            for b in bookings
+        ])
+        bump_versions(Booking)
+    return len(bookings)
+
+
+def sync_reservations_from_guesty(
+    client: GuestyAPIClient = None,
+    full: bool = False,
+    page_size: int = RESERVATION_SYNC_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Incrementally import reservations changed since the last run.
+    
+    Pages through reservations ordered by lastUpdatedAt starting at the
+    stored high-water mark, upserting each page and advancing the cursor in
+    the same transaction, so an interrupted run resumes where it stopped.
+    
+    Args:
+        client: Optional GuestyAPIClient instance
+        full: Ignore the stored cursor and re-import everything
+        page_size: Reservations per API page / upsert batch
+        
+    Returns:
+        Counts of fetched and written reservations plus the new cursor
+    """
+    from django.db import transaction
+    from yourapp.models import SyncCursor
+    
+    client = client or get_guesty_client()
+    cursor, _ = SyncCursor.objects.get_or_create(name=RESERVATION_SYNC_CURSOR)
+    since = None if full or not cursor.value else cursor.value.isoformat()
+    high_water = None if full else cursor.value
+    summary = {'fetched': 0, 'written': 0}
+    skip = 0
+    
+    while True:
+        response = client.get_reservations_updated_since(since, limit=page_size, skip=skip)
+        if response is None:
+            raise RuntimeError("Guesty reservation sync aborted: API request failed")
+        
+        page = response.get('results', [])
+        if not page:
+            break
+        
+        for reservation in page:
+            updated_at = _reservation_updated_at(reservation)
+            if updated_at and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+        
+        with transaction.atomic():
+            summary['written'] += upsert_reservations(page, batch_size=page_size)
+            if high_water and high_water != cursor.value:
+                cursor.value = high_water
+                cursor.save(update_fields=['value', 'updated_at'])
+        
+        summary['fetched'] += len(page)
+        skip += len(page)
+        if len(page) < page_size:
+            break
+    
+    summary['cursor'] = cursor.value
+    logger.info(
+        f"Guesty reservation sync: {summary['fetched']} fetched, "
+        f"{summary['written']} written, cursor={cursor.value}"
+    )
+    return summary
 
 
 # ============================================================================
 # WEBHOOK HANDLERS
 # ============================================================================
 
-# class GuestyWebhookHandler:
-#     """
-#     Handler for Guesty webhook events.
-#     
-#     Guesty can send webhooks for:
-#     - reservation.created
-#     - reservation.updated
-#     - reservation.canceled
-#     - listing.updated
-#     - calendar.updated
-#     
-#     Setup in Guesty dashboard:
-#     1. Go to Integrations > Webhooks
-#     2. Add webhook URL: https://yourdomain.com/api/webhooks/guesty/
-#     3. Select events to subscribe to
-#     """
-#     
-#     @staticmethod
-#     def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
-#         """
-#         Verify webhook signature from Guesty.
-#         
-#         Args:
-#             payload: Raw request body
-#             signature: X-Guesty-Signature header value
-#             secret: Webhook secret from Guesty
-#             
-#         Returns:
-#             True if signature is valid
-#         """
-#         import hmac
-#         import hashlib
-#         
-#         expected = hmac.new(
-#             secret.encode('utf-8'),
-#             payload,
-#             hashlib.sha256
-#         ).hexdigest()
-#         
-#         return hmac.compare_digest(expected, signature)
-#     
-#     @staticmethod
-#     def handle_reservation_created(data: Dict) -> None:
-#         """Handle new reservation webhook."""
-#         logger.info(f"New reservation created: {data.get('_id')}")
-#         
-#         # Example: Send notification, update local records, etc.
-#         # from yourapp.models import Booking
-#         # Booking.objects.create(
-#         #     guesty_reservation_id=data['_id'],
-#         #     property_id=...,
-#         #     check_in=data['checkInDateLocalized'],
-#         #     check_out=data['checkOutDateLocalized'],
-#         #     ...
-#         # )
-#     
-#     @staticmethod
-#     def handle_reservation_updated(data: Dict) -> None:
-#         """Handle reservation update webhook."""
-#         logger.info(f"Reservation updated: {data.get('_id')}")
-#         
-#         # Update local booking record
-#         # Booking.objects.filter(guesty_reservation_id=data['_id']).update(...)
-#     
-#     @staticmethod
-#     def handle_reservation_canceled(data: Dict) -> None:
-#         """Handle reservation cancellation webhook."""
-#         logger.info(f"Reservation canceled: {data.get('_id')}")
-#         
-#         # Update local booking record
-#         # Booking.objects.filter(guesty_reservation_id=data['_id']).update(
-#         #     status='canceled'
-#         # )
-#         
-#         # Invalidate availability cache
-#         listing_id = data.get('listingId')
-#         if listing_id:
-#             cache.delete_pattern(f"guesty:*{listing_id}*")
-#     
-#     @staticmethod
-#     def handle_calendar_updated(data: Dict) -> None:
-#         """Handle calendar/availability update webhook."""
-#         logger.info(f"Calendar updated for listing: {data.get('listingId')}")
-#         
-#         # Invalidate availability cache
-#         listing_id = data.get('listingId')
-#         if listing_id:
-#             cache.delete_pattern(f"guesty:*{listing_id}*")
-#     
-#     @classmethod
-#     def process_webhook(cls, event_type: str, data: Dict) -> None:
-#         """
-#         Process incoming webhook based on event type.
-#         
-#         Args:
-#             event_type: Guesty event type string
-#             data: Webhook payload data
-#         """
-#         handlers = {
-#             'reservation.created': cls.handle_reservation_created,
-#             'reservation.updated': cls.handle_reservation_updated,
-#             'reservation.canceled': cls.handle_reservation_canceled,
-#             'calendar.updated': cls.handle_calendar_updated,
-#         }
-#         
-#         handler = handlers.get(event_type)
-#         if handler:
-#             handler(data)
-#         else:
-#             logger.warning(f"Unhandled Guesty webhook event: {event_type}")
+class GuestyWebhookHandler:
+    """
+    Handler for Guesty webhook events.
+    
+    Guesty can send webhooks for:
+    - reservation.created
+    - reservation.updated
+    - reservation.canceled
+    - listing.updated
+    - calendar.updated
+    
+    Setup in Guesty dashboard:
+    1. Go to Integrations > Webhooks
+    2. Add webhook URL: https://yourdomain.com/api/webhooks/guesty/
+    3. Select events to subscribe to
+    
+    The webhook view stores deliveries with enqueue_webhook(); the
+    process_guesty_webhooks command applies them in batches.
+    """
+    
+    # Events applied by process_webhook_batch()
+    INBOX_EVENTS = (
+        'reservation.created',
+        'reservation.updated',
+        'reservation.canceled',
+        'calendar.updated',
+        'listing.updated',
+    )
+    
+    @staticmethod
+    def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
+        """
+        Verify webhook signature from Guesty.
+        
+        Args:
+            payload: Raw request body
+            signature: X-Guesty-Signature header value
+            secret: Webhook secret from Guesty
+            
+        Returns:
+            True if signature is valid
+        """
+        import hmac
+        import hashlib
+        
+        expected = hmac.new(
+            secret.encode('utf-8'),
+            payload,
+            hashlib.sha256
+        ).hexdigest()
+        
+        return hmac.compare_digest(expected, signature)
+    
+    @staticmethod
+    def handle_reservation_created(data: Dict) -> None:
+        """Handle new reservation webhook."""
+        logger.info(f"New reservation created: {data.get('_id')}")
+        
+        # Upsert the local booking record (same path as the incremental sync)
+        upsert_reservations([data])
+    
+    @staticmethod
+    def handle_reservation_updated(data: Dict) -> None:
+        """Handle reservation update webhook."""
+        logger.info(f"Reservation updated: {data.get('_id')}")
+        
+        # Update local booking record
+        upsert_reservations([data])
+    
+    @staticmethod
+    def handle_reservation_canceled(data: Dict) -> None:
+        """Handle reservation cancellation webhook."""
+        logger.info(f"Reservation canceled: {data.get('_id')}")
+        
+        # Cancel the local booking (merged over it, so a bare {_id} payload is enough)
+        upsert_reservations([dict(data, status='canceled')])
+        
+        # Invalidate availability cache
+        listing_id = data.get('listingId')
+        if listing_id:
+            invalidate_listing_cache(listing_id)
+    
+    @staticmethod
+    def handle_calendar_updated(data: Dict) -> None:
+        """Handle calendar/availability update webhook."""
+        logger.info(f"Calendar updated for listing: {data.get('listingId')}")
+        
+        # Invalidate availability cache
+        listing_id = data.get('listingId')
+        if listing_id:
+            invalidate_listing_cache(listing_id)
+    
+    @staticmethod
+    def handle_listing_updated(data: Dict) -> None:
+        """Handle listing update webhook."""
+        logger.info(f"Listing updated: {data.get('_id')}")
+        
+        listing_id = data.get('_id')
+        if listing_id:
+            update_properties_from_listings({listing_id: data})
+            invalidate_listing_cache(listing_id)
+    
+    @classmethod
+    def process_webhook(cls, event_type: str, data: Dict) -> None:
+        """
+        Process incoming webhook based on event type.
+        
+        Args:
+            event_type: Guesty event type string
+            data: Webhook payload data
+        """
+        handlers = {
+            'reservation.created': cls.handle_reservation_created,
+            'reservation.updated': cls.handle_reservation_updated,
+            'reservation.canceled': cls.handle_reservation_canceled,
+            'calendar.updated': cls.handle_calendar_updated,
+            'listing.updated': cls.handle_listing_updated,
+        }
+        
+        handler = handlers.get(event_type)
+        if handler:
+            handler(data)
+        else:
+            logger.warning(f"Unhandled Guesty webhook event: {event_type}")
+
+
+# ============================================================================
+# WEBHOOK INBOX
+# ============================================================================
+
+def enqueue_webhook(event_type: str, data: Dict):
+    """
+    Store a webhook delivery for later batch processing.
+    
+    Args:
+        event_type: Guesty event type string
+        data: Webhook payload data
+        
+    Returns:
+        The saved GuestyWebhookEvent
+    """
+    from yourapp.models import GuestyWebhookEvent
+    
+    data = data if isinstance(data, dict) else {}
+    reservation_id = listing_id = ''
+    if event_type.startswith('reservation.'):
+        reservation_id = str(data.get('_id') or '')
+        listing_id = str(data.get('listingId') or '')
+    elif event_type.startswith('listing.'):
+        listing_id = str(data.get('_id') or '')
+    else:
+        listing_id = str(data.get('listingId') or '')
+    
+    return GuestyWebhookEvent.objects.create(
+        event_type=event_type[:50],
+        reservation_id=reservation_id[:100],
+        listing_id=listing_id[:100],
+        payload=data,
+    )
+
+
+def process_webhook_batch(events: List) -> Dict[str, int]:
+    """
+    Apply a batch of inbox events as one bulk write.
+    
+    Events are collapsed so each reservation and each updated listing is
+    written once, with later payloads applied over earlier ones (events
+    must be in arrival order), and each affected listing's availability
+    cache is invalidated once.
+    
+    Args:
+        events: GuestyWebhookEvent instances ordered by id
+        
+    Returns:
+        Counts of reservations written, cancellations applied, properties
+        updated and listings invalidated
+    """
+    from yourapp.models import Booking
+    
+    reservations = {}
+    listings = {}
+    listing_ids = set()
+    for event in events:
+        if event.listing_id:
+            listing_ids.add(event.listing_id)
+        if event.event_type not in GuestyWebhookHandler.INBOX_EVENTS:
+            logger.warning(f"Unhandled Guesty webhook event: {event.event_type}")
+        elif event.reservation_id:
+            # Later payloads overlay earlier ones so partial updates keep
+            # the fields they omit; the last event decides cancellation
+            payload, _ = reservations.get(event.reservation_id, ({}, None))
+            reservations[event.reservation_id] = ({**payload, **event.payload}, event.event_type)
+        elif event.event_type == 'listing.updated' and event.listing_id:
+            listings[event.listing_id] = {**listings.get(event.listing_id, {}), **event.payload}
+    
+    upserts, cancellations = [], []
+    for reservation_id, (payload, event_type) in reservations.items():
+        if event_type == 'reservation.canceled':
+            cancellations.append(dict(payload, status='canceled'))
+        else:
+            upserts.append(payload)
+    
+    # An update that cannot be written fails the event
+    written = upsert_reservations(upserts, strict=True) if upserts else 0
+    canceled = 0
+    if cancellations:
+        # Payloads are merged over the stored booking, so a bare {_id, status}
+        # cancels it; cancelling a reservation we never stored is a no-op
+        canceled = (
+            Booking.objects.filter(guesty_reservation_id__in=[p['_id'] for p in cancellations])
+            .exclude(status='canceled').count()
+        )
+        written += upsert_reservations(cancellations)
+    properties = update_properties_from_listings(listings)
+    
+    for listing_id in listing_ids:
+        invalidate_listing_cache(listing_id)
+    
+    return {'written': written, 'canceled': canceled, 'properties': properties, 'listings': len(listing_ids)}
+
+
+def _process_events_singly(events: List, summary: Dict[str, int], blocked: set) -> None:
+    """
+    Apply events one at a time, each in its own transaction (a savepoint
+    when nested), after their batch failed.
+    
+    A failing event has its attempt counted and is parked once it reaches
+    WEBHOOK_MAX_ATTEMPTS. Until then its reservation is added to `blocked`,
+    so later events for it wait rather than being overtaken by a retry.
+    """
+    from django.db import transaction
+    from yourapp.models import GuestyWebhookEvent
+    
+    for event in events:
+        if event.reservation_id and event.reservation_id in blocked:
+            continue
+        try:
+            with transaction.atomic():
+                result = process_webhook_batch([event])
+                GuestyWebhookEvent.objects.filter(id=event.id).update(processed_at=timezone.now(), error='')
+        except Exception as e:
+            event.attempts += 1
+            event.error = str(e)[:1000]
+            if event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                event.failed_at = timezone.now()
+                summary['parked'] += 1
+                logger.error(f"Parking Guesty webhook event {event.id} after {event.attempts} attempts: {e}")
+            else:
+                if event.reservation_id:
+                    blocked.add(event.reservation_id)
+                logger.warning(f"Guesty webhook event {event.id} failed (attempt {event.attempts}): {e}")
+            event.save(update_fields=['attempts', 'error', 'failed_at'])
+            summary['failed'] += 1
+            continue
+        
+        summary['events'] += 1
+        for key, value in result.items():
+            summary[key] += value
+
+
+def process_webhook_inbox(batch_size: int = WEBHOOK_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Drain unprocessed webhook events in batches.
+    
+    Each batch is applied and marked processed in one transaction. If a
+    batch fails it is rolled back and its events are applied one at a time,
+    so one bad event does not hold up the rest. A failing event is retried
+    on later runs (later events for its reservation wait behind it) and
+    parked with failed_at after WEBHOOK_MAX_ATTEMPTS.
+    
+    Args:
+        batch_size: Events per batch
+        
+    Returns:
+        Totals of events processed, reservations written, cancellations,
+        properties updated, listings invalidated, failed events and events
+        parked
+    """
+    from django.db import transaction
+    from yourapp.models import GuestyWebhookEvent
+    
+    summary = {'events': 0, 'written': 0, 'canceled': 0, 'properties': 0, 'listings': 0, 'failed': 0, 'parked': 0}
+    pending = GuestyWebhookEvent.objects.filter(processed_at__isnull=True, failed_at__isnull=True).order_by('id')
+    blocked = set()
+    last_id = 0
+    
+    while True:
+        events = list(pending.filter(id__gt=last_id)[:batch_size])
+        if not events:
+            break
+        last_id = events[-1].id
+        if blocked:
+            events = [e for e in events if not (e.reservation_id and e.reservation_id in blocked)]
+            if not events:
+                continue
+        event_ids = [event.id for event in events]
+        
+        try:
+            with transaction.atomic():
+                result = process_webhook_batch(events)
+                GuestyWebhookEvent.objects.filter(id__in=event_ids).update(
+                    processed_at=timezone.now(), error=''
+                )
+        except Exception as e:
+            logger.warning(f"Guesty webhook batch {event_ids[0]}-{event_ids[-1]} failed, "
+                           f"applying its events one at a time: {e}")
+            _process_events_singly(events, summary, blocked)
+            continue
+        
+        summary['events'] += len(events)
+        for key, value in result.items():
+            summary[key] += value
+    
+    return summary
 
 
 # ============================================================================
@@ -1096,31 +1970,28 @@ Add this JavaScript to the property detail page for dynamic availability:
 # If using Celery, add these tasks to tasks.py:
 
 # from celery import shared_task
-# from yourapp.guesty_integration import get_guesty_client, sync_property_from_guesty
+# from yourapp.guesty_integration import get_guesty_client, sync_properties_from_guesty
 # from yourapp.models import Property
 
 # @shared_task
 # def sync_all_properties_from_guesty():
-#     '''Sync all properties with Guesty listings.'''
-#     properties = Property.objects.exclude(guesty_listing_id__isnull=True)
+#     '''Sync all properties with Guesty listings (concurrent fetch + bulk_update).'''
+#     summary = sync_properties_from_guesty()
 #     
-#     for prop in properties:
-#         sync_property_from_guesty(prop)
-#     
-#     return f"Synced {properties.count()} properties"
+#     return f"Synced {summary['synced']} properties ({summary['updated']} updated)"
 
 
 # @shared_task  
 # def refresh_availability_cache():
 #     '''Refresh availability cache for all Guesty-linked properties.'''
-#     from django.core.cache import cache
+#     from yourapp.guesty_integration import invalidate_listing_cache
 #     
 #     properties = Property.objects.exclude(guesty_listing_id__isnull=True)
 #     client = get_guesty_client()
 #     
 #     for prop in properties:
 #         # Clear old cache
-#         cache.delete_pattern(f"guesty:*{prop.guesty_listing_id}*")
+#         invalidate_listing_cache(prop.guesty_listing_id)
 #         
 #         # Pre-fetch and cache new availability
 #         from datetime import datetime, timedelta
@@ -1177,26 +2048,9 @@ Add this JavaScript to the property detail page for dynamic availability:
 #     
 #     @admin.action(description='Sync selected properties from Guesty')
 #     def sync_from_guesty(self, request, queryset):
-#         from yourapp.guesty_integration import sync_property_from_guesty
+#         from yourapp.guesty_integration import sync_properties_from_guesty
 #         
-#         synced = 0
-#         for prop in queryset:
-#             if sync_property_from_guesty(prop):
-#                 synced += 1
+#         summary = sync_properties_from_guesty(queryset)
 #         
-#         self.message_user(request, f'Successfully synced {synced} properties from Guesty.')
+#         self.message_user(request, f"Successfully synced {summary['synced']} properties from Guesty.")
 """
-
-
-print("Guesty Integration Module - Ready for configuration")
-print("=" * 60)
-print("This module is currently INACTIVE (all code is commented out)")
-print("")
-print("To activate:")
-print("1. Add GUESTY_API_KEY to your Django settings or .env file")
-print("2. Uncomment the code sections in this file")
-print("3. Add guesty_listing_id field to your Property model")
-print("4. Run migrations")
-print("5. Add the URL patterns to urls.py")
-print("6. Configure webhooks in your Guesty dashboard")
-print("=" * 60)
@@ -0,0 +1,139 @@
+"""
+Logging Handlers for Safe Let Stays
+Non-blocking file logging for the security and error logs.
+
+QueuedFileHandler is a QueueHandler: the request thread only formats the
+record and puts it on a bounded in-memory queue, and a QueueListener thread
+writes it to the file. Request threads never wait on disk, even during an
+attack that floods the security log:
+
+- Above SAMPLE_THRESHOLD of the queue, records below ERROR are sampled
+  (one in SAMPLE_EVERY is kept).
+- When the queue is full, records are dropped and counted; a summary
+  warning is written once there is room again.
+
+Every worker process appends to the same file, so by default the writer is
+a WatchedFileHandler and rotation is left to logrotate: it reopens the file
+once logrotate has moved it. Size-based rotation (max_bytes) is opt-in and
+only safe with a single process; with several, each rotates on its own view
+of the file and they delete each other's backups.
+
+Configure it from settings.LOGGING like any handler:
+
+    'security_file': {
+        'class': 'yourapp.log_handlers.QueuedFileHandler',
+        'filename': LOGS_DIR / 'security.log',
+        'formatter': 'security',
+    }
+"""
+
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+LOG_QUEUE_SIZE = 10000
+LOG_BACKUP_COUNT = 5
+
+# Start sampling sub-ERROR records once the queue is this full
+SAMPLE_THRESHOLD = 0.8
+SAMPLE_EVERY = 10
+
+
+class QueuedFileHandler(QueueHandler):
+    """File handler whose writes happen on a background thread."""
+
+    def __init__(self, filename, max_bytes: int = 0, backup_count: int = LOG_BACKUP_COUNT,
+                 queue_size: int = LOG_QUEUE_SIZE, encoding: str = 'utf-8'):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.filename = str(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.encoding = encoding
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.sampled_out = 0
+        self._sample_counter = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Listener lifecycle
+    # ------------------------------------------------------------------
+
+    def _ensure_listener(self) -> None:
+        """Start the writer thread on first use, and again after a fork."""
+        if self._listener is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's thread and queued records did not come along
+                self.queue = queue.Queue(maxsize=self.queue_size)
+            if self.max_bytes:
+                # Single-process only (see the module docstring)
+                target = RotatingFileHandler(
+                    self.filename, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                    encoding=self.encoding, delay=True,
+                )
+            else:
+                target = WatchedFileHandler(self.filename, encoding=self.encoding, delay=True)
+            # Records arrive already formatted by prepare()
+            target.setFormatter(logging.Formatter('%(message)s'))
+            self._listener = QueueListener(self.queue, target, respect_handler_level=False)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self) -> None:
+        """Flush queued records to disk and stop the writer thread."""
+        with self._start_lock:
+            listener, self._listener = self._listener, None
+            if listener is not None and self._pid == os.getpid():
+                listener.stop()
+                for handler in listener.handlers:
+                    handler.close()
+        super().close()
+
+    # ------------------------------------------------------------------
+    # Overload policy
+    # ------------------------------------------------------------------
+
+    def _should_sample_out(self, record: logging.LogRecord) -> bool:
+        """Thin out sub-ERROR records while the queue is nearly full."""
+        if record.levelno >= logging.ERROR or self.queue.qsize() < self.queue_size * SAMPLE_THRESHOLD:
+            return False
+        self._sample_counter += 1
+        if self._sample_counter % SAMPLE_EVERY:
+            self.sampled_out += 1
+            return True
+        return False
+
+    def _drop_summary(self, dropped: int) -> logging.LogRecord:
+        """Warning record reporting how many records were dropped."""
+        return logging.makeLogRecord({
+            'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+            'msg': f"Log queue full: dropped {dropped} records from {os.path.basename(self.filename)}",
+        })
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._ensure_listener()
+            if self._should_sample_out(record):
+                return
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+
+        if self.dropped:
+            try:
+                self.queue.put_nowait(self.prepare(self._drop_summary(self.dropped)))
+                self.dropped = 0
+            except queue.Full:
+                pass
@@ -0,0 +1,310 @@
+"""
+Mail Transport for Safe Let Stays
+Process-level Mailjet transport. One mailjet_rest.Client is kept per
+process, so its pooled requests session (keep-alive) is reused by every
+email rather than paying a TCP+TLS handshake per receipt.
+
+The v3.1 Send API accepts many messages per call: send() groups whatever
+it is given into as few calls as possible, MAILJET_BATCH_SIZE at a time.
+
+Requests do not send mail themselves: they queue an OutboundEmail (the
+outbox, deduplicated on booking and template) and the deliver_emails
+command drains it in batches at up to MAIL_SEND_RATE messages a second,
+retrying failures with exponential backoff. Each batch is claimed before it
+is sent, so overlapping workers (or cron runs) never send the same email.
+
+Usage:
+    results = get_transport().send([message, ...])
+    enqueue_email(booking, 'receipt')       # in a view
+    deliver_outbox()                        # in the worker
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.utils import timezone
+from mailjet_rest import Client
+
+from .telemetry import timed
+
+logger = logging.getLogger(__name__)
+
+# Messages per Send API call (the v3.1 limit)
+MAILJET_BATCH_SIZE = 50
+
+# Send API request timeout (seconds)
+MAILJET_TIMEOUT = 30
+
+# Outbox delivery: messages per second (settings.MAIL_SEND_RATE), attempts
+# before an email is marked failed, and the retry backoff (seconds, doubled
+# per attempt up to the maximum)
+MAIL_SEND_RATE = 10
+MAIL_MAX_ATTEMPTS = 6
+MAIL_RETRY_BASE = 60
+MAIL_RETRY_MAX = 3600
+
+# How long a claimed batch is hidden from other workers while it is sent
+# (seconds; well past MAILJET_TIMEOUT). A worker that dies mid-send leaves
+# its batch to be retried once this runs out.
+MAIL_CLAIM_TTL = 300
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+class MailjetError(Exception):
+    """The Send API rejected a batch."""
+
+    def __init__(self, message: str, status_code: int = None, payload=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.payload = payload
+
+
+class MailjetTransport:
+    """Sends Mailjet v3.1 messages over one pooled HTTP session."""
+
+    def __init__(self, api_key: str, api_secret: str, api_url: str = None):
+        kwargs = {'version': 'v3.1', 'timeout': MAILJET_TIMEOUT}
+        if api_url:
+            kwargs['api_url'] = api_url
+        self.config = (api_key, api_secret, api_url)
+        self.client = Client(auth=(api_key, api_secret), **kwargs)
+
+    def send(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Send messages in as few API calls as possible.
+
+        Args:
+            messages: Send API v3.1 message dicts (From, To, Subject, ...)
+
+        Returns:
+            One result dict per message, in order, as returned by Mailjet
+
+        Raises:
+            MailjetError: If a batch is rejected. Earlier batches have
+                already been sent.
+        """
+        results = []
+        for start in range(0, len(messages), MAILJET_BATCH_SIZE):
+            batch = messages[start:start + MAILJET_BATCH_SIZE]
+            with timed('mailjet'):
+                response = self.client.send.create(data={'Messages': batch})
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            if response.status_code != 200:
+                logger.error(f"Mailjet API Error ({response.status_code}) for a batch of {len(batch)}: {payload}")
+                raise MailjetError(f"Mailjet API Error: {payload}", response.status_code, payload)
+            results.extend(payload.get('Messages', []) if payload else [{}] * len(batch))
+            logger.debug(f"Mailjet accepted a batch of {len(batch)} message(s)")
+        return results
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def get_transport() -> MailjetTransport:
+    """
+    The process's MailjetTransport (created on first use).
+
+    Recreated if the Mailjet settings change, e.g. under override_settings.
+
+    Raises:
+        ValueError: If the Mailjet API credentials are not configured
+    """
+    global _transport
+    api_key = settings.MAILJET_API_KEY
+    api_secret = settings.MAILJET_API_SECRET
+    if not api_key or not api_secret:
+        logger.error("Mailjet API Key or Secret is missing in settings")
+        raise ValueError("Mailjet API credentials missing")
+
+    config = (api_key, api_secret, settings.MAILJET_API_URL)
+    with _transport_lock:
+        if _transport is None or _transport.config != config:
+            if _transport is not None:
+                _transport.close()
+            _transport = MailjetTransport(*config)
+        return _transport
+
+
+# =============================================================================
+# OUTBOX
+# =============================================================================
+
+def enqueue_email(booking, template: str = 'receipt') -> bool:
+    """
+    Queue an email for delivery by the outbox worker.
+
+    Args:
+        booking: Booking the email is about
+        template: OutboundEmail template name
+
+    Returns:
+        True if queued, False if this email was already queued or sent
+    """
+    from .models import OutboundEmail
+    _, created = OutboundEmail.objects.get_or_create(booking=booking, template=template)
+    if created:
+        logger.debug(f"Queued {template} email for booking {booking.id}")
+    return created
+
+
+async def aenqueue_email(booking, template: str = 'receipt') -> bool:
+    """Async enqueue_email()."""
+    from .models import OutboundEmail
+    _, created = await OutboundEmail.objects.aget_or_create(booking=booking, template=template)
+    if created:
+        logger.debug(f"Queued {template} email for booking {booking.id}")
+    return created
+
+
+def _build_message(email) -> Dict:
+    """Render an outbox row into a Send API message."""
+    from .utils import build_receipt_message  # utils imports this module
+
+    builders = {
+        'receipt': build_receipt_message,
+    }
+    return builders[email.template](email.booking)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAIL_RETRY_BASE * 2 ** (attempts - 1), MAIL_RETRY_MAX))
+
+
+def _record_failure(email, error: str, now, summary: Dict[str, int]) -> None:
+    """Schedule a retry, or give up after MAIL_MAX_ATTEMPTS."""
+    email.attempts += 1
+    email.error = error[:1000]
+    if email.attempts >= MAIL_MAX_ATTEMPTS:
+        email.status = 'failed'
+        summary['failed'] += 1
+        logger.error(f"Giving up on {email.template} email for booking {email.booking_id} "
+                     f"after {email.attempts} attempts: {error}")
+    else:
+        email.next_attempt_at = now + _retry_delay(email.attempts)
+        summary['retrying'] += 1
+        logger.warning(f"{email.template} email for booking {email.booking_id} failed "
+                       f"(attempt {email.attempts}), retrying at {email.next_attempt_at}: {error}")
+
+
+def _claim_batch(batch_size: int, now) -> List[int]:
+    """
+    Claim up to batch_size due outbox rows for this worker.
+
+    The rows are locked (skipping any another worker holds) and their
+    next_attempt_at is pushed MAIL_CLAIM_TTL ahead in the same transaction,
+    so once it commits no other worker sees them as due.
+
+    Returns:
+        Ids of the claimed rows
+    """
+    from django.db import transaction
+    from .models import OutboundEmail
+
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            OutboundEmail.objects.filter(id__in=ids).update(next_attempt_at=now + timedelta(seconds=MAIL_CLAIM_TTL))
+    return ids
+
+
+def deliver_outbox(batch_size: int = MAILJET_BATCH_SIZE, rate: float = None) -> Dict[str, int]:
+    """
+    Send every due outbox email, one Send API call per batch.
+
+    Each batch is claimed first (see _claim_batch), so several workers can
+    drain the outbox at once. Batches are paced so that on average no more than `rate` messages go out
+    per second, and never exceed one second's allowance. A message Mailjet
+    rejects, or one that cannot be rendered, is retried later with
+    exponential backoff; the rest of its batch is still sent.
+
+    Args:
+        batch_size: Messages per API call (capped at MAILJET_BATCH_SIZE)
+        rate: Messages per second (default settings.MAIL_SEND_RATE; 0 = unlimited)
+
+    Returns:
+        Totals of emails sent, scheduled for retry and failed for good
+
+    Raises:
+        ValueError: If the Mailjet API credentials are not configured
+    """
+    from .models import OutboundEmail
+
+    if rate is None:
+        rate = getattr(settings, 'MAIL_SEND_RATE', MAIL_SEND_RATE)
+    batch_size = max(1, min(batch_size, MAILJET_BATCH_SIZE))
+    if rate:
+        batch_size = max(1, min(batch_size, int(rate)))
+
+    summary = {'sent': 0, 'retrying': 0, 'failed': 0}
+    claimed = OutboundEmail.objects.select_related('booking__booked_property').order_by('id')
+    fields = ['status', 'attempts', 'next_attempt_at', 'sent_at', 'message_id', 'error']
+
+    while True:
+        now = timezone.now()
+        ids = _claim_batch(batch_size, now)
+        if not ids:
+            break
+        emails = list(claimed.filter(id__in=ids))
+        started = time.monotonic()
+
+        ready, messages = [], []
+        for email in emails:
+            try:
+                messages.append(_build_message(email))
+                ready.append(email)
+            except Exception as e:
+                logger.error(f"Could not render {email.template} email for booking {email.booking_id}: {e}",
+                             exc_info=True)
+                _record_failure(email, f"Render failed: {e}", now, summary)
+
+        if ready:
+            transport = get_transport()
+            error = ''
+            try:
+                results = transport.send(messages)
+            except MailjetError as e:
+                # v3.1 reports per message, so one bad address need not fail the batch
+                payload = e.payload if isinstance(e.payload, dict) else {}
+                results = payload.get('Messages') or []
+                if len(results) != len(ready):
+                    results = []
+                error = str(e)
+            except Exception as e:
+                logger.error(f"Mailjet send failed for a batch of {len(ready)}: {e}")
+                results, error = [], str(e)
+
+            for index, email in enumerate(ready):
+                result = results[index] if index < len(results) else {}
+                if result.get('Status') == 'success':
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.attempts += 1
+                    email.error = ''
+                    recipients = result.get('To') or [{}]
+                    email.message_id = str(recipients[0].get('MessageID', ''))
+                    summary['sent'] += 1
+                else:
+                    _record_failure(email, str(result.get('Errors') or error or 'Not accepted'), now, summary)
+
+        OutboundEmail.objects.bulk_update(emails, fields)
+
+        if rate:
+            wait = len(ready) / rate - (time.monotonic() - started)
+            if wait > 0:
+                time.sleep(wait)
+
+    return summary
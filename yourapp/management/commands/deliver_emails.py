@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from yourapp.mail import deliver_outbox, MAILJET_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Delivers queued outbound emails in rate-limited Mailjet batches, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=MAILJET_BATCH_SIZE,
+            help='Messages per Mailjet API call (at most 50)'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help='Messages per second (default: settings.MAIL_SEND_RATE; 0 for no limit)'
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running, polling the outbox every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between polls in --watch mode'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            summary = deliver_outbox(batch_size=options['batch_size'], rate=options['rate'])
+
+            if any(summary.values()):
+                style = self.style.ERROR if summary['failed'] else self.style.SUCCESS
+                self.stdout.write(style(
+                    f"{summary['sent']} emails sent, {summary['retrying']} scheduled for retry, "
+                    f"{summary['failed']} failed permanently."
+                ))
+            elif not options['watch']:
+                self.stdout.write(self.style.SUCCESS('No outbound emails due.'))
+
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from yourapp.exports import booking_export_queryset, iter_booking_rows, iter_csv_lines, parse_export_filters
+
+class Command(BaseCommand):
+    help = 'Exports bookings as CSV for accounting (streams rows, constant memory).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Earliest check-in date (YYYY-MM-DD, default: all)')
+        parser.add_argument('--end', help='Latest check-in date (YYYY-MM-DD, default: all)')
+        parser.add_argument(
+            '--status', action='append', dest='statuses', default=[],
+            help='Limit to a booking status (repeatable)'
+        )
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            start, end, statuses = parse_export_filters(options['start'], options['end'], options['statuses'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        lines = iter_csv_lines(iter_booking_rows(booking_export_queryset(start, end, statuses)))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1  # header row
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} bookings to {options['output']}"))
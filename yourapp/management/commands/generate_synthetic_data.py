@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from yourapp.analytics import rebuild_rollups
+from yourapp.synthetic import generate, SYNTHETIC_BATCH_SIZE, SYNTHETIC_PASSWORD
+
+class Command(BaseCommand):
+    help = 'Generates production-sized synthetic data (properties, users, bookings, searches) for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=10000)
+        parser.add_argument('--bookings', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=20000, help='Accounts, each with a profile')
+        parser.add_argument('--searches', type=int, default=50000, help='Recent searches')
+        parser.add_argument('--years', type=float, default=3.0, help='Booking history span')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--batch-size', type=int, default=SYNTHETIC_BATCH_SIZE)
+        parser.add_argument(
+            '--rollups', action='store_true',
+            help='Also rebuild the daily analytics rollups (slow for millions of bookings)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Generating synthetic data...')
+        started = time.perf_counter()
+        try:
+            counts = generate(
+                properties=options['properties'], bookings=options['bookings'], users=options['users'],
+                searches=options['searches'], years=options['years'], seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['rollups']:
+            self.stdout.write('Rebuilding daily rollups...')
+            counts['rollups'] = rebuild_rollups()
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s. {summary}.'))
+        self.stdout.write(f'All synthetic accounts use the password: {SYNTHETIC_PASSWORD}')
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from yourapp.guesty_integration import process_webhook_inbox, WEBHOOK_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Applies queued Guesty webhook events to local bookings and properties in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=WEBHOOK_BATCH_SIZE,
+            help='Inbox events applied per transaction'
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running, polling the inbox every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between polls in --watch mode'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            summary = process_webhook_inbox(batch_size=options['batch_size'])
+
+            if summary['events'] or summary['failed']:
+                style = self.style.ERROR if summary['failed'] else self.style.SUCCESS
+                self.stdout.write(style(
+                    f"{summary['events']} events applied: {summary['written']} bookings written, "
+                    f"{summary['canceled']} canceled, {summary['properties']} properties updated, "
+                    f"{summary['listings']} listings invalidated, "
+                    f"{summary['failed']} failed ({summary['parked']} parked)."
+                ))
+            elif not options['watch']:
+                self.stdout.write(self.style.SUCCESS('No queued Guesty webhook events.'))
+
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
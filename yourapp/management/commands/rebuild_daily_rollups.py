@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from yourapp.analytics import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily analytics rollups from bookings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD, default: all)')
+        parser.add_argument('--end', help='Day after the last day to rebuild (YYYY-MM-DD, default: all)')
+        parser.add_argument(
+            '--property', type=int, action='append', dest='properties',
+            help='Limit to a property id (repeatable)'
+        )
+
+    def _parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, settings.DATE_FORMAT_ISO).date()
+        except ValueError:
+            raise CommandError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options['start'])
+        end = self._parse_date(options['end'])
+
+        self.stdout.write('Rebuilding daily rollups...')
+        count = rebuild_rollups(property_ids=options['properties'], start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'Done. {count} rollup rows written.'))
@@ -1,29 +1,34 @@
 from django.core.management.base import BaseCommand
 from yourapp.models import Booking
-from yourapp.utils import send_receipt_email
+from yourapp.utils import send_receipt_emails
 
 class Command(BaseCommand):
-    help = 'Manually send a receipt email for a specific booking.'
+    help = 'Manually send receipt emails for one or more bookings (batched into as few Mailjet calls as possible).'
 
     def add_arguments(self, parser):
-        parser.add_argument('booking_id', type=int, help='The ID of the booking')
+        parser.add_argument('booking_ids', nargs='+', type=int, help='The ID(s) of the booking(s)')
 
     def handle(self, *args, **options):
-        booking_id = options['booking_id']
+        booking_ids = options['booking_ids']
         try:
-            booking = Booking.objects.get(id=booking_id)
-            self.stdout.write(f"Found booking #{booking.id} for {booking.guest_email}")
-            
-            # Force regeneration of receipt for testing purposes
-            self.stdout.write("Clearing existing receipt to force regeneration with new logo...")
-            booking.receipt_pdf = None
-            booking.save()
+            bookings = list(Booking.objects.filter(id__in=booking_ids).select_related('booked_property').order_by('id'))
+            missing = sorted(set(booking_ids) - {booking.id for booking in bookings})
+            for booking_id in missing:
+                self.stdout.write(self.style.ERROR(f"Booking with ID {booking_id} does not exist."))
+            if not bookings:
+                return
+            for booking in bookings:
+                self.stdout.write(f"Found booking #{booking.id} for {booking.guest_email}")
+
+            # Force regeneration of receipts for testing purposes
+            self.stdout.write("Clearing existing receipts to force regeneration with new logo...")
+            for booking in bookings:
+                booking.receipt_pdf = None
+                booking.save()
+
+            self.stdout.write(f"Attempting to send {len(bookings)} receipt email(s)...")
+            send_receipt_emails(bookings)
+            self.stdout.write(self.style.SUCCESS("Process completed. Check logs for Mailjet output."))
 
-            self.stdout.write("Attempting to send receipt email...")
-            send_receipt_email(booking)
-            self.stdout.write(self.style.SUCCESS("Process completed. Check console for MailerSend output."))
-            
-        except Booking.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"Booking with ID {booking_id} does not exist."))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"An error occurred: {e}"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from yourapp.models import Property
+from yourapp.guesty_integration import sync_properties_from_guesty, SYNC_MAX_WORKERS
+
+class Command(BaseCommand):
+    help = 'Syncs all Guesty-linked properties from their Guesty listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=SYNC_MAX_WORKERS,
+            help='Number of listings to fetch concurrently'
+        )
+
+    def handle(self, *args, **options):
+        properties = Property.objects.exclude(guesty_listing_id__isnull=True).exclude(guesty_listing_id='')
+        count = properties.count()
+
+        if count == 0:
+            self.stdout.write(self.style.SUCCESS('No Guesty-linked properties found.'))
+            return
+
+        self.stdout.write(f'Syncing {count} properties from Guesty...')
+
+        try:
+            summary = sync_properties_from_guesty(properties, max_workers=options['workers'])
+        except ValueError as e:
+            # API key not configured
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {summary['synced']} synced, {summary['updated']} updated, {summary['failed']} failed."
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from yourapp.guesty_integration import sync_reservations_from_guesty, RESERVATION_SYNC_PAGE_SIZE
+
+class Command(BaseCommand):
+    help = 'Imports Guesty reservations changed since the last run into local bookings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Ignore the stored cursor and re-import all reservations'
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=RESERVATION_SYNC_PAGE_SIZE,
+            help='Reservations fetched and upserted per batch'
+        )
+
+    def handle(self, *args, **options):
+        mode = 'full' if options['full'] else 'incremental'
+        self.stdout.write(f'Starting {mode} Guesty reservation sync...')
+
+        try:
+            summary = sync_reservations_from_guesty(full=options['full'], page_size=options['page_size'])
+        except (ValueError, RuntimeError) as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {summary['fetched']} fetched, {summary['written']} written. Cursor: {summary['cursor']}"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('yourapp', '0010_rename_property_to_booked_property'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='guesty_last_synced',
+            field=models.DateTimeField(blank=True, help_text='Last time property was synced with Guesty', null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='guesty_listing_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Guesty listing ID for API integration', max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('yourapp', '0013_guesty_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Length-of-stay discount off the accommodation total', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='cleaning_fee',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='monthly_discount_percent',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Off the accommodation total for stays of 28+ nights (replaces the weekly discount)', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='weekend_uplift_percent',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Added to Friday and Saturday nights', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='weekly_discount_percent',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Off the accommodation total for stays of 7+ nights', max_digits=5),
+        ),
+        migrations.CreateModel(
+            name='RateOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(blank=True, help_text='e.g. Match day, Christmas', max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(help_text='Last night the override applies to (inclusive)')),
+                ('nightly_price', models.DecimalField(blank=True, decimal_places=2, help_text='Replaces the nightly rate', max_digits=10, null=True)),
+                ('uplift_percent', models.DecimalField(blank=True, decimal_places=2, help_text='Percentage added to the nightly rate (negative for a discount)', max_digits=6, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rate_property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_overrides', to='yourapp.property')),
+            ],
+            options={
+                'ordering': ['start_date', 'id'],
+                'indexes': [models.Index(fields=['rate_property', 'end_date'], name='yourapp_rat_rate_pr_26407c_idx')],
+            },
+        ),
+    ]
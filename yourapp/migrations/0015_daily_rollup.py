@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('yourapp', '0014_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('nights', models.IntegerField(default=0, help_text='Booked nights falling on this day')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Accommodation revenue (after discount, excluding cleaning) for this night', max_digits=12)),
+                ('arrivals', models.IntegerField(default=0, help_text='Bookings checking in on this day')),
+                ('rollup_property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='yourapp.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'status'], name='yourapp_dai_day_5188f7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('rollup_property', 'day', 'source', 'status'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
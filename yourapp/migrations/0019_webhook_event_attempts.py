@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('yourapp', '0018_catalogue_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guestywebhookevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='guestywebhookevent',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, help_text='Set when the event is given up on', null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,27 @@ class Property(models.Model):
     parking = models.BooleanField(default=False)
     distance_to_stadium_mins = models.IntegerField(help_text="Minutes to stadium", default=0)
     
+    # Pricing (see pricing.py; price_from is the base nightly rate)
+    cleaning_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    weekend_uplift_percent = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2, 
+        default=0,
+        help_text="Added to Friday and Saturday nights"
+    )
+    weekly_discount_percent = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2, 
+        default=0,
+        help_text="Off the accommodation total for stays of 7+ nights"
+    )
+    monthly_discount_percent = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2, 
+        default=0,
+        help_text="Off the accommodation total for stays of 28+ nights (replaces the weekly discount)"
+    )
+    
     # Search & SEO
     tags = models.CharField(max_length=500, blank=True, help_text="Comma separated tags")
     keywords = models.TextField(blank=True, help_text="Keywords for search optimization")
@@ -41,22 +63,19 @@ class Property(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    # =========================================================================
-    # GUESTY INTEGRATION FIELDS (Uncomment when ready to use)
-    # =========================================================================
-    # guesty_listing_id = models.CharField(
-    #     max_length=100, 
-    #     blank=True, 
-    #     null=True,
-    #     db_index=True,
-    #     help_text="Guesty listing ID for API integration"
-    # )
-    # guesty_last_synced = models.DateTimeField(
-    #     blank=True, 
-    #     null=True,
-    #     help_text="Last time property was synced with Guesty"
-    # )
-    # =========================================================================
+    # Guesty integration
+    guesty_listing_id = models.CharField(
+        max_length=100, 
+        blank=True, 
+        null=True,
+        db_index=True,
+        help_text="Guesty listing ID for API integration"
+    )
+    guesty_last_synced = models.DateTimeField(
+        blank=True, 
+        null=True,
+        help_text="Last time property was synced with Guesty"
+    )
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -77,6 +96,61 @@ class Property(models.Model):
 
     class Meta:
         verbose_name_plural = "Properties"
+        indexes = [
+            # Staff panel keyset pagination (newest first)
+            models.Index(fields=['created_at', 'id']),
+            # Catalogue last-modified (conditional GETs on the public pages)
+            models.Index(fields=['updated_at']),
+        ]
+
+
+# =============================================================================
+# RATE OVERRIDE MODEL
+# =============================================================================
+class RateOverride(models.Model):
+    """
+    Nightly price change for a date range (events, seasons, match days).
+    Either replaces the nightly rate or uplifts it by a percentage.
+    """
+    rate_property = models.ForeignKey(
+        Property, 
+        on_delete=models.CASCADE, 
+        related_name='rate_overrides'
+    )
+    label = models.CharField(max_length=100, blank=True, help_text="e.g. Match day, Christmas")
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Last night the override applies to (inclusive)")
+    nightly_price = models.DecimalField(
+        max_digits=10, 
+        decimal_places=2, 
+        null=True, 
+        blank=True,
+        help_text="Replaces the nightly rate"
+    )
+    uplift_percent = models.DecimalField(
+        max_digits=6, 
+        decimal_places=2, 
+        null=True, 
+        blank=True,
+        help_text="Percentage added to the nightly rate (negative for a discount)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['start_date', 'id']
+        indexes = [
+            models.Index(fields=['rate_property', 'end_date']),
+        ]
+    
+    def __str__(self):
+        return f"RateOverride {self.label or self.id}: {self.start_date} to {self.end_date}"
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError("End date must be on or after the start date.")
+        if (self.nightly_price is None) == (self.uplift_percent is None):
+            raise ValidationError("Set either a nightly price or an uplift percentage.")
 
 
 # =============================================================================
@@ -123,12 +197,12 @@ class Booking(models.Model):
         related_name='bookings'
     )
     
-    # Guesty sync
+    # Guesty sync (unique so reservation imports can upsert on it)
     guesty_reservation_id = models.CharField(
         max_length=100, 
         blank=True, 
         null=True,
-        db_index=True,
+        unique=True,
         help_text="Guesty reservation ID for sync"
     )
 
@@ -182,6 +256,12 @@ class Booking(models.Model):
         blank=True,
         default=0
     )
+    discount = models.DecimalField(
+        max_digits=10, 
+        decimal_places=2, 
+        default=0,
+        help_text="Length-of-stay discount off the accommodation total"
+    )
     total_price = models.DecimalField(
         max_digits=10, 
         decimal_places=2, 
@@ -222,13 +302,20 @@ class Booking(models.Model):
         return (self.check_out - self.check_in).days
     
     def calculate_total(self):
-        """Calculate total price based on nightly rate and fees."""
+        """Calculate total price based on nightly rate, discount and fees."""
         if self.nightly_rate:
-            subtotal = self.nightly_rate * self.nights
+            subtotal = self.nightly_rate * self.nights - (self.discount or 0)
             cleaning = self.cleaning_fee or 0
             return subtotal + cleaning
         return None
     
+    @property
+    def accommodation_total(self):
+        """Accommodation charge before discount, as priced at booking time."""
+        if self.total_price is not None:
+            return self.total_price - (self.cleaning_fee or 0) + (self.discount or 0)
+        return (self.nightly_rate or 0) * self.nights
+    
     def save(self, *args, **kwargs):
         # Auto-calculate total if not set
         if not self.total_price and self.nightly_rate:
@@ -237,7 +324,7 @@ class Booking(models.Model):
 
 
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
 class Profile(models.Model):
@@ -301,6 +388,45 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         logger.error(f"Error managing profile for user {instance.id}: {e}")
 
 
+@receiver(pre_save, sender=Booking)
+def remember_booking_rollup_state(sender, instance, raw=False, **kwargs):
+    """Keep the stored state of an updated booking so its rollups can be adjusted."""
+    if raw or not instance.pk:
+        instance._rollup_previous = None
+        return
+    from .analytics import ROLLUP_FIELDS
+    instance._rollup_previous = Booking.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_rollups(sender, instance, raw=False, **kwargs):
+    """Apply the booking's change to the daily analytics rollups."""
+    if raw:
+        return
+    from .analytics import update_rollups_for_booking, booking_rollup_values
+    try:
+        update_rollups_for_booking(getattr(instance, '_rollup_previous', None), booking_rollup_values(instance))
+    except Exception as e:
+        logger.error(f"Error updating rollups for booking {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking_rollups(sender, instance, **kwargs):
+    """Remove a deleted booking's contribution from the daily rollups."""
+    from .analytics import update_rollups_for_booking, booking_rollup_values
+    try:
+        update_rollups_for_booking(booking_rollup_values(instance), None)
+    except Exception as e:
+        logger.error(f"Error updating rollups for deleted booking {instance.pk}: {e}")
+
+
+@receiver([post_save, post_delete], sender=RateOverride)
+def invalidate_rate_calendar_on_override_change(sender, instance, **kwargs):
+    """Drop the cached rate calendar when a property's overrides change."""
+    from .pricing import invalidate_rate_calendar
+    invalidate_rate_calendar(instance.rate_property_id)
+
+
 # =============================================================================
 # RECENT SEARCH MODEL
 # =============================================================================
@@ -338,6 +464,137 @@ class RecentSearch(models.Model):
         return f"Search #{self.id}: {self.location}{dates}"
 
 
+# =============================================================================
+# SYNC CURSOR MODEL
+# =============================================================================
+class SyncCursor(models.Model):
+    """
+    High-water mark for incremental imports (e.g. last Guesty reservation
+    lastUpdatedAt seen), so each run only fetches what changed since.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"SyncCursor {self.name}: {self.value}"
+
+
+# =============================================================================
+# ANALYTICS ROLLUP MODEL
+# =============================================================================
+class DailyRollup(models.Model):
+    """
+    Per-property, per-night booking totals split by source and status,
+    maintained incrementally from Booking changes (see analytics.py) so
+    staff charts read one row per day instead of scanning bookings.
+    """
+    rollup_property = models.ForeignKey(
+        Property, 
+        on_delete=models.CASCADE, 
+        related_name='daily_rollups'
+    )
+    day = models.DateField()
+    source = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    nights = models.IntegerField(default=0, help_text="Booked nights falling on this day")
+    revenue = models.DecimalField(
+        max_digits=12, 
+        decimal_places=2, 
+        default=0,
+        help_text="Accommodation revenue (after discount, excluding cleaning) for this night"
+    )
+    arrivals = models.IntegerField(default=0, help_text="Bookings checking in on this day")
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['rollup_property', 'day', 'source', 'status'],
+                name='unique_daily_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"DailyRollup {self.rollup_property_id} {self.day} {self.source}/{self.status}: {self.nights}"
+
+
+# =============================================================================
+# GUESTY WEBHOOK INBOX MODEL
+# =============================================================================
+class GuestyWebhookEvent(models.Model):
+    """
+    Guesty webhook delivery stored on receipt and applied later in batches
+    by the process_guesty_webhooks command (id order = arrival order).
+    """
+    event_type = models.CharField(max_length=50)
+    reservation_id = models.CharField(max_length=100, blank=True)
+    listing_id = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True, blank=True, help_text="Set when the event is given up on")
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"GuestyWebhookEvent #{self.id}: {self.event_type} {self.reservation_id or self.listing_id}"
+
+
+# =============================================================================
+# OUTBOUND EMAIL (OUTBOX) MODEL
+# =============================================================================
+class OutboundEmail(models.Model):
+    """
+    Transactional email queued by a request and delivered later in batches
+    by the deliver_emails command (see mail.py). One row per (booking,
+    template), so repeated confirmations never mail the guest twice.
+    """
+    TEMPLATE_CHOICES = [
+        ('receipt', 'Booking Receipt'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='outbound_emails'
+    )
+    template = models.CharField(max_length=50, choices=TEMPLATE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Not delivered before this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    message_id = models.CharField(max_length=100, blank=True, help_text="Mailjet MessageID once sent")
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'template'], name='unique_outbound_email'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"OutboundEmail #{self.id}: {self.template} for booking {self.booking_id} ({self.status})"
+
+
 # =============================================================================
 # DESTINATION/AREA MODEL (for suggested destinations)
 # =============================================================================
@@ -362,6 +619,7 @@ class Destination(models.Model):
         blank=True,
         help_text="Area value to filter properties (leave blank for all)"
     )
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'name']
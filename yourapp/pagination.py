@@ -0,0 +1,94 @@
+"""
+Keyset Pagination for Safe Let Stays
+Pages through a queryset ordered newest-first on (created_at, id) using
+the last row seen as the cursor, so every page is an indexed range scan of
+PAGE_SIZE + 1 rows however deep it is (no OFFSET, no COUNT).
+
+Cursors are "<microseconds since epoch>_<id>" - digits and an underscore
+only, so they pass SQLInjectionProtectionMiddleware untouched.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass
+class KeysetPage:
+    """One page of results plus cursors for its neighbours."""
+    items: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return bool(self.next_cursor or self.prev_cursor)
+
+
+def encode_cursor(obj) -> str:
+    """Cursor pointing at obj's (created_at, id) position."""
+    return f"{(obj.created_at - EPOCH) // ONE_MICROSECOND}_{obj.pk}"
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """Parse a cursor, returning None if it is malformed."""
+    try:
+        micros, pk = cursor.split('_')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_paginate(queryset: QuerySet, after: str = None, before: str = None, size: int = 25) -> KeysetPage:
+    """
+    Fetch one newest-first page of a queryset.
+
+    Args:
+        queryset: Rows with created_at and id (any existing ordering is replaced)
+        after: Cursor of the last row of the previous page (go forward)
+        before: Cursor of the first row of the next page (go back)
+        size: Rows per page
+
+    Returns:
+        KeysetPage
+    """
+    position = decode_cursor(before) if before else decode_cursor(after) if after else None
+    backwards = bool(before and position)
+
+    if position is None:
+        rows = list(queryset.order_by('-created_at', '-id')[:size + 1])
+        page = KeysetPage(items=rows[:size])
+        if len(rows) > size:
+            page.next_cursor = encode_cursor(page.items[-1])
+        return page
+
+    created_at, pk = position
+    if backwards:
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by('created_at', 'id')[:size + 1]
+        )
+        more = len(rows) > size
+        page = KeysetPage(items=list(reversed(rows[:size])))
+        if page.items:
+            page.next_cursor = encode_cursor(page.items[-1])
+            if more:
+                page.prev_cursor = encode_cursor(page.items[0])
+        return page
+
+    rows = list(
+        queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        .order_by('-created_at', '-id')[:size + 1]
+    )
+    more = len(rows) > size
+    page = KeysetPage(items=rows[:size])
+    if page.items:
+        page.prev_cursor = encode_cursor(page.items[0])
+        if more:
+            page.next_cursor = encode_cursor(page.items[-1])
+    return page
@@ -0,0 +1,82 @@
+"""
+Stripe Client for Safe Let Stays
+Async access to the Stripe API for the async checkout view, so a request
+waiting on Stripe does not hold a worker thread under ASGI.
+
+One StripeClient is kept per event loop (one per worker under uvicorn), so
+its connection pool is shared by every request the loop serves. With
+httpx installed, calls use Stripe's httpx transport and are awaited on the
+loop. Without it they fall back to Stripe's requests transport in a worker
+thread: still non-blocking for the loop, just not connection-cheap.
+
+Usage:
+    session = await create_checkout_session(mode='payment', line_items=[...])
+"""
+
+import asyncio
+import logging
+import weakref
+
+import stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+try:
+    import httpx
+except ImportError:  # Optional: without httpx, Stripe calls run in a worker thread
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Stripe request timeout (seconds) and automatic retries on network errors
+STRIPE_TIMEOUT = 30
+STRIPE_MAX_NETWORK_RETRIES = 2
+
+# Event loop -> {(api_key, api_base): StripeClient}
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_stripe_client() -> stripe.StripeClient:
+    """
+    StripeClient for the running event loop (created on first use).
+
+    httpx connection pools are bound to the loop that opened them, so the
+    client is per loop rather than per process: under ASGI that is one per
+    worker, and WSGI's short-lived per-request loops each get their own.
+    """
+    loop = asyncio.get_running_loop()
+    config = (settings.STRIPE_SECRET_KEY, settings.STRIPE_API_BASE)
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(config)
+    if client is None:
+        if httpx is not None:
+            http_client = stripe.HTTPXClient(timeout=STRIPE_TIMEOUT)
+        else:
+            http_client = stripe.RequestsClient(timeout=STRIPE_TIMEOUT)
+        client = stripe.StripeClient(
+            settings.STRIPE_SECRET_KEY,
+            base_addresses={'api': settings.STRIPE_API_BASE} if settings.STRIPE_API_BASE else None,
+            http_client=http_client,
+            max_network_retries=STRIPE_MAX_NETWORK_RETRIES,
+        )
+        clients[config] = client
+    return client
+
+
+async def create_checkout_session(**params) -> stripe.checkout.Session:
+    """
+    Create a Stripe Checkout Session without blocking the event loop.
+
+    Args:
+        **params: Checkout Session parameters, as for Session.create()
+
+    Returns:
+        The created Session
+
+    Raises:
+        stripe.error.StripeError: If Stripe rejects the request or is unreachable
+    """
+    sessions = get_stripe_client().v1.checkout.sessions
+    if httpx is not None:
+        return await sessions.create_async(params=params)
+    return await sync_to_async(sessions.create, thread_sensitive=False)(params=params)
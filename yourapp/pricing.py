@@ -0,0 +1,418 @@
+"""
+Pricing & Quote Engine for Safe Let Stays
+Single source of truth for what a stay costs, shared by search results,
+checkout and receipts.
+
+Each property's nightly rates are materialised once into a rate calendar
+(integer pence, one entry per night from today over PRICING_HORIZON_DAYS):
+
+    price_from (base) -> weekend uplift -> fixed-price overrides
+                      -> percentage overrides (events, seasons)
+
+A quote is then a slice-and-sum over the calendar plus the length-of-stay
+discount and cleaning fee; quote_many() prices a whole result set in one
+pass over the stacked calendars (NumPy when installed). Calendars and
+quotes are cached; the calendar key embeds the property's updated_at and a
+version bumped whenever its RateOverrides change, so edits are picked up
+immediately.
+"""
+
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # Optional: quote_many() falls back to pure Python sums
+    np = None
+
+# Calendar settings
+PRICING_HORIZON_DAYS = 540  # ~18 months of bookable nights
+RATE_CALENDAR_CACHE_TTL = 3600  # 1 hour
+QUOTE_CACHE_TTL = 900  # 15 minutes
+
+# Friday and Saturday nights (date.weekday())
+WEEKEND_NIGHTS = (4, 5)
+
+# Length-of-stay discount thresholds (nights)
+WEEKLY_STAY_NIGHTS = 7
+MONTHLY_STAY_NIGHTS = 28
+
+RATE_CALENDAR_VERSION_KEY = "pricing:calendar-version:{property_id}"
+
+
+# ============================================================================
+# MONEY HELPERS
+# ============================================================================
+
+def to_pence(amount) -> int:
+    """Convert a pounds amount (Decimal, str or number) to integer pence."""
+    return int((Decimal(str(amount or 0)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_pence(pence: int) -> Decimal:
+    """Convert integer pence to a two-decimal pounds Decimal."""
+    return (Decimal(pence) / 100).quantize(Decimal('0.01'))
+
+
+def percent_to_bp(percent) -> int:
+    """Convert a percentage (e.g. Decimal('12.5')) to basis points (1250)."""
+    return int((Decimal(str(percent or 0)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def apply_bp(pence: int, bp: int) -> int:
+    """Add bp basis points to an amount in pence, rounding half up."""
+    return max(0, (pence * (10000 + bp) + 5000) // 10000)
+
+
+# ============================================================================
+# QUOTES & RATE CALENDARS
+# ============================================================================
+
+@dataclass(frozen=True)
+class Quote:
+    """Price breakdown for one stay, all amounts in integer pence."""
+    property_id: int
+    check_in: date
+    check_out: date
+    nightly_rates: Tuple[int, ...]
+    accommodation: int  # Sum of nightly rates, before discount
+    discount: int  # Length-of-stay discount
+    cleaning_fee: int
+
+    @property
+    def nights(self) -> int:
+        return len(self.nightly_rates)
+
+    @property
+    def total(self) -> int:
+        return self.accommodation - self.discount + self.cleaning_fee
+
+    @property
+    def average_nightly(self) -> int:
+        """Mean nightly rate before discount (for display and Booking.nightly_rate)."""
+        return (self.accommodation + self.nights // 2) // self.nights if self.nights else 0
+
+
+@dataclass(frozen=True)
+class RateCalendar:
+    """Materialised nightly rates for a property starting at `start`."""
+    property_id: int
+    start: date
+    rates: array  # array('q') of pence, one per night
+    cleaning_fee: int
+    weekly_discount_bp: int
+    monthly_discount_bp: int
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.rates))
+
+    def covers(self, check_in: date, check_out: date) -> bool:
+        return self.start <= check_in and check_out <= self.end
+
+    def discount_bp(self, nights: int) -> int:
+        """Length-of-stay discount in basis points for a stay of `nights`."""
+        if nights >= MONTHLY_STAY_NIGHTS and self.monthly_discount_bp:
+            return self.monthly_discount_bp
+        if nights >= WEEKLY_STAY_NIGHTS:
+            return self.weekly_discount_bp
+        return 0
+
+    def quote(self, check_in: date, check_out: date) -> Quote:
+        """
+        Price a stay in O(nights).
+
+        Args:
+            check_in: Arrival date (first night)
+            check_out: Departure date (exclusive)
+
+        Returns:
+            Quote for the stay
+        """
+        if not self.covers(check_in, check_out) or check_out <= check_in:
+            raise ValueError(f"Stay {check_in} to {check_out} is outside the rate calendar")
+
+        first = (check_in - self.start).days
+        nightly = self.rates[first:first + (check_out - check_in).days]
+        accommodation = sum(nightly)
+
+        discount_bp = self.discount_bp(len(nightly))
+        discount = accommodation - apply_bp(accommodation, -discount_bp) if discount_bp else 0
+
+        return Quote(
+            property_id=self.property_id,
+            check_in=check_in,
+            check_out=check_out,
+            nightly_rates=tuple(nightly),
+            accommodation=accommodation,
+            discount=discount,
+            cleaning_fee=self.cleaning_fee,
+        )
+
+
+def build_rate_calendar(
+    property_obj,
+    start: date,
+    days: int = PRICING_HORIZON_DAYS,
+    overrides: List[tuple] = None
+) -> RateCalendar:
+    """
+    Materialise a property's nightly rates (one query for its overrides).
+
+    Args:
+        property_obj: Property instance
+        start: First night of the calendar
+        days: Number of nights to materialise
+        overrides: Pre-fetched (start_date, end_date, nightly_price,
+            uplift_percent) rows, as loaded by build_rate_calendars()
+
+    Returns:
+        RateCalendar
+    """
+    end = start + timedelta(days=days)
+    base = to_pence(property_obj.price_from)
+    weekend = apply_bp(base, percent_to_bp(property_obj.weekend_uplift_percent))
+
+    # Build one week of rates and tile it across the horizon
+    week = [weekend if (start + timedelta(days=i)).weekday() in WEEKEND_NIGHTS else base for i in range(7)]
+    rates = array('q', (week * (days // 7 + 1))[:days])
+
+    if overrides is None:
+        overrides = list(
+            property_obj.rate_overrides
+            .filter(end_date__gte=start, start_date__lt=end)
+            .order_by('start_date', 'id')
+            .values_list('start_date', 'end_date', 'nightly_price', 'uplift_percent')
+        )
+
+    # Fixed prices replace the rate; percentage uplifts then apply on top
+    for override_start, override_end, nightly_price, _ in overrides:
+        if nightly_price is not None:
+            i, j = max((override_start - start).days, 0), min((override_end - start).days + 1, days)
+            rates[i:j] = array('q', [to_pence(nightly_price)]) * (j - i)
+    for override_start, override_end, nightly_price, uplift_percent in overrides:
+        if nightly_price is None and uplift_percent:
+            bp = percent_to_bp(uplift_percent)
+            for n in range(max((override_start - start).days, 0), min((override_end - start).days + 1, days)):
+                rates[n] = apply_bp(rates[n], bp)
+
+    return RateCalendar(
+        property_id=property_obj.pk,
+        start=start,
+        rates=rates,
+        cleaning_fee=to_pence(property_obj.cleaning_fee),
+        weekly_discount_bp=percent_to_bp(property_obj.weekly_discount_percent),
+        monthly_discount_bp=percent_to_bp(property_obj.monthly_discount_percent),
+    )
+
+
+def build_rate_calendars(properties: List, start: date, days: int = PRICING_HORIZON_DAYS) -> Dict[int, RateCalendar]:
+    """
+    Materialise calendars for several properties with a single overrides query.
+
+    Args:
+        properties: Property instances
+        start: First night of the calendars
+        days: Number of nights to materialise
+
+    Returns:
+        Dict mapping property id to RateCalendar
+    """
+    from yourapp.models import RateOverride
+
+    if not properties:
+        return {}
+    end = start + timedelta(days=days)
+    overrides = defaultdict(list)
+    rows = (
+        RateOverride.objects
+        .filter(rate_property__in=properties, end_date__gte=start, start_date__lt=end)
+        .order_by('start_date', 'id')
+        .values_list('rate_property_id', 'start_date', 'end_date', 'nightly_price', 'uplift_percent')
+    )
+    for property_id, *override in rows:
+        overrides[property_id].append(tuple(override))
+
+    return {
+        p.pk: build_rate_calendar(p, start, days, overrides=overrides[p.pk])
+        for p in properties
+    }
+
+
+def get_rate_calendar_version(property_id: int) -> int:
+    """Get the current rate calendar generation for a property."""
+    key = RATE_CALENDAR_VERSION_KEY.format(property_id=property_id)
+    # Clock seed so an evicted version never restarts below a cached one
+    return cache.get_or_set(key, time.time_ns() // 1_000_000, timeout=None)
+
+
+def invalidate_rate_calendar(property_id: int) -> None:
+    """Orphan all cached calendars and quotes for a property."""
+    key = RATE_CALENDAR_VERSION_KEY.format(property_id=property_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, time.time_ns() // 1_000_000, timeout=None):
+            cache.incr(key)
+
+
+def _pricing_token(property_obj, version: int = None) -> str:
+    """Cache key fragment that changes whenever the property's pricing can."""
+    # Microseconds, so two edits within the same second still differ
+    updated = int(property_obj.updated_at.timestamp() * 1_000_000) if property_obj.updated_at else 0
+    if version is None:
+        version = get_rate_calendar_version(property_obj.pk)
+    return f"{property_obj.pk}:{updated}:v{version}"
+
+
+def _pricing_tokens(properties: List) -> Dict[int, str]:
+    """_pricing_token() for many properties with one cache round trip."""
+    keys = {RATE_CALENDAR_VERSION_KEY.format(property_id=p.pk): p for p in properties}
+    versions = cache.get_many(keys)
+    return {
+        p.pk: _pricing_token(p, versions.get(key))
+        for key, p in keys.items()
+    }
+
+
+def get_rate_calendar(property_obj) -> RateCalendar:
+    """
+    Get the property's cached rate calendar starting today.
+
+    Args:
+        property_obj: Property instance
+
+    Returns:
+        RateCalendar covering PRICING_HORIZON_DAYS from today
+    """
+    start = timezone.localdate()
+    key = f"pricing:calendar:{_pricing_token(property_obj)}:{start.isoformat()}"
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = build_rate_calendar(property_obj, start)
+        cache.set(key, calendar, RATE_CALENDAR_CACHE_TTL)
+    return calendar
+
+
+def get_quote(property_obj, check_in: date, check_out: date) -> Optional[Quote]:
+    """
+    Price a stay at a property.
+
+    Stays inside the booking horizon are priced from the cached calendar
+    (and the quote itself cached); anything else gets a one-off calendar.
+
+    Args:
+        property_obj: Property instance
+        check_in: Arrival date
+        check_out: Departure date
+
+    Returns:
+        Quote, or None if check_out is not after check_in
+    """
+    if check_out <= check_in:
+        return None
+
+    key = f"pricing:quote:{_pricing_token(property_obj)}:{check_in.isoformat()}:{check_out.isoformat()}"
+    quote = cache.get(key)
+    if quote is not None:
+        return quote
+
+    calendar = get_rate_calendar(property_obj)
+    if not calendar.covers(check_in, check_out):
+        calendar = build_rate_calendar(property_obj, check_in, (check_out - check_in).days)
+
+    quote = calendar.quote(check_in, check_out)
+    cache.set(key, quote, QUOTE_CACHE_TTL)
+    return quote
+
+
+def get_rate_calendars(properties: List) -> Dict[int, RateCalendar]:
+    """
+    Get cached calendars starting today for several properties.
+
+    Hits and misses are resolved with one cache get_many, one overrides
+    query for the misses and one set_many.
+
+    Args:
+        properties: Property instances
+
+    Returns:
+        Dict mapping property id to RateCalendar
+    """
+    start = timezone.localdate()
+    tokens = _pricing_tokens(properties)
+    keys = {f"pricing:calendar:{tokens[p.pk]}:{start.isoformat()}": p for p in properties}
+    cached = cache.get_many(keys)
+
+    missing = [p for key, p in keys.items() if key not in cached]
+    built = build_rate_calendars(missing, start)
+    if built:
+        cache.set_many(
+            {key: built[p.pk] for key, p in keys.items() if p.pk in built},
+            RATE_CALENDAR_CACHE_TTL
+        )
+
+    calendars = {p.pk: cached[key] for key, p in keys.items() if key in cached}
+    calendars.update(built)
+    return calendars
+
+
+def quote_many(properties: Iterable, check_in: date, check_out: date) -> Dict[int, Quote]:
+    """
+    Price the same stay at many properties in one pass.
+
+    The calendar slices for the stay are stacked into a properties x nights
+    matrix and summed row-wise (NumPy when installed, otherwise one C-level
+    sum() per array slice); discounts and fees are then applied per row.
+
+    Args:
+        properties: Property instances
+        check_in: Arrival date
+        check_out: Departure date
+
+    Returns:
+        Dict mapping property id to Quote (empty if check_out <= check_in)
+    """
+    properties = list(properties)
+    if check_out <= check_in or not properties:
+        return {}
+
+    calendars = get_rate_calendars(properties)
+    outside = [p for p in properties if not calendars[p.pk].covers(check_in, check_out)]
+    if outside:
+        calendars.update(build_rate_calendars(outside, check_in, (check_out - check_in).days))
+
+    nights = (check_out - check_in).days
+    ordered = [calendars[p.pk] for p in properties]
+    rows = [
+        cal.rates[(check_in - cal.start).days:(check_in - cal.start).days + nights]
+        for cal in ordered
+    ]
+
+    if np is not None:
+        matrix = np.vstack([np.frombuffer(row, dtype=np.int64) for row in rows])
+        accommodation = matrix.sum(axis=1).tolist()
+    else:
+        accommodation = [sum(row) for row in rows]
+
+    quotes = {}
+    for cal, row, subtotal in zip(ordered, rows, accommodation):
+        discount_bp = cal.discount_bp(nights)
+        quotes[cal.property_id] = Quote(
+            property_id=cal.property_id,
+            check_in=check_in,
+            check_out=check_out,
+            nightly_rates=tuple(row),
+            accommodation=subtotal,
+            discount=subtotal - apply_bp(subtotal, -discount_bp) if discount_bp else 0,
+            cleaning_fee=cal.cleaning_fee,
+        )
+    return quotes
@@ -0,0 +1,452 @@
+"""
+Receipt Rendering for Safe Let Stays
+Draws receipt PDFs straight onto a ReportLab canvas from a fixed page
+layout, instead of building and laying out a Platypus story (tables of
+paragraphs) for every booking.
+
+The booking-independent parts of the page (logo, company block, headings,
+footer) are drawn into form XObjects that each page places with a single
+operator; only the guest, receipt details, stay and line items are drawn
+per booking. Content that would run into the footer (long addresses or
+titles, many line items) continues on a new page with the footer repeated.
+
+Those static parts are laid out once per process (ReceiptTemplate): the
+logo is decoded, scaled to print resolution and flattened, and the drawing
+calls for each form are recorded, so a receipt only replays them into its
+own document rather than laying the page out again.
+
+Receipts are meant to be written without ASCII85 encoding (they are only
+ever downloaded or attached as binary, and the pure-Python encoder was the
+slowest single step of rendering). That is ReportLab's process-wide
+rl_config.useA85, so it is set from settings.PDF_ASCII85 at startup
+rather than here.
+
+Usage:
+    pdf_bytes = render_receipt(booking)
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+logger = logging.getLogger(__name__)
+
+LOGO_STATIC_PATH = 'yourapp/images/SafeLetStays-New.png'
+LOGO_WIDTH = 2 * inch
+LOGO_DPI = 300  # The logo is resampled to this resolution at LOGO_WIDTH
+
+# Page geometry (points)
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+LEFT = MARGIN
+RIGHT = PAGE_WIDTH - MARGIN
+TOP = PAGE_HEIGHT - MARGIN
+META_RIGHT_COLUMN = LEFT + 3.5 * inch
+STAY_LABEL_WIDTH = 1.5 * inch
+STAY_VALUE_WIDTH = 5 * inch
+ITEM_COLUMNS = (3.5 * inch, 1 * inch, 1 * inch, 1 * inch)
+CELL_PADDING = 10
+
+# Type
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+BODY_SIZE = 10
+LEADING = 12
+HEADING_SIZE = 12
+COMPANY_SIZE = 14
+
+TEXT_COLOR = colors.black
+MUTED_COLOR = colors.HexColor('#555555')
+HEADER_FILL = colors.HexColor('#333333')
+TOTAL_FILL = colors.HexColor('#f0f0f0')
+GRID_COLOR = colors.lightgrey
+
+# Fixed positions of the static parts
+HEADER_BOTTOM = TOP - 110
+META_TOP = HEADER_BOTTOM - 20
+FOOTER_Y = MARGIN + 20
+CONTENT_BOTTOM = FOOTER_Y + 2 * LEADING + 20  # Nothing is drawn below this
+
+STATIC_FORM = 'receiptStatic'
+FOOTER_FORM = 'receiptFooter'
+
+COMPANY_LINES = (
+    '123 Sheffield Street',
+    'Sheffield, S1 1AA',
+    'United Kingdom',
+    '',
+    'daniel@webflare.studio',
+    '+44 114 123 4567',
+)
+RECEIPT_LABELS = ('Receipt #:', 'Date:', 'Booking Ref:', 'Status:')
+ITEM_HEADINGS = ('Description', 'Quantity', 'Rate', 'Amount')
+FOOTER_LINES = (
+    'Thank you for choosing Safe Let Stays!',
+    'If you have any questions about this receipt, please contact us at hello@safeletstays.co.uk',
+)
+
+_template = None
+_template_lock = threading.Lock()
+
+
+# =============================================================================
+# STATIC TEMPLATE
+# =============================================================================
+
+def find_logo():
+    """Path of the receipt logo, or None if it cannot be found."""
+    # Use Django's static file finders for proper static file resolution (MED-06)
+    logo_path = finders.find(LOGO_STATIC_PATH)
+    if not logo_path and settings.STATIC_ROOT:
+        # Fallback to STATIC_ROOT in production
+        logo_path = os.path.join(settings.STATIC_ROOT, LOGO_STATIC_PATH)
+    if logo_path and os.path.exists(logo_path):
+        return logo_path
+    return None
+
+
+class _Recorder:
+    """Stands in for a canvas, keeping the drawing calls made on it."""
+
+    def __init__(self):
+        self.ops = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+        return record
+
+
+def _replay(canvas, ops):
+    """Make recorded drawing calls on a real canvas."""
+    for name, args, kwargs in ops:
+        getattr(canvas, name)(*args, **kwargs)
+
+
+class ReceiptTemplate:
+    """
+    The booking-independent parts of a receipt, prepared once per process.
+
+    Holds the decoded logo and the recorded drawing calls of the static
+    and footer forms, which add_forms() replays into each document.
+    """
+
+    def __init__(self, logo_path=None):
+        self.logo_path = logo_path
+        self.logo = None
+        self.logo_height = 0
+        if logo_path:
+            try:
+                self.logo, self.logo_height = self._load_logo(logo_path)
+            except Exception as e:
+                logger.warning(f"Receipt logo {logo_path} could not be loaded: {e}")
+        self.static_ops = self._record(self.draw)
+        self.footer_ops = self._record(self.draw_footer)
+
+    @staticmethod
+    def _load_logo(path):
+        """
+        Decode the logo once, resampled to LOGO_DPI at LOGO_WIDTH and
+        flattened onto white (the page colour), so each receipt embeds one
+        RGB image rather than an image plus a transparency mask.
+        """
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image = image.convert('RGBA')
+        aspect = image.height / float(image.width)
+        target_width = int(LOGO_WIDTH / inch * LOGO_DPI)
+        if image.width > target_width:
+            image = image.resize((target_width, max(1, round(target_width * aspect))), Image.LANCZOS)
+        flat = Image.new('RGB', image.size, 'white')
+        flat.paste(image, mask=image.getchannel('A'))
+        logo = ImageReader(flat)
+        logo.getRGBData()  # Decoded here rather than by the first receipt
+        return logo, LOGO_WIDTH * aspect
+
+    @staticmethod
+    def _record(draw):
+        recorder = _Recorder()
+        draw(recorder)
+        return recorder.ops
+
+    def add_forms(self, canvas):
+        """Define the static and footer forms in the canvas's document."""
+        for name, ops in ((STATIC_FORM, self.static_ops), (FOOTER_FORM, self.footer_ops)):
+            canvas.beginForm(name)
+            _replay(canvas, ops)
+            canvas.endForm()
+
+    def draw(self, canvas):
+        """Draw the static parts of the first page (the footer is separate)."""
+        # Company block (left) and logo (top right)
+        y = TOP - COMPANY_SIZE
+        canvas.setFillColor(TEXT_COLOR)
+        canvas.setFont(FONT_BOLD, COMPANY_SIZE)
+        canvas.drawString(LEFT, y, 'Safe Let Stays')
+        y -= COMPANY_SIZE + 8
+        canvas.setFont(FONT, BODY_SIZE)
+        for line in COMPANY_LINES:
+            canvas.drawString(LEFT, y, line)
+            y -= LEADING
+
+        if self.logo is not None:
+            canvas.drawImage(self.logo, RIGHT - LOGO_WIDTH, TOP - self.logo_height, LOGO_WIDTH, self.logo_height)
+
+        # Receipt details: headings and labels (values are drawn per booking)
+        _heading(canvas, LEFT, META_TOP, 'BILL TO:')
+        _heading(canvas, META_RIGHT_COLUMN, META_TOP, 'RECEIPT DETAILS')
+        canvas.setFont(FONT_BOLD, BODY_SIZE)
+        canvas.setFillColor(TEXT_COLOR)
+        y = META_TOP - HEADING_SIZE - 8
+        for label in RECEIPT_LABELS:
+            canvas.drawString(META_RIGHT_COLUMN, y, label)
+            y -= LEADING
+
+    def draw_footer(self, canvas):
+        """Draw the footer of every page."""
+        canvas.setFont(FONT, BODY_SIZE)
+        canvas.setFillColor(TEXT_COLOR)
+        canvas.drawCentredString(PAGE_WIDTH / 2, FOOTER_Y + LEADING + 10, FOOTER_LINES[0])
+        canvas.drawCentredString(PAGE_WIDTH / 2, FOOTER_Y, FOOTER_LINES[1])
+
+
+def get_template() -> ReceiptTemplate:
+    """The process's ReceiptTemplate (built on first use)."""
+    global _template
+    logo_path = find_logo()
+    with _template_lock:
+        if _template is None or _template.logo_path != logo_path:
+            _template = ReceiptTemplate(logo_path)
+        return _template
+
+
+# =============================================================================
+# PER-BOOKING FIELDS
+# =============================================================================
+
+def _new_page(canvas):
+    """Finish the page and start another with the footer; return its top."""
+    canvas.showPage()
+    canvas.doForm(FOOTER_FORM)
+    return TOP
+
+
+def _room(canvas, y, height, top=TOP):
+    """
+    Where to draw something reaching `height` below y: y itself, or `top`
+    of a new page if it would run into the footer.
+    """
+    if y - height >= CONTENT_BOTTOM:
+        return y
+    _new_page(canvas)
+    return top
+
+
+def _heading(canvas, x, y, text):
+    canvas.setFont(FONT_BOLD, HEADING_SIZE)
+    canvas.setFillColor(MUTED_COLOR)
+    canvas.drawString(x, y, text)
+
+
+def _lines(text, width, font=FONT, size=BODY_SIZE):
+    """Wrap text (which may contain newlines) to the given width."""
+    lines = []
+    for paragraph in str(text).splitlines() or ['']:
+        lines.extend(simpleSplit(paragraph, font, size, width) or [''])
+    return lines
+
+
+def _draw_lines(canvas, x, y, lines, font=FONT, size=BODY_SIZE, color=TEXT_COLOR):
+    """Draw lines downwards from baseline y; return the baseline after the last."""
+    page = None
+    for line in lines:
+        y = _room(canvas, y, 0, TOP - size)
+        if page != canvas.getPageNumber():
+            # A new page starts with the default graphics state
+            page = canvas.getPageNumber()
+            canvas.setFont(font, size)
+            canvas.setFillColor(color)
+        canvas.drawString(x, y, line)
+        y -= LEADING
+    return y
+
+
+def _draw_meta(canvas, booking, invoice_date):
+    """Bill-to block and receipt detail values; return the y below both."""
+    column = META_RIGHT_COLUMN - LEFT - 12
+    y = META_TOP - HEADING_SIZE - 8
+
+    # Detail values first: they always fit on the first page
+    values = (str(booking.id), invoice_date, f"BOOK-{booking.id}", booking.get_status_display().upper())
+    detail_y = y
+    canvas.setFont(FONT, BODY_SIZE)
+    canvas.setFillColor(TEXT_COLOR)
+    for label, value in zip(RECEIPT_LABELS, values):
+        offset = stringWidth(label + ' ', FONT_BOLD, BODY_SIZE)
+        canvas.drawString(META_RIGHT_COLUMN + offset, detail_y, value)
+        detail_y -= LEADING
+
+    bill_to = [booking.guest_name, booking.guest_email]
+    if booking.guest_phone:
+        bill_to.append(booking.guest_phone)
+    y = _draw_lines(canvas, LEFT, y, [line for value in bill_to for line in _lines(value, column)])
+
+    # Add company details if business booking
+    if booking.is_company_booking and booking.company_name:
+        y = _room(canvas, y - 10, HEADING_SIZE + 6, TOP - HEADING_SIZE)
+        _heading(canvas, LEFT, y, 'BUSINESS DETAILS:')
+        y -= HEADING_SIZE + 6
+        business = [booking.company_name]
+        if booking.company_address:
+            business.append(booking.company_address)
+        if booking.company_vat:
+            business.append(f"VAT: {booking.company_vat}")
+        y = _draw_lines(canvas, LEFT, y, [line for value in business for line in _lines(value, column)])
+
+    return min(y, detail_y) if canvas.getPageNumber() == 1 else y
+
+
+def _draw_stay(canvas, booking, top):
+    """Stay details table; return the y below it."""
+    # Keep the heading with the first row
+    top = _room(canvas, top, HEADING_SIZE + 10 + LEADING, TOP - HEADING_SIZE)
+    _heading(canvas, LEFT, top, 'STAY DETAILS')
+    y = top - HEADING_SIZE - 10
+    rows = (
+        ('Property', booking.booked_property.title),
+        ('Check-in', booking.check_in.strftime('%A, %d %b %Y')),
+        ('Check-out', booking.check_out.strftime('%A, %d %b %Y')),
+        ('Duration', f"{booking.nights} Nights"),
+        ('Guests', str(booking.guests)),
+    )
+    for label, value in rows:
+        lines = _lines(value, STAY_VALUE_WIDTH)
+        # Start the row on a new page unless it all fits (or could never fit)
+        if LEADING * len(lines) < TOP - CONTENT_BOTTOM:
+            y = _room(canvas, y, LEADING * (len(lines) - 1), TOP - BODY_SIZE)
+        canvas.setFont(FONT_BOLD, BODY_SIZE)
+        canvas.setFillColor(MUTED_COLOR)
+        canvas.drawString(LEFT, y, label)
+        y = _draw_lines(canvas, LEFT + STAY_LABEL_WIDTH, y, lines) - 6
+    return y
+
+
+def _line_items(booking):
+    """Rows of (description, quantity, rate, amount), the total last."""
+    # Accommodation Item (amounts as quoted at checkout, see pricing.py)
+    rate_str = f"£{booking.nightly_rate}" if booking.nightly_rate else "N/A"
+    rows = [(
+        f"Accommodation - {booking.booked_property.title}",
+        f"{booking.nights} nights",
+        rate_str,
+        f"£{booking.accommodation_total:.2f}",
+    )]
+
+    # Length-of-stay discount
+    if booking.discount and booking.discount > 0:
+        rows.append(("Length-of-stay Discount", "", "", f"-£{booking.discount:.2f}"))
+
+    # Cleaning Fee
+    if booking.cleaning_fee and booking.cleaning_fee > 0:
+        rows.append(("Cleaning Fee", "1", f"£{booking.cleaning_fee}", f"£{booking.cleaning_fee:.2f}"))
+
+    total_val = booking.total_price if booking.total_price else 0
+    rows.append(("", "", "Total", f"£{total_val}"))
+    return rows
+
+
+def _draw_items(canvas, booking, top):
+    """
+    Line items table: dark header row, gridded items, shaded total row.
+    The header row is repeated when the table continues on a new page.
+    """
+    edges = [LEFT]
+    for width in ITEM_COLUMNS:
+        edges.append(edges[-1] + width)
+
+    rows = [ITEM_HEADINGS] + _line_items(booking)
+    heights = []
+    wrapped = []
+    for index, row in enumerate(rows):
+        font = FONT_BOLD if index in (0, len(rows) - 1) else FONT
+        description = _lines(row[0], ITEM_COLUMNS[0] - 2 * CELL_PADDING, font)
+        wrapped.append(description)
+        heights.append(2 * CELL_PADDING + LEADING * len(description))
+
+    def draw_row(y, index):
+        row, description, height = rows[index], wrapped[index], heights[index]
+        header, total = index == 0, index == len(rows) - 1
+        bottom = y - height
+        if header or total:
+            canvas.setFillColor(HEADER_FILL if header else TOTAL_FILL)
+            canvas.rect(LEFT, bottom, edges[-1] - LEFT, height, stroke=0, fill=1)
+        if not total:
+            canvas.setStrokeColor(GRID_COLOR)
+            canvas.setLineWidth(0.5)
+            canvas.rect(LEFT, bottom, edges[-1] - LEFT, height, stroke=1, fill=0)
+            for edge in edges[1:-1]:
+                canvas.line(edge, bottom, edge, y)
+        else:
+            canvas.setStrokeColor(colors.black)
+            canvas.setLineWidth(1)
+            canvas.line(LEFT, y, edges[-1], y)
+
+        font = FONT_BOLD if header or total else FONT
+        canvas.setFont(font, BODY_SIZE)
+        canvas.setFillColor(colors.white if header else TEXT_COLOR)
+        baseline = y - CELL_PADDING - BODY_SIZE + 1
+        for line_index, line in enumerate(description):
+            canvas.drawString(LEFT + CELL_PADDING, baseline - line_index * LEADING, line)
+        # Numbers (and their headings) right aligned
+        for column, value in enumerate(row[1:], start=1):
+            canvas.drawRightString(edges[column + 1] - CELL_PADDING, baseline, value)
+        return bottom
+
+    # Keep the header with the first item
+    y = draw_row(_room(canvas, top, heights[0] + heights[1]), 0)
+    for index in range(1, len(rows)):
+        if y - heights[index] < CONTENT_BOTTOM:
+            y = draw_row(_new_page(canvas), 0)
+        y = draw_row(y, index)
+    return y
+
+
+def render_receipt(booking) -> bytes:
+    """
+    Render the PDF receipt for a booking.
+
+    Args:
+        booking: Booking (its property is read for the title)
+
+    Returns:
+        The PDF as bytes
+    """
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=A4, pageCompression=1)
+    canvas.setTitle(f"Receipt BOOK-{booking.id}")
+    canvas.setAuthor('Safe Let Stays')
+
+    get_template().add_forms(canvas)
+    canvas.doForm(STATIC_FORM)
+    canvas.doForm(FOOTER_FORM)
+
+    invoice_date = datetime.now().strftime('%d %b %Y')
+    y = _draw_meta(canvas, booking, invoice_date)
+    y = _draw_stay(canvas, booking, y - 30)
+    _draw_items(canvas, booking, y - 24)
+
+    canvas.showPage()
+    canvas.save()
+    return buffer.getvalue()
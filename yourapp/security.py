@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from functools import wraps
 from typing import Callable, Optional
 
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied, SuspiciousOperation
@@ -52,20 +53,33 @@ class RateLimiter:
         
         # Get current request count and window start
         data = cache.get(key, {'count': 0, 'window_start': current_time})
+        data = self._count(data, current_time)
         
-        # Check if window has expired
+        # Store updated data
+        cache.set(key, data, timeout=self.window_seconds)
+        
+        return self._result(data, current_time)
+    
+    async def ais_allowed(self, identifier: str) -> tuple[bool, dict]:
+        """Async is_allowed(), for async views."""
+        key = self._get_key(identifier)
+        current_time = time.time()
+        data = await cache.aget(key, {'count': 0, 'window_start': current_time})
+        data = self._count(data, current_time)
+        await cache.aset(key, data, timeout=self.window_seconds)
+        return self._result(data, current_time)
+    
+    def _count(self, data: dict, current_time: float) -> dict:
+        """Count one request, starting a new window if the old one expired."""
         if current_time - data['window_start'] >= self.window_seconds:
             data = {'count': 0, 'window_start': current_time}
-        
-        # Increment counter
         data['count'] += 1
-        
+        return data
+    
+    def _result(self, data: dict, current_time: float) -> tuple[bool, dict]:
         # Calculate remaining time in window
         remaining_time = self.window_seconds - (current_time - data['window_start'])
         
-        # Store updated data
-        cache.set(key, data, timeout=self.window_seconds)
-        
         info = {
             'limit': self.max_requests,
             'remaining': max(0, self.max_requests - data['count']),
@@ -75,10 +89,9 @@ class RateLimiter:
         
         return data['count'] <= self.max_requests, info
 
-
 def rate_limit(key: str = 'default', max_requests: int = 60, window: int = 60):
     """
-    Decorator for rate limiting views.
+    Decorator for rate limiting views (sync or async).
     
     Usage:
         @rate_limit(key='login', max_requests=5, window=300)
@@ -86,38 +99,57 @@ def rate_limit(key: str = 'default', max_requests: int = 60, window: int = 60):
             ...
     """
     def decorator(view_func: Callable):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request: HttpRequest, *args, **kwargs):
+                limiter = RateLimiter(key, max_requests, window)
+                ip = get_client_ip(request)
+                is_allowed, info = await limiter.ais_allowed(_rate_limit_identifier(ip))
+                if not is_allowed:
+                    return _rate_limited_response(key, ip, info)
+                response = await view_func(request, *args, **kwargs)
+                return _add_rate_limit_headers(response, info)
+            return async_wrapper
+        
         @wraps(view_func)
         def wrapper(request: HttpRequest, *args, **kwargs):
             limiter = RateLimiter(key, max_requests, window)
             
             # Use IP address as identifier
             ip = get_client_ip(request)
-            identifier = hashlib.sha256(ip.encode()).hexdigest()[:16]
-            
-            is_allowed, info = limiter.is_allowed(identifier)
+            is_allowed, info = limiter.is_allowed(_rate_limit_identifier(ip))
             
             if not is_allowed:
-                logger.warning(f"Rate limit exceeded for IP: {ip} on endpoint: {key}")
-                response = JsonResponse({
-                    'error': 'Rate limit exceeded',
-                    'retry_after': info['retry_after']
-                }, status=429)
-                response['Retry-After'] = str(info['retry_after'])
-                return response
+                return _rate_limited_response(key, ip, info)
             
             response = view_func(request, *args, **kwargs)
-            
-            # Add rate limit headers
-            if hasattr(response, '__setitem__'):
-                response['X-RateLimit-Limit'] = str(info['limit'])
-                response['X-RateLimit-Remaining'] = str(info['remaining'])
-                response['X-RateLimit-Reset'] = str(info['reset'])
-            
-            return response
+            return _add_rate_limit_headers(response, info)
         return wrapper
     return decorator
 
 
+def _rate_limit_identifier(ip: str) -> str:
+    return hashlib.sha256(ip.encode()).hexdigest()[:16]
+
+
+def _rate_limited_response(key: str, ip: str, info: dict) -> JsonResponse:
+    logger.warning(f"Rate limit exceeded for IP: {ip} on endpoint: {key}")
+    response = JsonResponse({
+        'error': 'Rate limit exceeded',
+        'retry_after': info['retry_after']
+    }, status=429)
+    response['Retry-After'] = str(info['retry_after'])
+    return response
+
+
+def _add_rate_limit_headers(response, info: dict):
+    if hasattr(response, '__setitem__'):
+        response['X-RateLimit-Limit'] = str(info['limit'])
+        response['X-RateLimit-Remaining'] = str(info['remaining'])
+        response['X-RateLimit-Reset'] = str(info['reset'])
+    return response
+
+
 # =============================================================================
 # IP UTILITIES
 # =============================================================================
@@ -0,0 +1,29 @@
+"""
+Application Signals for Safe Let Stays
+Custom signals fired by bulk operations that bypass per-row model signals.
+
+catalogue_changed is sent once per bulk catalogue write (import, price
+update, homepage reorder) with every affected property id, instead of one
+post_save per row. Receivers here drop whatever was cached for those
+properties.
+"""
+
+import logging
+
+from django.dispatch import Signal, receiver
+
+logger = logging.getLogger(__name__)
+
+# Sent with property_ids (list of ints) and action ('import', 'price', 'reorder')
+catalogue_changed = Signal()
+
+
+@receiver(catalogue_changed)
+def invalidate_property_pricing(sender, property_ids, action, **kwargs):
+    """Orphan cached rate calendars and quotes for repriced properties."""
+    if action != 'price':
+        return
+    from .pricing import invalidate_rate_calendar
+    for property_id in property_ids:
+        invalidate_rate_calendar(property_id)
+    logger.info(f"Catalogue {action}: invalidated pricing for {len(property_ids)} properties")
@@ -0,0 +1,332 @@
+"""
+Synthetic Data Generator for Safe Let Stays
+Production-sized fake data for benchmarks and capacity tests: properties,
+users with profiles, bookings and recent searches.
+
+Everything is drawn from one seeded random.Random, so the same arguments
+always produce the same rows, and written in batches inside a single
+transaction (no per-row signals or saves): bulk_create for most models, and
+a prepared executemany INSERT for bookings, where bulk_create's per-object
+SQL compilation would dominate the run. Synthetic rows are
+recognisable by the SYNTHETIC_PREFIX on property slugs, usernames and
+session keys.
+
+Bookings are laid out per property as a sequence of non-overlapping stays
+with realistic shape:
+
+- Seasonality: gaps between stays shrink in busy months (summer, December)
+  and nightly rates rise with demand.
+- Stay length: mostly 1-4 nights, with a tail of weekly and monthly stays.
+- Status and source follow the stay date: past stays are completed,
+  future ones confirmed or pending, with a share of cancellations.
+
+Daily analytics rollups are not maintained by batched inserts; call
+analytics.rebuild_rollups() (or the rebuild_daily_rollups command)
+afterwards if the staff panel charts are needed.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import versioning
+from .models import Booking, Destination, Profile, Property, RecentSearch
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'synthetic'
+SYNTHETIC_PASSWORD = 'synthetic-password-123'
+SYNTHETIC_BATCH_SIZE = 5000
+SQLITE_CACHE_KB = 512 * 1024
+
+AREAS = (
+    'City Centre', 'Kelham Island', 'Hillsborough', 'Ecclesall Road', 'Crookes',
+    'Sharrow', 'Broomhill', 'Meadowhall', 'Walkley', 'Nether Edge',
+)
+PROPERTY_TYPES = ('Studio', 'Apartment', 'Apartment', 'House', 'Townhouse')
+
+# Relative demand by month (Jan..Dec): drives gaps between stays and rates
+MONTHLY_DEMAND = (0.6, 0.65, 0.8, 0.9, 1.0, 1.15, 1.3, 1.35, 1.0, 0.9, 0.85, 1.1)
+
+# (nights, weight): mostly short stays with a weekly/monthly tail
+STAY_LENGTHS = ((1, 14), (2, 26), (3, 20), (4, 12), (5, 8), (6, 5), (7, 8), (10, 3), (14, 3), (28, 1))
+
+SOURCES = (('direct', 45), ('airbnb', 25), ('booking', 20), ('vrbo', 5), ('guesty', 5))
+PAST_STATUSES = (('completed', 90), ('canceled', 10))
+FUTURE_STATUSES = (('confirmed', 80), ('pending', 8), ('canceled', 7), ('inquiry', 3), ('awaiting_payment', 2))
+
+# Share of bookings made by a registered account (the rest are guest checkouts)
+ACCOUNT_BOOKING_SHARE = 0.6
+BUSINESS_ACCOUNT_SHARE = 0.15
+
+
+def _weighted(rng: random.Random, options) -> List:
+    """Expand (value, weight) pairs into a list for rng.choice()."""
+    return [value for value, weight in options for _ in range(weight)]
+
+
+def _bulk_create(model, rows: List, batch_size: int) -> None:
+    for i in range(0, len(rows), batch_size):
+        model.objects.bulk_create(rows[i:i + batch_size], batch_size=batch_size)
+
+
+@contextmanager
+def _large_page_cache():
+    """
+    On SQLite, raise the page cache while generating: index inserts for a
+    million bookings land in random order and thrash the 2MB default.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        previous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_KB}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {int(previous)}')
+
+
+class _RowInserter:
+    """
+    Batched INSERT of plain value tuples with executemany.
+
+    bulk_create compiles SQL and preps every value per object, which costs
+    minutes for a million bookings. This prepares the statement once; columns
+    not in `fields` get their model default (auto_now fields get now).
+    """
+
+    def __init__(self, model, fields: List[str], batch_size: int):
+        now = timezone.now()
+        opts = model._meta
+        given = [opts.get_field(name) for name in fields]
+        rest = [f for f in opts.concrete_fields if not f.primary_key and f not in given]
+        defaults = []
+        for field in rest:
+            auto = getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+            value = now if auto else field.get_default()
+            defaults.append(field.get_db_prep_save(value, connection))
+        self.defaults = tuple(defaults)
+
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(f.column) for f in given + rest)
+        placeholders = ', '.join(['%s'] * (len(given) + len(rest)))
+        self.sql = f'INSERT INTO {quote(opts.db_table)} ({columns}) VALUES ({placeholders})'
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, *values) -> None:
+        self.rows.append(values + self.defaults)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(self.sql, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def generate(properties: int = 10000, bookings: int = 1000000, users: int = 20000, searches: int = 50000,
+             years: float = 3.0, seed: int = 42, batch_size: int = SYNTHETIC_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Generate a synthetic dataset.
+
+    Args:
+        properties: Properties to create
+        bookings: Bookings to spread across them
+        users: User accounts (each with a Profile)
+        searches: RecentSearch rows
+        years: Booking history span; stays run from this far back to ~6 months ahead
+        seed: Random seed (same seed, same data)
+        batch_size: Rows per bulk_create batch
+
+    Returns:
+        Dict of rows created per model
+
+    Raises:
+        ValueError: If synthetic data already exists
+    """
+    if Property.objects.filter(slug__startswith=f'{SYNTHETIC_PREFIX}-').exists():
+        raise ValueError('Synthetic data already exists; use a fresh database.')
+
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    start = today - timedelta(days=int(years * 365) - 180)
+    counts = {}
+    started = time.perf_counter()
+
+    with transaction.atomic(), _large_page_cache():
+        if not Destination.objects.exists():
+            Destination.objects.bulk_create([
+                Destination(name=area, subtitle='Sheffield', filter_area=area, order=i)
+                for i, area in enumerate(AREAS)
+            ])
+
+        property_rows = _build_properties(rng, properties)
+        _bulk_create(Property, property_rows, batch_size)
+        prices = dict(
+            Property.objects.filter(slug__startswith=f'{SYNTHETIC_PREFIX}-')
+            .values_list('id', 'price_from')
+        )
+        counts['properties'] = len(prices)
+        logger.info(f"Synthetic: {len(prices)} properties ({time.perf_counter() - started:.1f}s)")
+
+        user_ids = _create_users(rng, users, batch_size)
+        counts['users'] = counts['profiles'] = len(user_ids)
+        logger.info(f"Synthetic: {len(user_ids)} users ({time.perf_counter() - started:.1f}s)")
+
+        counts['bookings'] = _create_bookings(rng, prices, user_ids, bookings, start, today, batch_size)
+        logger.info(f"Synthetic: {counts['bookings']} bookings ({time.perf_counter() - started:.1f}s)")
+
+        counts['searches'] = _create_searches(rng, user_ids, searches, today, batch_size)
+
+    # Bulk inserts send no post_save, so cached pages would not notice
+    versioning.bump(Property, Destination, Booking)
+    logger.info(f"Synthetic data generated in {time.perf_counter() - started:.1f}s: {counts}")
+    return counts
+
+
+# ============================================================================
+# BUILDERS
+# ============================================================================
+
+def _build_properties(rng: random.Random, count: int) -> List[Property]:
+    rows = []
+    for i in range(count):
+        beds = rng.choice((1, 1, 2, 2, 2, 3, 3, 4, 5))
+        area = AREAS[rng.randrange(len(AREAS))]
+        kind = PROPERTY_TYPES[min(beds, len(PROPERTY_TYPES)) - 1]
+        rows.append(Property(
+            title=f'{area} {kind} {i}',
+            slug=f'{SYNTHETIC_PREFIX}-{i}',
+            short_description=f'A {beds}-bedroom {kind.lower()} in {area}.',
+            description=f'Synthetic {kind.lower()} in {area}, Sheffield, sleeping {beds * 2}.',
+            area=area,
+            price_from=Decimal(35 + beds * 25 + rng.randrange(40)),
+            cleaning_fee=Decimal(rng.choice((0, 25, 35, 50))),
+            weekend_uplift_percent=Decimal(rng.choice((0, 10, 15, 20))),
+            weekly_discount_percent=Decimal(rng.choice((0, 5, 10))),
+            monthly_discount_percent=Decimal(rng.choice((0, 15, 25))),
+            beds=beds, baths=max(1, beds - 1), capacity=beds * 2,
+            parking=rng.random() < 0.5,
+            distance_to_stadium_mins=rng.randint(3, 45),
+            tags=rng.choice(('wifi, parking', 'city-centre, modern', 'family, garden', 'contractor, long-stay')),
+            is_featured=rng.random() < 0.05,
+            show_on_homepage=i < 3,
+            homepage_order=i if i < 3 else 0,
+        ))
+    return rows
+
+
+def _create_users(rng: random.Random, count: int, batch_size: int) -> List[int]:
+    password = make_password(SYNTHETIC_PASSWORD)  # Hash once: hashing per user takes minutes
+    _bulk_create(User, [
+        User(
+            username=f'{SYNTHETIC_PREFIX}-user-{i}', email=f'{SYNTHETIC_PREFIX}-user-{i}@example.com',
+            first_name='Synthetic', last_name=f'User {i}', password=password,
+        )
+        for i in range(count)
+    ], batch_size)
+    user_ids = list(
+        User.objects.filter(username__startswith=f'{SYNTHETIC_PREFIX}-user-')
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+    profiles = []
+    for i, user_id in enumerate(user_ids):
+        business = rng.random() < BUSINESS_ACCOUNT_SHARE
+        profiles.append(Profile(
+            user_id=user_id,
+            account_type='business' if business else 'personal',
+            company_name=f'Synthetic Contractors {i}' if business else '',
+            booking_purpose=rng.choice(('Work', 'Football', 'Family visit', 'Holiday')),
+        ))
+    _bulk_create(Profile, profiles, batch_size)
+    return user_ids
+
+
+def _create_bookings(rng: random.Random, prices: Dict[int, Decimal], user_ids: List[int], count: int,
+                     start: date, today: date, batch_size: int) -> int:
+    """Lay out non-overlapping stays per property, flushing in batches."""
+    if not prices or count <= 0:
+        return 0
+    lengths = _weighted(rng, STAY_LENGTHS)
+    sources = _weighted(rng, SOURCES)
+    past_statuses = _weighted(rng, PAST_STATUSES)
+    future_statuses = _weighted(rng, FUTURE_STATUSES)
+    mean_nights = sum(n * w for n, w in STAY_LENGTHS) / sum(w for _, w in STAY_LENGTHS)
+    span = (today - start).days + 180
+
+    property_ids = list(prices)
+    per_property, extra = divmod(count, len(property_ids))
+    inserter = _RowInserter(Booking, [
+        'booked_property', 'user', 'guest_name', 'guest_email', 'check_in', 'check_out', 'guests',
+        'status', 'source', 'nightly_rate', 'cleaning_fee', 'total_price',
+    ], batch_size)
+    cleaning_fee = Decimal(25)
+    random_ = rng.random
+    number = 0
+
+    for index, property_id in enumerate(property_ids):
+        stays = per_property + (1 if index < extra else 0)
+        if not stays:
+            continue
+        base_rate = int(prices[property_id])
+        # Average idle nights between stays so the stays fill the span
+        mean_gap = max(0.0, (span - stays * mean_nights) / stays)
+        day = start + timedelta(days=int(random_() * mean_gap))
+
+        for _ in range(stays):
+            # int(random() * n) rather than randrange(): this loop runs a million times
+            demand = MONTHLY_DEMAND[day.month - 1]
+            nights = lengths[int(random_() * len(lengths))]
+            check_out = day + timedelta(days=nights)
+            statuses = past_statuses if check_out <= today else future_statuses
+            rate = Decimal(round(base_rate * (0.85 + 0.3 * demand) * (1.1 if day.weekday() in (4, 5) else 1.0)))
+            user_id = None
+            if user_ids and random_() < ACCOUNT_BOOKING_SHARE:
+                user_id = user_ids[int(random_() * len(user_ids))]
+            inserter.add(
+                property_id, user_id, f'Synthetic Guest {number}', f'{SYNTHETIC_PREFIX}-guest-{number}@example.com',
+                day, check_out, 1 + int(random_() * 4), statuses[int(random_() * len(statuses))],
+                sources[int(random_() * len(sources))], rate, cleaning_fee, rate * nights + cleaning_fee,
+            )
+            number += 1
+            # Busy months leave shorter gaps before the next stay
+            day = check_out + timedelta(days=int(rng.expovariate(1.0) * mean_gap / demand))
+
+    inserter.flush()
+    return inserter.count
+
+
+def _create_searches(rng: random.Random, user_ids: List[int], count: int, today: date, batch_size: int) -> int:
+    rows = []
+    for i in range(count):
+        check_in = today + timedelta(days=rng.randint(1, 120))
+        signed_in = bool(user_ids) and rng.random() < 0.4
+        rows.append(RecentSearch(
+            user_id=user_ids[rng.randrange(len(user_ids))] if signed_in else None,
+            session_key='' if signed_in else f'{SYNTHETIC_PREFIX}{i:031d}',
+            location=AREAS[rng.randrange(len(AREAS))],
+            check_in=check_in,
+            check_out=check_in + timedelta(days=rng.choice((1, 2, 3, 7))),
+            guests=rng.randint(1, 6),
+        ))
+    _bulk_create(RecentSearch, rows, batch_size)
+    return len(rows)
@@ -0,0 +1,439 @@
+"""
+Request Telemetry for Safe Let Stays
+Where does request time go? Per-view latency histograms, broken down by
+component, without an external APM.
+
+Components are timed inclusively wherever they happen during a request:
+
+    db        every SQL query (execute wrapper installed on each connection)
+    cache     every cache call (InstrumentedCache backend proxy)
+    template  template rendering (InstrumentedTemplates backend)
+    stripe, mailjet, guesty, pdf
+              outbound calls and receipt rendering, via timed()
+
+TelemetryMiddleware collects a request's breakdown, adds it as a
+Server-Timing header and records it into in-process histograms. Each worker
+periodically writes a cumulative snapshot of its histograms to the cache;
+/staff/metrics merges the snapshots of every live worker and renders them
+in the Prometheus text format.
+"""
+
+import hmac
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.template.backends.django import DjangoTemplates
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds (seconds)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TELEMETRY_FLUSH_INTERVAL = 10  # Seconds between snapshot writes per worker
+TELEMETRY_SNAPSHOT_TTL = 3600  # Workers silent this long drop out of /staff/metrics
+TELEMETRY_INDEX_KEY = 'telemetry:workers'
+TELEMETRY_SNAPSHOT_KEY = 'telemetry:snapshot:{worker}'
+
+METRIC_PREFIX = 'safeletstays'
+
+# Breakdown of the current request: component -> [seconds, calls]
+_breakdown: ContextVar[Optional[Dict[str, list]]] = ContextVar('telemetry_breakdown', default=None)
+# Set while telemetry itself touches the cache so it is not measured
+_suspended: ContextVar[bool] = ContextVar('telemetry_suspended', default=False)
+
+
+def record(component: str, seconds: float, calls: int = 1) -> None:
+    """Add time spent in a component to the current request (no-op outside one)."""
+    breakdown = _breakdown.get()
+    if breakdown is None or _suspended.get():
+        return
+    entry = breakdown.setdefault(component, [0.0, 0])
+    entry[0] += seconds
+    entry[1] += calls
+
+
+class timed(ContextDecorator):
+    """
+    Time a block or function as a component of the current request.
+
+        with timed('stripe'):
+            stripe.checkout.Session.create(...)
+
+        @timed('pdf')
+        def generate_receipt_pdf(booking): ...
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self._start = None
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call, so concurrent calls don't share a start time
+        return type(self)(self.component)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.component, time.perf_counter() - self._start)
+        return False
+
+
+# ============================================================================
+# INSTRUMENTATION POINTS
+# ============================================================================
+
+def _db_execute_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - start)
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    if _db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_execute_wrapper)
+
+
+def install() -> None:
+    """Time SQL on every database connection (called from AppConfig.ready)."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_instrument_connection, dispatch_uid='telemetry_db')
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(None, connection)
+
+
+class InstrumentedCache(BaseCache):
+    """
+    Cache backend proxy that times every call to the real backend.
+
+    CACHES = {'default': {
+        'BACKEND': 'yourapp.telemetry.InstrumentedCache',
+        'WRAPPED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': ..., 'OPTIONS': {...},
+    }}
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        backend = params.pop('WRAPPED_BACKEND')
+        super().__init__(params)
+        self._backend = import_string(backend)(location, params)
+
+    def __getattr__(self, name):
+        # Backend-specific extras (e.g. _cache) go straight through
+        if name == '_backend':
+            raise AttributeError(name)
+        return getattr(self._backend, name)
+
+    def _timed(name):
+        def method(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return getattr(self._backend, name)(*args, **kwargs)
+            finally:
+                record('cache', time.perf_counter() - start)
+        method.__name__ = name
+        return method
+
+    add = _timed('add')
+    get = _timed('get')
+    set = _timed('set')
+    touch = _timed('touch')
+    delete = _timed('delete')
+    get_many = _timed('get_many')
+    set_many = _timed('set_many')
+    delete_many = _timed('delete_many')
+    has_key = _timed('has_key')
+    incr = _timed('incr')
+    decr = _timed('decr')
+    get_or_set = _timed('get_or_set')
+    clear = _timed('clear')
+    del _timed
+
+    def close(self, **kwargs):
+        self._backend.close(**kwargs)
+
+
+class _TimedTemplate:
+    """Wraps a backend template so render() is timed."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return self.template.render(context, request)
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """DjangoTemplates backend that times each top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+# ============================================================================
+# AGGREGATION
+# ============================================================================
+
+class Registry:
+    """Per-process histograms and counters, keyed by (metric, labels)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # key -> [bucket counts..., +Inf count], sum, count
+        self.counters = defaultdict(float)
+        self.last_flush = 0.0
+
+    def observe(self, metric: str, labels: tuple, seconds: float) -> None:
+        key = (metric, labels)
+        with self.lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[0][i] += 1
+                    break
+            else:
+                entry[0][-1] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def inc(self, metric: str, labels: tuple, value: float = 1) -> None:
+        with self.lock:
+            self.counters[(metric, labels)] += value
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                'histograms': {key: [list(counts), total, n] for key, (counts, total, n) in self.histograms.items()},
+                'counters': dict(self.counters),
+            }
+
+
+_registry = Registry()
+_worker_pid = None
+
+
+def get_registry() -> Registry:
+    """This process's registry (a fresh one after a fork)."""
+    global _registry, _worker_pid
+    if _worker_pid != os.getpid():
+        _registry, _worker_pid = Registry(), os.getpid()
+    return _registry
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _telemetry_cache():
+    return caches[getattr(settings, 'TELEMETRY_CACHE_ALIAS', 'default')]
+
+
+def flush() -> None:
+    """Write this worker's cumulative snapshot to the shared cache."""
+    registry = get_registry()
+    registry.last_flush = time.monotonic()
+    worker = _worker_id()
+    token = _suspended.set(True)
+    try:
+        store = _telemetry_cache()
+        store.set(TELEMETRY_SNAPSHOT_KEY.format(worker=worker), registry.snapshot(), TELEMETRY_SNAPSHOT_TTL)
+        workers = store.get(TELEMETRY_INDEX_KEY) or []
+        if worker not in workers:
+            # Racy read-modify-write, but every flush re-adds a missing worker
+            store.set(TELEMETRY_INDEX_KEY, workers + [worker], None)
+    except Exception as e:
+        logger.warning(f"Telemetry flush failed: {e}")
+    finally:
+        _suspended.reset(token)
+
+
+def collect() -> Dict:
+    """Merge the latest snapshots from every worker."""
+    flush()
+    token = _suspended.set(True)
+    try:
+        store = _telemetry_cache()
+        workers = store.get(TELEMETRY_INDEX_KEY) or []
+        snapshots = store.get_many([TELEMETRY_SNAPSHOT_KEY.format(worker=w) for w in workers])
+        live = [w for w in workers if TELEMETRY_SNAPSHOT_KEY.format(worker=w) in snapshots]
+        if len(live) != len(workers):
+            store.set(TELEMETRY_INDEX_KEY, live, None)
+    finally:
+        _suspended.reset(token)
+
+    merged = {'histograms': {}, 'counters': defaultdict(float)}
+    for snapshot in snapshots.values():
+        for key, (counts, total, n) in snapshot['histograms'].items():
+            entry = merged['histograms'].setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += n
+        for key, value in snapshot['counters'].items():
+            merged['counters'][key] += value
+    return merged
+
+
+# ============================================================================
+# EXPOSITION
+# ============================================================================
+
+METRIC_HELP = {
+    'request_duration_seconds': 'Request latency by view.',
+    'component_duration_seconds': 'Time per request spent in a component (db, cache, template, ...), by view.',
+    'component_calls_total': 'Calls to a component (queries, cache operations, HTTP requests, ...), by view.',
+}
+
+
+def _labels(labels: tuple, extra: str = '') -> str:
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    parts = [f'{name}="{escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def render_prometheus(data: Dict) -> str:
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines = []
+    by_metric = defaultdict(list)
+    for (metric, labels), entry in data['histograms'].items():
+        by_metric[metric].append((labels, entry))
+    for metric in sorted(by_metric):
+        name = f'{METRIC_PREFIX}_{metric}'
+        lines.append(f'# HELP {name} {METRIC_HELP.get(metric, metric)}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, (counts, total, n) in sorted(by_metric[metric]):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{name}_bucket{_labels(labels, le)} {cumulative}')
+            le = 'le="+Inf"'
+            lines.append(f'{name}_bucket{_labels(labels, le)} {n}')
+            lines.append(f'{name}_sum{_labels(labels)} {total:.6f}')
+            lines.append(f'{name}_count{_labels(labels)} {n}')
+
+    counters = defaultdict(list)
+    for (metric, labels), value in data['counters'].items():
+        counters[metric].append((labels, value))
+    for metric in sorted(counters):
+        name = f'{METRIC_PREFIX}_{metric}'
+        lines.append(f'# HELP {name} {METRIC_HELP.get(metric, metric)}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in sorted(counters[metric]):
+            lines.append(f'{name}{_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_token_authorized(request) -> bool:
+    """True if the request carries TELEMETRY_METRICS_TOKEN as a bearer token."""
+    token = getattr(settings, 'TELEMETRY_METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+def server_timing_header(breakdown: Dict[str, list], total: float) -> str:
+    """Server-Timing header value for a request's breakdown."""
+    entries = [
+        f'{component};dur={seconds * 1000:.1f};desc="{calls} calls"'
+        for component, (seconds, calls) in sorted(breakdown.items())
+    ]
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class TelemetryMiddleware:
+    """
+    Times each request and its components.
+
+    Place first in MIDDLEWARE so the total covers the whole stack.
+    TELEMETRY_SERVER_TIMING controls the Server-Timing header: True (all
+    responses), 'staff' (staff users only) or False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _breakdown.set({})
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            self._finish(request, response, time.perf_counter() - start)
+            return response
+        finally:
+            _breakdown.reset(token)
+
+    async def __acall__(self, request):
+        token = _breakdown.set({})
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            self._finish(request, response, time.perf_counter() - start)
+            return response
+        finally:
+            _breakdown.reset(token)
+
+    def _finish(self, request, response, total: float) -> None:
+        breakdown = _breakdown.get() or {}
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+
+        registry = get_registry()
+        registry.observe('request_duration_seconds', (('view', view),), total)
+        for component, (seconds, calls) in breakdown.items():
+            labels = (('view', view), ('component', component))
+            registry.observe('component_duration_seconds', labels, seconds)
+            registry.inc('component_calls_total', labels, calls)
+
+        mode = getattr(settings, 'TELEMETRY_SERVER_TIMING', True)
+        if mode == 'staff':
+            user = getattr(request, 'user', None)
+            mode = bool(user and user.is_staff)
+        if mode:
+            response['Server-Timing'] = server_timing_header(breakdown, total)
+
+        interval = getattr(settings, 'TELEMETRY_FLUSH_INTERVAL', TELEMETRY_FLUSH_INTERVAL)
+        if time.monotonic() - registry.last_flush >= interval:
+            from .background import submit
+            registry.last_flush = time.monotonic()
+            submit(flush)
@@ -10,7 +10,7 @@ Or with pytest:
     pytest
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from decimal import Decimal
@@ -224,6 +224,111 @@ class PropertyDetailViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class ConditionalGetTest(TestCase):
+    """Tests for ETag/Last-Modified revalidation of the public pages."""
+
+    def setUp(self):
+        self.property = Property.objects.create(
+            title='Revalidated Flat', short_description='Flat', description='Flat',
+            price_from=Decimal('80.00'), beds=1, baths=1, capacity=2,
+        )
+        self.urls = [
+            reverse('homepage'),
+            reverse('properties'),
+            reverse('property_detail', kwargs={'slug': self.property.slug}),
+        ]
+
+    def test_unchanged_pages_return_304(self):
+        """Test that a repeat view with the page's ETag is answered without rendering."""
+        self.client.get(self.urls[0])  # the first visit starts the session
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            self.assertIn('Cookie', response['Vary'])
+            self.assertTrue(response.has_header('Last-Modified'))
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.templates, [])
+            self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_catalogue_change_invalidates_pages(self):
+        """Test that editing or deleting a property changes every page's ETag."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.property.title = 'Renamed Flat'
+        self.property.save()
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        other = Property.objects.create(
+            title='Short-lived Flat', short_description='Flat', description='Flat',
+            price_from=Decimal('70.00'), beds=1, baths=1, capacity=2,
+        )
+        etag = self.client.get(self.urls[1])['ETag']
+        other.delete()
+        self.assertEqual(self.client.get(self.urls[1], HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_priced_search_follows_rate_overrides(self):
+        """Test that listings priced for a stay are revalidated against rate override changes."""
+        from .models import RateOverride
+        check_in = date.today() + timedelta(days=3)
+        params = {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat()}
+        url = reverse('properties')
+        etag = self.client.get(url, params)['ETag']
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        RateOverride.objects.create(
+            rate_property=self.property, start_date=check_in, end_date=check_in, nightly_price=Decimal('150.00'),
+        )
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_recent_search_changes_homepage(self):
+        """Test that a visitor's own search invalidates their homepage, without touching the catalogue."""
+        from . import versioning
+        self.client.get(self.urls[0])
+        etag = self.client.get(self.urls[0])['ETag']
+        catalogue = versioning.get_versions(Property, Destination)
+        self.client.get(self.urls[1], {'location': 'Hillsborough'})
+        self.assertEqual(versioning.get_versions(Property, Destination), catalogue)
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Hillsborough')
+
+
+class VersioningTest(TestCase):
+    """Tests for the cache version counters."""
+
+    def test_writes_bump_versions(self):
+        """Test that saves, deletes and bulk catalogue writes each move the versions on."""
+        from . import versioning
+        from .catalogue import adjust_prices
+        key = versioning.cache_key('page:test', 1, models=[Property])
+        prop = Property.objects.create(
+            title='Versioned Flat', short_description='Flat', description='Flat',
+            price_from=Decimal('80.00'), beds=1, baths=1, capacity=2,
+        )
+        self.assertNotEqual(versioning.cache_key('page:test', 1, models=[Property]), key)
+
+        key = versioning.cache_key('page:test', 1, models=[Property])
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_prices(Decimal('10'), property_ids=[prop.pk])
+        self.assertNotEqual(versioning.cache_key('page:test', 1, models=[Property]), key)
+
+        destinations, everything = versioning.get_versions(Destination), versioning.get_versions()
+        prop.delete()
+        self.assertEqual(versioning.get_versions(Destination), destinations)
+        self.assertNotEqual(versioning.get_versions(), everything)
+
+    def test_cache_key_format(self):
+        """Test that keys embed the versions and hash anything unsafe for memcached."""
+        from . import versioning
+        version, = versioning.get_versions(Property)
+        self.assertEqual(versioning.cache_key('ns', 'a', 2, models=[Property]), f'ns:a:2:v{version}')
+        self.assertRegex(versioning.cache_key('ns', 'two words', models=[Property]), r'^ns:[0-9a-f]{32}$')
+        self.assertTrue(versioning.make_etag('ns', 'a').startswith('"'))
+
+
 class AuthenticationTest(TestCase):
     """Tests for authentication views."""
 
@@ -311,3 +416,1403 @@ class MyBookingsViewTest(TestCase):
         self.client.login(username='testuser', password='testpass123')
         response = self.client.get(reverse('my_bookings'))
         self.assertEqual(response.status_code, 200)
+
+
+class GuestyPropertySyncTest(TestCase):
+    """Tests for the concurrent Guesty property sync engine."""
+
+    class FakeClient:
+        def __init__(self, listings):
+            self.listings = listings
+
+        def get_listing(self, listing_id, use_cache=True):
+            return self.listings.get(listing_id)
+
+    def setUp(self):
+        self.linked = Property.objects.create(
+            title='Linked Property',
+            short_description='Short description',
+            description='Full description',
+            price_from=Decimal('100.00'),
+            beds=2,
+            baths=1,
+            capacity=4,
+            guesty_listing_id='listing-1',
+        )
+        self.unchanged = Property.objects.create(
+            title='Unchanged Property',
+            short_description='Short description',
+            description='Full description',
+            price_from=Decimal('80.00'),
+            beds=1,
+            baths=1,
+            capacity=2,
+            guesty_listing_id='listing-2',
+        )
+
+    def test_sync_applies_changes_in_bulk(self):
+        """Test that changed listings are written back and counted."""
+        from .guesty_integration import sync_properties_from_guesty
+        client = self.FakeClient({
+            'listing-1': {'title': 'Renamed Property', 'bedrooms': 3, 'prices': {'basePrice': 120}},
+            'listing-2': {'title': 'Unchanged Property', 'bedrooms': 1},
+        })
+        summary = sync_properties_from_guesty(client=client, max_workers=2)
+
+        self.assertEqual(summary, {'synced': 2, 'updated': 1, 'failed': 0})
+        self.linked.refresh_from_db()
+        self.assertEqual(self.linked.title, 'Renamed Property')
+        self.assertEqual(self.linked.beds, 3)
+        self.assertEqual(self.linked.price_from, Decimal('120.00'))
+        self.assertIsNotNone(self.linked.guesty_last_synced)
+
+    def test_sync_counts_missing_listings_as_failed(self):
+        """Test that listings the API cannot return are reported as failures."""
+        from .guesty_integration import sync_properties_from_guesty
+        summary = sync_properties_from_guesty(client=self.FakeClient({}), max_workers=2)
+        self.assertEqual(summary['failed'], 2)
+        self.assertEqual(summary['synced'], 0)
+
+    def test_token_bucket_limits_burst(self):
+        """Test that the token bucket refuses calls beyond its capacity."""
+        from .guesty_integration import TokenBucket
+        bucket = TokenBucket(capacity=2, period=60)
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
+
+
+class GuestyReservationSyncTest(TestCase):
+    """Tests for the incremental Guesty reservation sync."""
+
+    class FakeClient:
+        def __init__(self, reservations):
+            self.reservations = reservations
+            self.calls = []
+
+        def get_reservations_updated_since(self, updated_since=None, limit=100, skip=0):
+            self.calls.append(updated_since)
+            return {'results': self.reservations[skip:skip + limit]}
+
+    def setUp(self):
+        self.property = Property.objects.create(
+            title='Guesty Property',
+            short_description='Short description',
+            description='Full description',
+            price_from=Decimal('100.00'),
+            beds=2,
+            baths=1,
+            capacity=4,
+            guesty_listing_id='listing-1',
+        )
+
+    def _reservation(self, reservation_id, status='confirmed', updated='2026-01-01T10:00:00Z', listing='listing-1'):
+        return {
+            '_id': reservation_id,
+            'listingId': listing,
+            'status': status,
+            'source': 'Airbnb',
+            'checkInDateLocalized': '2026-02-01',
+            'checkOutDateLocalized': '2026-02-04',
+            'guestsCount': 2,
+            'guest': {'fullName': 'Jane Guest', 'email': 'jane@example.com'},
+            'money': {'fareAccommodation': 300, 'fareCleaning': 40, 'totalPrice': 340},
+            'lastUpdatedAt': updated,
+        }
+
+    def test_sync_upserts_and_advances_cursor(self):
+        """Test that reservations are upserted and the cursor moves forward."""
+        from .guesty_integration import sync_reservations_from_guesty
+        client = self.FakeClient([
+            self._reservation('res-1'),
+            self._reservation('res-2', updated='2026-01-02T10:00:00Z'),
+            self._reservation('res-3', listing='unlinked'),
+        ])
+        summary = sync_reservations_from_guesty(client=client, page_size=2)
+
+        self.assertEqual(summary['fetched'], 3)
+        self.assertEqual(summary['written'], 2)
+        self.assertEqual(summary['cursor'].isoformat(), '2026-01-02T10:00:00+00:00')
+        booking = Booking.objects.get(guesty_reservation_id='res-1')
+        self.assertEqual(booking.source, 'airbnb')
+        self.assertEqual(booking.nightly_rate, Decimal('100.00'))
+        self.assertEqual(booking.total_price, Decimal('340.00'))
+
+    def test_resync_updates_existing_booking(self):
+        """Test that a changed reservation updates the booking rather than duplicating it."""
+        from .guesty_integration import sync_reservations_from_guesty
+        sync_reservations_from_guesty(client=self.FakeClient([self._reservation('res-1')]))
+        client = self.FakeClient([self._reservation('res-1', status='canceled', updated='2026-01-03T10:00:00Z')])
+        sync_reservations_from_guesty(client=client)
+
+        self.assertEqual(client.calls[0], '2026-01-01T10:00:00+00:00')
+        self.assertEqual(Booking.objects.filter(guesty_reservation_id='res-1').count(), 1)
+        self.assertEqual(Booking.objects.get(guesty_reservation_id='res-1').status, 'canceled')
+
+
+class GuestyCacheInvalidationTest(TestCase):
+    """Tests for versioned Guesty availability cache keys."""
+
+    def setUp(self):
+        from unittest.mock import MagicMock
+        from django.core.cache import cache
+        from .guesty_integration import GuestyAPIClient
+        cache.clear()
+        self.client_api = GuestyAPIClient(api_key='test-key')
+        response = MagicMock()
+        response.json.return_value = {'data': {'days': []}}
+        self.client_api.session.request = MagicMock(return_value=response)
+
+    def test_invalidation_forces_refetch(self):
+        """Test that bumping a listing's version orphans its cached responses."""
+        from .guesty_integration import invalidate_listing_cache
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+        invalidate_listing_cache('listing-1')
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.assertEqual(self.client_api.session.request.call_count, 2)
+
+    def test_invalidation_is_scoped_to_listing(self):
+        """Test that invalidating one listing leaves other listings cached."""
+        from .guesty_integration import invalidate_listing_cache
+        self.client_api.get_availability('listing-2', '2026-01-01', '2026-01-07')
+        invalidate_listing_cache('listing-1')
+        self.client_api.get_availability('listing-2', '2026-01-01', '2026-01-07')
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class GuestyStaleWhileRevalidateTest(TestCase):
+    """Tests for stale-while-revalidate and negative caching of Guesty lookups."""
+
+    def setUp(self):
+        from unittest.mock import MagicMock
+        from django.core.cache import cache
+        from .guesty_integration import GuestyAPIClient
+        cache.clear()
+        self.client_api = GuestyAPIClient(api_key='test-key')
+        self.response = MagicMock()
+        self.response.json.return_value = {'data': {'days': []}}
+        self.client_api.session.request = MagicMock(return_value=self.response)
+
+    def test_stale_entry_served_then_refreshed(self):
+        """Test that an expired entry is returned immediately and refreshed once."""
+        import time
+        from unittest.mock import patch
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.response.json.return_value = {'data': {'days': [{'date': '2026-01-02'}]}}
+
+        with patch('yourapp.guesty_integration.time.time', return_value=time.time() + 3600):
+            stale = self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.assertEqual(stale, {'data': {'days': []}})
+        self.assertEqual(self.client_api.session.request.call_count, 2)
+
+        fresh = self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.assertEqual(fresh, {'data': {'days': [{'date': '2026-01-02'}]}})
+        self.assertEqual(self.client_api.session.request.call_count, 2)
+
+    def test_non_blocking_miss_warms_cache(self):
+        """Test that block=False returns None on a cold cache and fills it in the background."""
+        result = self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07', block=False)
+        self.assertIsNone(result)
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+        result = self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07', block=False)
+        self.assertEqual(result, {'data': {'days': []}})
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+    def test_empty_response_is_cached(self):
+        """Test that a falsy but valid response counts as a cache hit."""
+        self.response.json.return_value = {}
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07')
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+    def test_failure_is_negatively_cached(self):
+        """Test that a failed lookup is not retried on every request."""
+        import requests
+        self.client_api.session.request.side_effect = requests.exceptions.ConnectionError('down')
+        self.assertIsNone(self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07'))
+        self.assertIsNone(self.client_api.get_availability('listing-1', '2026-01-01', '2026-01-07'))
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+    def test_refresh_lock_prevents_duplicate_refresh(self):
+        """Test that a held refresh lock stops a second background refresh."""
+        from django.core.cache import cache
+        self.client_api._schedule_refresh('guesty:test', 'https://example.com', None, 300)
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+        cache.add('guesty:test:refresh-lock', 1, 60)
+        self.client_api._schedule_refresh('guesty:test', 'https://example.com', None, 300)
+        self.assertEqual(self.client_api.session.request.call_count, 1)
+
+
+class BatchAvailabilityTest(TestCase):
+    """Tests for the batch availability endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.properties = [
+            Property.objects.create(
+                title=f'Availability Property {i}',
+                short_description='Short description',
+                description='Full description',
+                price_from=Decimal('100.00'),
+                beds=2,
+                baths=1,
+                capacity=4,
+            )
+            for i in range(2)
+        ]
+        booked = self.properties[0]
+        for check_in, check_out, status in [
+            (date(2026, 3, 2), date(2026, 3, 4), 'confirmed'),
+            (date(2026, 3, 4), date(2026, 3, 5), 'pending'),
+            (date(2026, 2, 25), date(2026, 3, 1), 'confirmed'),
+            (date(2026, 3, 6), date(2026, 3, 7), 'canceled'),
+        ]:
+            Booking.objects.create(
+                booked_property=booked,
+                guest_name='Guest',
+                guest_email='guest@example.com',
+                check_in=check_in,
+                check_out=check_out,
+                status=status,
+            )
+        self.url = reverse('api_batch_availability')
+        self.ids = ','.join(str(p.pk) for p in self.properties)
+
+    def test_ranges_are_merged_and_clipped(self):
+        """Test that stays are clipped to the window and adjacent stays merge."""
+        from .availability import get_booked_ranges
+        with self.assertNumQueries(1):
+            get_booked_ranges([p.pk for p in self.properties], date(2026, 2, 28), date(2026, 3, 8))
+
+        response = self.client.get(self.url, {'ids': self.ids, 'start': '2026-02-28', 'end': '2026-03-08'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['properties']
+        self.assertEqual(data[str(self.properties[0].pk)], {
+            'available': False,
+            'booked': [['2026-02-28', '2026-03-01'], ['2026-03-02', '2026-03-05']],
+        })
+        self.assertEqual(data[str(self.properties[1].pk)], {'available': True, 'booked': []})
+
+    def test_bitset_format(self):
+        """Test that the bitset marks booked nights from the window start."""
+        response = self.client.get(self.url, {
+            'ids': self.ids, 'start': '2026-02-28', 'end': '2026-03-08', 'format': 'bitset'
+        })
+        data = response.json()['properties']
+        # Nights 28 Feb .. 7 Mar -> 1 0 1 1 1 0 0 0
+        self.assertEqual(data[str(self.properties[0].pk)]['bitset'], 'b8')
+        self.assertEqual(data[str(self.properties[1].pk)]['bitset'], '00')
+
+    def test_invalid_parameters_rejected(self):
+        """Test that bad ids and date ranges return 400."""
+        for params in [
+            {'start': '2026-03-01', 'end': '2026-03-05'},
+            {'ids': 'abc', 'start': '2026-03-01', 'end': '2026-03-05'},
+            {'ids': self.ids, 'start': '2026-03-05', 'end': '2026-03-01'},
+            {'ids': self.ids, 'start': 'soon', 'end': '2026-03-01'},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+@override_settings(GUESTY_WEBHOOK_SECRET='whsec-test')
+class GuestyWebhookInboxTest(TestCase):
+    """Tests for the queued Guesty webhook inbox."""
+
+    def setUp(self):
+        self.client = Client()
+        self.property = Property.objects.create(
+            title='Webhook Property',
+            short_description='Short description',
+            description='Full description',
+            price_from=Decimal('100.00'),
+            beds=2,
+            baths=1,
+            capacity=4,
+            guesty_listing_id='listing-1',
+        )
+
+    def _post(self, event, data):
+        import hashlib
+        import hmac
+        import json
+        body = json.dumps({'event': event, 'data': data}).encode()
+        signature = hmac.new(b'whsec-test', body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse('guesty_webhook'), body,
+            content_type='application/json', HTTP_X_GUESTY_SIGNATURE=signature
+        )
+
+    def _reservation(self, reservation_id, guests=2):
+        return {
+            '_id': reservation_id,
+            'listingId': 'listing-1',
+            'status': 'confirmed',
+            'checkInDateLocalized': '2026-02-01',
+            'checkOutDateLocalized': '2026-02-04',
+            'guestsCount': guests,
+            'guest': {'fullName': 'Jane Guest', 'email': 'jane@example.com'},
+            'money': {'fareAccommodation': 300, 'totalPrice': 340},
+        }
+
+    def test_webhook_is_queued_not_applied(self):
+        """Test that a signed delivery is stored and acknowledged without touching bookings."""
+        from .models import GuestyWebhookEvent
+        response = self._post('reservation.created', self._reservation('res-1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'queued')
+        event = GuestyWebhookEvent.objects.get()
+        self.assertEqual((event.reservation_id, event.listing_id), ('res-1', 'listing-1'))
+        self.assertFalse(Booking.objects.exists())
+
+    def test_bad_signature_rejected(self):
+        """Test that an unsigned delivery is not stored."""
+        from .models import GuestyWebhookEvent
+        response = self.client.post(
+            reverse('guesty_webhook'), b'{"event": "reservation.created"}',
+            content_type='application/json', HTTP_X_GUESTY_SIGNATURE='bad'
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(GuestyWebhookEvent.objects.exists())
+
+    def test_events_collapse_per_reservation_in_order(self):
+        """Test that a burst for one reservation becomes one write using the last event."""
+        from unittest.mock import patch
+        from .guesty_integration import process_webhook_inbox
+        from .models import GuestyWebhookEvent
+        self._post('reservation.created', self._reservation('res-1', guests=1))
+        self._post('reservation.updated', self._reservation('res-1', guests=3))
+        self._post('reservation.created', self._reservation('res-2'))
+        self._post('reservation.canceled', {'_id': 'res-2', 'listingId': 'listing-1'})
+        self._post('calendar.updated', {'listingId': 'listing-1'})
+
+        with patch('yourapp.guesty_integration.invalidate_listing_cache') as invalidate:
+            summary = process_webhook_inbox()
+
+        self.assertEqual(summary['events'], 5)
+        invalidate.assert_called_once_with('listing-1')
+        self.assertEqual(Booking.objects.get(guesty_reservation_id='res-1').guests, 3)
+        self.assertEqual(Booking.objects.get(guesty_reservation_id='res-2').status, 'canceled')
+        self.assertFalse(GuestyWebhookEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_listing_updates_collapse_into_one_property_write(self):
+        """Test that listing.updated events are applied to the property, later payloads winning."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .guesty_integration import process_webhook_inbox
+        from .versioning import get_versions
+        version = get_versions(Property)
+        self._post('listing.updated', {'_id': 'listing-1', 'title': 'Renamed', 'prices': {'basePrice': 120}})
+        self._post('listing.updated', {'_id': 'listing-1', 'bedrooms': 3})
+        self._post('listing.updated', {'_id': 'listing-unknown', 'title': 'Not ours'})
+
+        with CaptureQueriesContext(connection) as queries:
+            summary = process_webhook_inbox()
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "yourapp_property"')]
+        self.assertEqual(len(writes), 1)
+
+        self.assertEqual((summary['events'], summary['properties'], summary['listings']), (3, 1, 2))
+        self.property.refresh_from_db()
+        self.assertEqual((self.property.title, self.property.beds), ('Renamed', 3))
+        self.assertEqual(self.property.price_from, Decimal('120.00'))
+        self.assertNotEqual(get_versions(Property), version)
+
+    def test_cancellation_after_create_in_later_batch(self):
+        """Test that a minimal cancellation payload cancels an existing booking."""
+        from .guesty_integration import process_webhook_inbox
+        self._post('reservation.created', self._reservation('res-1'))
+        process_webhook_inbox()
+        self._post('reservation.canceled', {'_id': 'res-1', 'listingId': 'listing-1'})
+        summary = process_webhook_inbox()
+        self.assertEqual(summary['canceled'], 1)
+        self.assertEqual(Booking.objects.get(guesty_reservation_id='res-1').status, 'canceled')
+
+    def test_direct_cancellation_handler_cancels_booking(self):
+        """Test that the synchronous handler cancels the local booking too."""
+        from unittest.mock import patch
+        from .guesty_integration import GuestyWebhookHandler, process_webhook_inbox
+        self._post('reservation.created', self._reservation('res-1'))
+        process_webhook_inbox()
+        with patch('yourapp.guesty_integration.invalidate_listing_cache') as invalidate:
+            GuestyWebhookHandler.process_webhook('reservation.canceled', {'_id': 'res-1', 'listingId': 'listing-1'})
+        invalidate.assert_called_once_with('listing-1')
+        booking = Booking.objects.get(guesty_reservation_id='res-1')
+        self.assertEqual((booking.status, booking.guest_name), ('canceled', 'Jane Guest'))
+
+    def test_partial_update_keeps_omitted_fields(self):
+        """Test that a reservation.updated delta only changes the fields it carries."""
+        from .guesty_integration import process_webhook_inbox
+        self._post('reservation.created', self._reservation('res-1'))
+        process_webhook_inbox()
+        self._post('reservation.updated', {'_id': 'res-1', 'guestsCount': 5})
+        summary = process_webhook_inbox()
+
+        self.assertEqual((summary['events'], summary['failed']), (1, 0))
+        booking = Booking.objects.get(guesty_reservation_id='res-1')
+        self.assertEqual(booking.guests, 5)
+        self.assertEqual((booking.guest_name, booking.guest_email), ('Jane Guest', 'jane@example.com'))
+        self.assertEqual((booking.status, booking.total_price), ('confirmed', Decimal('340.00')))
+        self.assertEqual((booking.nightly_rate, booking.check_in), (Decimal('100.00'), date(2026, 2, 1)))
+
+    def test_undatable_update_is_kept(self):
+        """Test that an update with missing or malformed dates stays in the inbox instead of being dropped."""
+        from .guesty_integration import process_webhook_inbox
+        from .models import GuestyWebhookEvent
+        self._post('reservation.updated', {'_id': 'res-new', 'listingId': 'listing-1', 'guestsCount': 2})
+        self._post('reservation.updated', dict(self._reservation('res-2'), checkInDateLocalized='2026-02-31'))
+        summary = process_webhook_inbox()
+
+        self.assertEqual((summary['events'], summary['failed']), (0, 2))
+        self.assertFalse(Booking.objects.exists())
+        for event in GuestyWebhookEvent.objects.all():
+            self.assertIsNone(event.processed_at)
+            self.assertEqual(event.attempts, 1)
+            self.assertTrue(event.error)
+
+    def test_bad_event_does_not_block_the_inbox(self):
+        """Test that a failing event is retried alone and parked while the events around it are applied."""
+        from .guesty_integration import process_webhook_inbox, WEBHOOK_MAX_ATTEMPTS
+        from .models import GuestyWebhookEvent
+        self._post('reservation.created', self._reservation('res-1'))
+        self._post('reservation.created', dict(self._reservation('res-bad'), guestsCount='many'))
+        self._post('reservation.created', self._reservation('res-2'))
+        update = dict(self._reservation('res-bad'), guest={'fullName': 'Later Guest'})
+        del update['guestsCount']
+        self._post('reservation.updated', update)
+
+        summary = process_webhook_inbox()
+        self.assertEqual((summary['events'], summary['failed'], summary['parked']), (2, 1, 0))
+        self.assertEqual(
+            set(Booking.objects.values_list('guesty_reservation_id', flat=True)), {'res-1', 'res-2'}
+        )
+        # The later update waits behind the failing event for its reservation
+        self.assertEqual(GuestyWebhookEvent.objects.filter(processed_at__isnull=True).count(), 2)
+
+        for _ in range(WEBHOOK_MAX_ATTEMPTS - 1):
+            summary = process_webhook_inbox()
+        bad = GuestyWebhookEvent.objects.get(reservation_id='res-bad', event_type='reservation.created')
+        self.assertEqual(bad.attempts, WEBHOOK_MAX_ATTEMPTS)
+        self.assertIsNotNone(bad.failed_at)
+        self.assertIsNone(bad.processed_at)
+
+        # Once it is parked, the reservation's later events go through
+        self.assertEqual((summary['parked'], summary['events']), (1, 1))
+        self.assertEqual(process_webhook_inbox()['events'], 0)
+        self.assertEqual(Booking.objects.get(guesty_reservation_id='res-bad').guest_name, 'Later Guest')
+
+
+class PricingTest(TestCase):
+    """Tests for the rate calendar and quote engine."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.property = Property.objects.create(
+            title='Priced Property',
+            short_description='Short description',
+            description='Full description',
+            price_from=Decimal('100.00'),
+            beds=2,
+            baths=1,
+            capacity=4,
+            cleaning_fee=Decimal('40.00'),
+            weekend_uplift_percent=Decimal('20'),
+            weekly_discount_percent=Decimal('10'),
+        )
+        # Next Monday, so the stay's weekdays are predictable
+        today = date.today()
+        self.monday = today + timedelta(days=7 - today.weekday())
+
+    def test_weekend_uplift_and_cleaning_fee(self):
+        """Test that Friday and Saturday nights carry the weekend uplift."""
+        from .pricing import get_quote
+        quote = get_quote(self.property, self.monday, self.monday + timedelta(days=6))
+        self.assertEqual(quote.nightly_rates, (10000, 10000, 10000, 10000, 12000, 12000))
+        self.assertEqual(quote.discount, 0)
+        self.assertEqual(quote.total, 64000 + 4000)
+
+    def test_weekly_discount(self):
+        """Test that 7+ night stays get the weekly discount off accommodation."""
+        from .pricing import get_quote
+        quote = get_quote(self.property, self.monday, self.monday + timedelta(days=7))
+        self.assertEqual(quote.accommodation, 74000)
+        self.assertEqual(quote.discount, 7400)
+        self.assertEqual(quote.total, 74000 - 7400 + 4000)
+
+    def test_overrides_apply_and_invalidate_cache(self):
+        """Test that saving an override changes the next quote."""
+        from .models import RateOverride
+        from .pricing import get_quote
+        stay = (self.monday, self.monday + timedelta(days=2))
+        self.assertEqual(get_quote(self.property, *stay).nightly_rates, (10000, 10000))
+
+        RateOverride.objects.create(
+            rate_property=self.property, start_date=self.monday, end_date=self.monday,
+            nightly_price=Decimal('150.00'),
+        )
+        RateOverride.objects.create(
+            rate_property=self.property, start_date=self.monday, end_date=self.monday + timedelta(days=1),
+            uplift_percent=Decimal('50'),
+        )
+        self.assertEqual(get_quote(self.property, *stay).nightly_rates, (22500, 15000))
+
+    def test_edits_within_a_second_reprice(self):
+        """Test that a second price edit in the same second is not served the first edit's quote."""
+        from unittest.mock import patch
+        from django.utils import timezone
+        from .pricing import get_quote
+        stay = (self.monday, self.monday + timedelta(days=1))
+        moment = timezone.now().replace(microsecond=1000)
+        for microsecond, price in ((1000, '110.00'), (2000, '120.00')):
+            self.property.price_from = Decimal(price)
+            with patch('django.utils.timezone.now', return_value=moment.replace(microsecond=microsecond)):
+                self.property.save()
+            self.assertEqual(get_quote(self.property, *stay).nightly_rates, (int(Decimal(price) * 100),))
+
+    def test_quote_outside_horizon(self):
+        """Test that stays beyond the cached calendar are still priced."""
+        from .pricing import get_quote, PRICING_HORIZON_DAYS
+        check_in = self.monday + timedelta(days=PRICING_HORIZON_DAYS + 7)
+        quote = get_quote(self.property, check_in, check_in + timedelta(days=1))
+        self.assertEqual(quote.nightly_rates, (10000,))
+
+    def test_booking_total_includes_discount(self):
+        """Test that Booking.calculate_total and accommodation_total use the discount."""
+        booking = Booking.objects.create(
+            booked_property=self.property,
+            guest_name='Guest',
+            guest_email='guest@example.com',
+            check_in=self.monday,
+            check_out=self.monday + timedelta(days=7),
+            nightly_rate=Decimal('100.00'),
+            cleaning_fee=Decimal('40.00'),
+            discount=Decimal('70.00'),
+        )
+        self.assertEqual(booking.total_price, Decimal('670.00'))
+        self.assertEqual(booking.accommodation_total, Decimal('700.00'))
+
+
+class BulkQuoteTest(TestCase):
+    """Tests for bulk quoting and date-aware property sorting."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.cheap_weekday = Property.objects.create(
+            title='Cheap Weekday', short_description='Short', description='Full',
+            price_from=Decimal('90.00'), beds=1, baths=1, capacity=2,
+            weekend_uplift_percent=Decimal('100'),
+        )
+        self.flat_rate = Property.objects.create(
+            title='Flat Rate', short_description='Short', description='Full',
+            price_from=Decimal('100.00'), beds=1, baths=1, capacity=2,
+            cleaning_fee=Decimal('25.00'),
+        )
+        today = date.today()
+        self.friday = today + timedelta(days=(4 - today.weekday()) % 7 or 7)
+
+    def test_quote_many_matches_single_quotes(self):
+        """Test that bulk quotes equal per-property quotes with bounded queries."""
+        from .pricing import get_quote, quote_many
+        properties = list(Property.objects.all())
+        stay = (self.friday, self.friday + timedelta(days=9))
+        with self.assertNumQueries(1):
+            quotes = quote_many(properties, *stay)
+        with self.assertNumQueries(0):
+            quote_many(properties, *stay)
+        for property_obj in properties:
+            self.assertEqual(quotes[property_obj.pk], get_quote(property_obj, *stay))
+
+    def test_properties_sorted_by_stay_total(self):
+        """Test that price sorting uses the stay total when dates are given."""
+        params = {
+            'check_in': self.friday.isoformat(),
+            'check_out': (self.friday + timedelta(days=2)).isoformat(),
+            'sort': 'price_asc',
+        }
+        response = self.client.get(reverse('properties'), params)
+        properties = list(response.context['properties'])
+        # Weekend: 2 x 180 = 360 vs 2 x 100 + 25 = 225
+        self.assertEqual([p.pk for p in properties], [self.flat_rate.pk, self.cheap_weekday.pk])
+        self.assertEqual(properties[0].stay_total, Decimal('225.00'))
+
+    def test_properties_sorted_by_nightly_price_without_dates(self):
+        """Test that price sorting falls back to price_from."""
+        response = self.client.get(reverse('properties'), {'sort': 'price_desc'})
+        properties = list(response.context['properties'])
+        self.assertEqual([p.pk for p in properties], [self.flat_rate.pk, self.cheap_weekday.pk])
+
+
+class DailyRollupTest(TestCase):
+    """Tests for incrementally maintained analytics rollups."""
+
+    def setUp(self):
+        self.property = Property.objects.create(
+            title='Rollup Property', short_description='Short', description='Full',
+            price_from=Decimal('100.00'), beds=1, baths=1, capacity=2,
+        )
+        self.check_in = date(2026, 4, 1)
+
+    def _booking(self, **kwargs):
+        values = {
+            'booked_property': self.property,
+            'guest_name': 'Guest',
+            'guest_email': 'guest@example.com',
+            'check_in': self.check_in,
+            'check_out': self.check_in + timedelta(days=3),
+            'status': 'confirmed',
+            'nightly_rate': Decimal('100.00'),
+            'cleaning_fee': Decimal('30.00'),
+            'total_price': Decimal('330.00'),
+        }
+        values.update(kwargs)
+        return Booking.objects.create(**values)
+
+    def _snapshot(self):
+        from .models import DailyRollup
+        return sorted(
+            DailyRollup.objects.values_list('day', 'source', 'status', 'nights', 'revenue', 'arrivals')
+        )
+
+    def test_create_update_delete_keep_rollups_in_step(self):
+        """Test that booking changes adjust rollups to match a full rebuild."""
+        from .analytics import rebuild_rollups
+        booking = self._booking()
+        self.assertEqual(len(self._snapshot()), 3)
+        self.assertEqual(self._snapshot()[0][3:], (1, Decimal('100.00'), 1))
+
+        booking.check_out = self.check_in + timedelta(days=2)
+        booking.total_price = Decimal('230.00')
+        booking.save()
+        incremental = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self._snapshot())
+        self.assertEqual(len(incremental), 2)
+
+        booking.delete()
+        self.assertEqual(self._snapshot(), [])
+
+    def test_performance_metrics(self):
+        """Test occupancy, ADR and RevPAR over a period."""
+        from .analytics import get_performance
+        Property.objects.create(
+            title='Empty Property', short_description='Short', description='Full',
+            price_from=Decimal('100.00'), beds=1, baths=1, capacity=2,
+        )
+        self._booking()
+        self._booking(status='canceled', guest_name='Canceled')
+
+        performance = get_performance(self.check_in, self.check_in + timedelta(days=4))
+        totals = performance['totals']
+        # 3 sold of 8 available nights, £300 room revenue
+        self.assertEqual(totals['nights'], 3)
+        self.assertEqual(totals['occupancy'], Decimal('37.5'))
+        self.assertEqual(totals['adr'], Decimal('100.00'))
+        self.assertEqual(totals['revpar'], Decimal('37.50'))
+        self.assertEqual(len(performance['days']), 4)
+
+    def test_guesty_upsert_refreshes_rollups(self):
+        """Test that bulk reservation upserts (no signals) still update rollups."""
+        from .guesty_integration import upsert_reservations
+        from .models import DailyRollup
+        self.property.guesty_listing_id = 'listing-1'
+        self.property.save()
+        upsert_reservations([{
+            '_id': 'res-1',
+            'listingId': 'listing-1',
+            'status': 'confirmed',
+            'checkInDateLocalized': '2026-04-01',
+            'checkOutDateLocalized': '2026-04-03',
+            'money': {'fareAccommodation': 200, 'totalPrice': 200},
+        }])
+        self.assertEqual(DailyRollup.objects.filter(status='confirmed').count(), 2)
+
+
+class StaffPanelQueryTest(TestCase):
+    """Tests for staff panel stats, keyset paging and query count."""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='staff', password='staffpass123', is_staff=True)
+        self.client.login(username='staff', password='staffpass123')
+
+    def _create_properties(self, count, start=0):
+        for i in range(start, start + count):
+            Property.objects.create(
+                title=f'Panel Property {i}', short_description='Short', description='Full',
+                price_from=Decimal('100.00'), beds=1, baths=1, capacity=2, is_featured=(i % 2 == 0),
+            )
+
+    def _count_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('staff_panel'))
+        self.assertEqual(response.status_code, 200)
+        # Stats aggregate, property page and two rollup reads (session/auth aside)
+        app_queries = [q['sql'] for q in queries if 'yourapp_' in q['sql']]
+        self.assertEqual(len(app_queries), 4, app_queries)
+        return len(queries)
+
+    def test_query_count_is_flat(self):
+        """Test that the panel issues the same number of queries as the portfolio grows."""
+        self._create_properties(3)
+        self._count_queries()  # Warm up session and cache
+        small = self._count_queries()
+        self._create_properties(60, start=3)
+        self.assertEqual(self._count_queries(), small)
+
+    def test_stats_and_keyset_pages(self):
+        """Test that stats cover all properties and pages walk forwards and back."""
+        from .views import STAFF_PANEL_PAGE_SIZE
+        self._create_properties(STAFF_PANEL_PAGE_SIZE + 5)
+
+        response = self.client.get(reverse('staff_panel'))
+        self.assertEqual(response.context['property_count'], STAFF_PANEL_PAGE_SIZE + 5)
+        self.assertEqual(response.context['featured_count'], (STAFF_PANEL_PAGE_SIZE + 6) // 2)
+        first = response.context['page']
+        self.assertEqual(len(first.items), STAFF_PANEL_PAGE_SIZE)
+        self.assertIsNone(first.prev_cursor)
+
+        second = self.client.get(reverse('staff_panel'), {'after': first.next_cursor}).context['page']
+        self.assertEqual(len(second.items), 5)
+        self.assertIsNone(second.next_cursor)
+        self.assertFalse({p.pk for p in first.items} & {p.pk for p in second.items})
+
+        back = self.client.get(reverse('staff_panel'), {'before': second.prev_cursor}).context['page']
+        self.assertEqual([p.pk for p in back.items], [p.pk for p in first.items])
+
+
+class BookingExportTest(TestCase):
+    """Tests for the streaming booking CSV export."""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='staff', password='staffpass123', is_staff=True)
+        User.objects.create_user(username='guest', password='guestpass123')
+        self.property = Property.objects.create(
+            title='Export Property', short_description='Short', description='Full',
+            price_from=Decimal('100.00'), beds=1, baths=1, capacity=2,
+        )
+        for i, status in enumerate(['confirmed', 'canceled', 'confirmed']):
+            Booking.objects.create(
+                booked_property=self.property, guest_name=f'Guest {i}', guest_email=f'g{i}@example.com',
+                check_in=date(2026, 3, 1) + timedelta(days=10 * i),
+                check_out=date(2026, 3, 3) + timedelta(days=10 * i),
+                status=status, nightly_rate=Decimal('100.00'), total_price=Decimal('200.00'),
+            )
+
+    def _rows(self, response):
+        import csv
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(content.splitlines()))
+
+    def test_staff_only(self):
+        """Test that non-staff users cannot export."""
+        self.client.login(username='guest', password='guestpass123')
+        response = self.client.get(reverse('export_bookings_csv'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_streams_filtered_rows(self):
+        """Test that the export streams a header plus the filtered bookings."""
+        self.client.login(username='staff', password='staffpass123')
+        response = self.client.get(reverse('export_bookings_csv'), {
+            'start': '2026-03-05', 'status': 'confirmed',
+        })
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = self._rows(response)
+        self.assertEqual(rows[0][0], 'Booking ID')
+        self.assertEqual([row[10] for row in rows[1:]], ['Guest 2'])
+
+    def test_invalid_filters_rejected(self):
+        """Test that bad dates and statuses return 400."""
+        self.client.login(username='staff', password='staffpass123')
+        self.assertEqual(self.client.get(reverse('export_bookings_csv'), {'start': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_bookings_csv'), {'status': 'bogus'}).status_code, 400)
+
+    def test_formula_cells_neutralised(self):
+        """Test that guest-supplied text cannot run as a spreadsheet formula."""
+        from .exports import iter_booking_rows
+        Booking.objects.filter(guest_name='Guest 0').update(guest_name='=HYPERLINK("x")')
+        rows = list(iter_booking_rows(Booking.objects.order_by('check_in')))
+        self.assertEqual(rows[1][10], '\'=HYPERLINK("x")')
+
+    def test_management_command(self):
+        """Test that export_bookings writes every booking to stdout."""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('export_bookings', '--status', 'confirmed', stdout=out)
+        self.assertEqual(len(out.getvalue().strip().splitlines()), 3)
+
+
+class BulkCatalogueTest(TestCase):
+    """Tests for bulk property import, repricing and homepage reordering."""
+
+    def setUp(self):
+        from .signals import catalogue_changed
+        self.client = Client()
+        User.objects.create_user(username='staff', password='staffpass123', is_staff=True)
+        self.client.login(username='staff', password='staffpass123')
+        self.events = []
+        self._receiver = lambda sender, **kwargs: self.events.append(kwargs)
+        catalogue_changed.connect(self._receiver)
+        self.addCleanup(catalogue_changed.disconnect, self._receiver)
+
+    def _create_property(self, title, area='City Centre', price='100.00', **kwargs):
+        return Property.objects.create(
+            title=title, short_description='Short', description='Full', area=area,
+            price_from=Decimal(price), beds=1, baths=1, capacity=2, **kwargs
+        )
+
+    def _upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('bulk_import_properties'), {
+                'file': SimpleUploadedFile(name, content.encode()),
+            })
+
+    def test_csv_import_creates_all_rows_with_one_event(self):
+        """Test that a CSV import bulk creates properties with unique slugs."""
+        self._create_property('Kelham Loft')
+        content = (
+            'title,short_description,description,area,price_from,beds,baths,capacity\n'
+            'Kelham Loft,Short,Full,Kelham Island,120,2,1,4\n'
+            'Kelham Loft,Short,Full,Kelham Island,130,2,1,4\n'
+        )
+        response = self._upload('properties.csv', content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        slugs = set(Property.objects.filter(area='Kelham Island').values_list('slug', flat=True))
+        self.assertEqual(slugs, {'kelham-loft-2', 'kelham-loft-3'})
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0]['action'], 'import')
+        self.assertEqual(sorted(self.events[0]['property_ids']), sorted(response.json()['ids']))
+
+    def test_invalid_json_row_rejects_whole_import(self):
+        """Test that one bad row means nothing is created."""
+        import json
+        rows = [
+            {'title': 'Good Flat', 'short_description': 'S', 'description': 'D',
+             'price_from': '90', 'beds': 1, 'baths': 1, 'capacity': 2},
+            {'title': 'Bad Flat', 'short_description': '<script>x</script>', 'description': 'D',
+             'price_from': '90', 'beds': 1, 'baths': 1, 'capacity': 2},
+        ]
+        response = self._upload('properties.json', json.dumps(rows))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('2', response.json()['errors'])
+        self.assertEqual(Property.objects.count(), 0)
+        self.assertEqual(self.events, [])
+
+    def test_price_update_by_area(self):
+        """Test that prices change by percentage only in the chosen area."""
+        centre = self._create_property('Centre Flat', price='100.00')
+        other = self._create_property('Crookes House', area='Crookes', price='100.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('bulk_update_prices'), {'percent': '12.5', 'area': 'city centre'})
+        self.assertEqual(response.json()['updated'], 1)
+        centre.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(centre.price_from, Decimal('112.50'))
+        self.assertEqual(other.price_from, Decimal('100.00'))
+        self.assertEqual([e['action'] for e in self.events], ['price'])
+
+        response = self.client.post(reverse('bulk_update_prices'), {'percent': '900', 'area': 'Crookes'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reorder_homepage(self):
+        """Test that reordering sets the homepage list in one event."""
+        a = self._create_property('Flat A', show_on_homepage=True, homepage_order=1)
+        b = self._create_property('Flat B')
+        c = self._create_property('Flat C')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('bulk_reorder_homepage'), {'ids': [c.pk, b.pk]})
+        self.assertEqual(response.json()['updated'], 3)
+        shown = list(
+            Property.objects.filter(show_on_homepage=True).order_by('homepage_order').values_list('pk', flat=True)
+        )
+        self.assertEqual(shown, [c.pk, b.pk])
+        self.assertEqual(len(self.events), 1)
+
+        response = self.client.post(reverse('bulk_reorder_homepage'), {'ids': [a.pk, 99999]})
+        self.assertEqual(response.status_code, 400)
+
+
+class QueuedLogHandlerTest(TestCase):
+    """Tests for the queue-backed log file handler."""
+
+    def _handler(self, queue_size=100, **kwargs):
+        import logging
+        import tempfile
+        from .log_handlers import QueuedFileHandler
+        path = tempfile.mkdtemp()
+        handler = QueuedFileHandler(f'{path}/test.log', queue_size=queue_size, **kwargs)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def _record(self, level, message):
+        import logging
+        return logging.makeLogRecord({'levelno': level, 'levelname': logging.getLevelName(level), 'msg': message})
+
+    def test_records_written_off_thread_and_reopened_after_logrotate(self):
+        """Test that records reach the file via the listener, which follows an external rotation."""
+        import logging
+        import os
+        handler = self._handler()
+        handler.handle(self._record(logging.WARNING, 'before rotation'))
+        handler.queue.join()  # wait for the writer thread
+        os.rename(handler.filename, handler.filename + '.1')
+        handler.handle(self._record(logging.WARNING, 'after rotation'))
+        handler.close()
+        with open(handler.filename + '.1') as f:
+            self.assertEqual(f.read(), 'WARNING before rotation\n')
+        with open(handler.filename) as f:
+            self.assertEqual(f.read(), 'WARNING after rotation\n')
+
+    def test_opt_in_size_rotation(self):
+        """Test that max_bytes switches the writer to size-based rotation."""
+        import logging
+        import os
+        handler = self._handler(max_bytes=1024, backup_count=2)
+        for i in range(50):
+            handler.handle(self._record(logging.WARNING, f'suspicious request {i:03d}'))
+        handler.close()
+        with open(handler.filename) as f:
+            self.assertIn('WARNING suspicious request 049', f.read())
+        self.assertTrue(os.path.exists(handler.filename + '.1'))
+
+    def test_overload_samples_then_drops_without_blocking(self):
+        """Test that a full queue drops records and later logs a summary."""
+        import logging
+        handler = self._handler(queue_size=10)
+        handler._ensure_listener = lambda: None  # No writer: the queue only fills
+        for i in range(100):
+            handler.handle(self._record(logging.WARNING, f'flood {i}'))
+        self.assertEqual(handler.queue.qsize(), 10)
+        self.assertGreater(handler.sampled_out, 0)
+        self.assertGreater(handler.dropped, 0)
+
+        # Errors are never sampled; once there is room the drop count is reported
+        dropped = handler.dropped
+        while not handler.queue.empty():
+            handler.queue.get_nowait()
+        handler.handle(self._record(logging.ERROR, 'payment failure'))
+        messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+        self.assertEqual(messages[0], 'ERROR payment failure')
+        self.assertIn(f'dropped {dropped} records', messages[1])
+        self.assertEqual(handler.dropped, 0)
+
+
+class TelemetryTest(TestCase):
+    """Tests for request telemetry, Server-Timing and /staff/metrics."""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='staff', password='staffpass123', is_staff=True)
+        Property.objects.create(
+            title='Metrics Flat', short_description='Short', description='Full',
+            price_from=Decimal('100.00'), beds=1, baths=1, capacity=2,
+        )
+
+    def test_server_timing_breakdown(self):
+        """Test that responses carry DB, cache and template timings."""
+        response = self.client.get(reverse('properties'))
+        header = response['Server-Timing']
+        for component in ('db;dur=', 'template;dur=', 'total;dur='):
+            self.assertIn(component, header)
+
+    @override_settings(TELEMETRY_SERVER_TIMING='staff')
+    def test_server_timing_staff_only(self):
+        """Test that 'staff' mode hides timings from other visitors."""
+        self.assertFalse(self.client.get(reverse('homepage')).has_header('Server-Timing'))
+        self.client.login(username='staff', password='staffpass123')
+        self.assertTrue(self.client.get(reverse('homepage')).has_header('Server-Timing'))
+
+    def test_timed_records_component(self):
+        """Test that timed() adds to the current request's breakdown."""
+        from .telemetry import _breakdown, timed
+
+        @timed('pdf')
+        def render():
+            return 'ok'
+
+        token = _breakdown.set({})
+        try:
+            render()
+            with timed('stripe'):
+                pass
+            self.assertEqual({name: calls for name, (_, calls) in _breakdown.get().items()}, {'pdf': 1, 'stripe': 1})
+        finally:
+            _breakdown.reset(token)
+
+    @override_settings(TELEMETRY_METRICS_TOKEN='scrape-token')
+    def test_metrics_endpoint(self):
+        """Test that metrics are staff or token only and in Prometheus format."""
+        self.client.get(reverse('properties'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE safeletstays_request_duration_seconds histogram', body)
+        self.assertIn('safeletstays_request_duration_seconds_count{view="properties"}', body)
+        self.assertIn('safeletstays_component_calls_total{view="properties",component="db"}', body)
+
+        self.client.login(username='staff', password='staffpass123')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class SyntheticDataTest(TestCase):
+    """Tests for the synthetic data generator."""
+
+    def _generate(self):
+        from .synthetic import generate
+        return generate(properties=20, bookings=600, users=30, searches=40, years=1.0, seed=7)
+
+    def test_counts_and_non_overlapping_stays(self):
+        """Test that every row is created and stays never overlap per property."""
+        counts = self._generate()
+        self.assertEqual(counts, {'properties': 20, 'users': 30, 'profiles': 30, 'bookings': 600, 'searches': 40})
+        self.assertEqual(Booking.objects.count(), 600)
+        self.assertEqual(Profile.objects.filter(user__username__startswith='synthetic-user-').count(), 30)
+
+        stays = {}
+        for property_id, check_in, check_out in Booking.objects.order_by('check_in').values_list(
+                'booked_property_id', 'check_in', 'check_out'):
+            self.assertGreaterEqual(check_in, stays.get(property_id, check_in))
+            stays[property_id] = check_out
+        today = date.today()
+        self.assertFalse(Booking.objects.filter(check_out__lte=today, status='confirmed').exists())
+
+    def test_deterministic_and_refuses_to_rerun(self):
+        """Test that the same seed gives the same data and a second run is refused."""
+        self._generate()
+        first = list(Booking.objects.order_by('id').values_list('check_in', 'total_price'))
+        with self.assertRaises(ValueError):
+            self._generate()
+        Booking.objects.all().delete()
+        Property.objects.all().delete()
+        User.objects.all().delete()
+        self._generate()
+        self.assertEqual(list(Booking.objects.order_by('id').values_list('check_in', 'total_price')), first)
+
+
+@override_settings(STRIPE_SECRET_KEY='sk_test_webhook', STRIPE_WEBHOOK_SECRET='whsec_test')
+class StripeWebhookTest(TestCase):
+    """Tests for the Stripe checkout.session.completed webhook."""
+
+    def setUp(self):
+        self.property = Property.objects.create(
+            title='Webhook Flat', slug='webhook-flat', short_description='Flat', description='Flat',
+            price_from=Decimal('80.00'), beds=1, baths=1, capacity=2,
+        )
+        self.booking = Booking.objects.create(
+            booked_property=self.property, guest_name='Pat', guest_email='pat@example.com',
+            check_in=date.today() + timedelta(days=10), check_out=date.today() + timedelta(days=12),
+            total_price=Decimal('160.00'), status='awaiting_payment', stripe_session_id='cs_test_1',
+        )
+
+    def _post(self, event):
+        import hmac
+        import json
+        import time
+        from hashlib import sha256
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(b'whsec_test', f'{timestamp}.{payload}'.encode(), sha256).hexdigest()
+        return self.client.post(
+            reverse('stripe_webhook'), payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=f't={timestamp},v1={signature}',
+        )
+
+    def test_completed_session_confirms_booking(self):
+        """Test that a signed completed session confirms the booking and queues one receipt."""
+        from .models import OutboundEmail
+        event = {
+            'id': 'evt_1', 'object': 'event', 'type': 'checkout.session.completed',
+            'data': {'object': {'id': 'cs_test_1', 'object': 'checkout.session',
+                                'client_reference_id': str(self.booking.id)}},
+        }
+        self.assertEqual(self._post(event).status_code, 200)
+        self.assertEqual(self._post(event).status_code, 200)  # Stripe retries deliveries
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'confirmed')
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.booking, email.template, email.status), (self.booking, 'receipt', 'pending'))
+
+    def test_session_mismatch_rejected(self):
+        """Test that a session id not matching the booking is refused."""
+        event = {
+            'id': 'evt_2', 'object': 'event', 'type': 'checkout.session.completed',
+            'data': {'object': {'id': 'cs_other', 'object': 'checkout.session',
+                                'client_reference_id': str(self.booking.id)}},
+        }
+        self.assertEqual(self._post(event).status_code, 400)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'awaiting_payment')
+
+
+@override_settings(STRIPE_SECRET_KEY='sk_test_checkout')
+class AsyncCheckoutTest(TestCase):
+    """Tests for the async Stripe checkout view."""
+
+    def setUp(self):
+        self.property = Property.objects.create(
+            title='Checkout Flat', slug='checkout-flat', short_description='Flat', description='Flat',
+            price_from=Decimal('90.00'), beds=1, baths=1, capacity=2,
+        )
+        self.user = User.objects.create_user(username='payer', email='payer@example.com', password='payerpass123')
+        self.client.login(username='payer', password='payerpass123')
+        check_in = date.today() + timedelta(days=20)
+        self.data = {
+            'checkin': check_in.isoformat(), 'checkout': (check_in + timedelta(days=2)).isoformat(), 'guests': 2,
+        }
+        self.url = reverse('create_checkout_session', args=[self.property.pk])
+
+    def test_redirects_to_stripe_and_links_session(self):
+        """Test that the booking is created for the user and linked to the Stripe session."""
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, patch
+        session = SimpleNamespace(id='cs_test_async', url='https://checkout.stripe.com/c/pay/cs_test_async')
+        with patch('yourapp.payments.create_checkout_session', AsyncMock(return_value=session)) as create:
+            response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], session.url)
+        booking = Booking.objects.get()
+        self.assertEqual((booking.user, booking.stripe_session_id, booking.status),
+                         (self.user, 'cs_test_async', 'awaiting_payment'))
+        self.assertEqual(create.call_args.kwargs['client_reference_id'], str(booking.id))
+        self.assertEqual(create.call_args.kwargs['customer_email'], 'payer@example.com')
+
+    def test_stripe_failure_discards_booking(self):
+        """Test that a Stripe error returns 500 and leaves no pending booking."""
+        import stripe
+        from unittest.mock import AsyncMock, patch
+        failure = AsyncMock(side_effect=stripe.error.APIConnectionError('unreachable'))
+        with patch('yourapp.payments.create_checkout_session', failure):
+            response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Booking.objects.exists())
+
+
+class MailTransportTest(TestCase):
+    """Tests for the pooled, batching Mailjet transport."""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from benchmarks.stubs import MailjetStub
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.stub = MailjetStub()
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+        overrides = override_settings(
+            MEDIA_ROOT=media, MAILJET_API_KEY='key', MAILJET_API_SECRET='secret', MAILJET_API_URL=self.stub.url + '/',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.property = Property.objects.create(
+            title='Mail Flat', slug='mail-flat', short_description='Flat', description='Flat',
+            price_from=Decimal('90.00'), beds=1, baths=1, capacity=2,
+        )
+
+    def _bookings(self, count):
+        return [Booking.objects.create(
+            booked_property=self.property, guest_name=f'Guest {i}', guest_email=f'guest{i}@example.com',
+            check_in=date.today() + timedelta(days=10 + 3 * i), check_out=date.today() + timedelta(days=12 + 3 * i),
+            total_price=Decimal('180.00'), status='confirmed',
+        ) for i in range(count)]
+
+    def test_receipts_are_batched(self):
+        """Test that receipts share API calls, MAILJET_BATCH_SIZE messages at a time."""
+        from unittest.mock import patch
+        from .utils import send_receipt_emails
+        with patch('yourapp.mail.MAILJET_BATCH_SIZE', 2):
+            results = send_receipt_emails(self._bookings(3))
+        self.assertEqual(len(results), 3)
+        self.assertEqual((self.stub.requests, self.stub.messages), (2, 3))
+
+    def test_transport_is_reused(self):
+        """Test that the transport, and so its connection pool, is shared between sends."""
+        from .mail import get_transport
+        from .utils import send_receipt_email
+        transport = get_transport()
+        booking, = self._bookings(1)
+        send_receipt_email(booking)
+        send_receipt_email(booking)
+        self.assertIs(get_transport(), transport)
+        self.assertEqual(self.stub.messages, 2)
+
+    def test_outbox_delivers_in_rate_limited_batches(self):
+        """Test that queued emails are deduplicated and sent in batches no larger than the rate."""
+        from unittest.mock import patch
+        from .mail import deliver_outbox, enqueue_email
+        from .models import OutboundEmail
+        bookings = self._bookings(3)
+        for booking in bookings:
+            self.assertTrue(enqueue_email(booking, 'receipt'))
+        self.assertFalse(enqueue_email(bookings[0], 'receipt'))
+        with patch('yourapp.mail.time.sleep') as sleep:
+            summary = deliver_outbox(rate=2)
+        self.assertEqual(summary, {'sent': 3, 'retrying': 0, 'failed': 0})
+        self.assertEqual((self.stub.requests, self.stub.messages), (2, 3))
+        self.assertTrue(sleep.called)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(deliver_outbox(rate=0), {'sent': 0, 'retrying': 0, 'failed': 0})
+
+    def test_overlapping_workers_do_not_resend(self):
+        """Test that a worker starting while another is sending skips the batch it has claimed."""
+        from unittest.mock import patch
+        from .mail import MailjetTransport, deliver_outbox, enqueue_email
+        from .models import OutboundEmail
+        for booking in self._bookings(2):
+            enqueue_email(booking, 'receipt')
+        send = MailjetTransport.send
+        overlapping = []
+
+        def send_while_another_worker_runs(transport, messages):
+            overlapping.append(deliver_outbox(rate=0))
+            return send(transport, messages)
+
+        with patch.object(MailjetTransport, 'send', autospec=True, side_effect=send_while_another_worker_runs):
+            summary = deliver_outbox(rate=0)
+        self.assertEqual(summary['sent'], 2)
+        self.assertEqual(overlapping, [{'sent': 0, 'retrying': 0, 'failed': 0}])
+        self.assertEqual(self.stub.messages, 2)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    def test_outbox_retries_with_backoff(self):
+        """Test that a failed send is rescheduled with growing delays, then given up."""
+        from unittest.mock import patch
+        from django.utils import timezone
+        from .mail import MAIL_MAX_ATTEMPTS, deliver_outbox, enqueue_email
+        from .models import OutboundEmail
+        booking, = self._bookings(1)
+        enqueue_email(booking, 'receipt')
+        delays = []
+        with patch('yourapp.mail.MailjetTransport.send', side_effect=ConnectionError('unreachable')):
+            for attempt in range(MAIL_MAX_ATTEMPTS):
+                deliver_outbox(rate=0)
+                email = OutboundEmail.objects.get()
+                delays.append(email.next_attempt_at - timezone.now())
+                OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual((email.status, email.attempts), ('failed', MAIL_MAX_ATTEMPTS))
+        self.assertIn('unreachable', email.error)
+        self.assertLess(delays[0], delays[1])
+        self.assertEqual(self.stub.messages, 0)
+
+
+class ReceiptAttachmentTest(TestCase):
+    """Tests for building the receipt attachment without storage round trips."""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=media)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        prop = Property.objects.create(
+            title='Receipt Flat', slug='receipt-flat', short_description='Flat', description='Flat',
+            price_from=Decimal('90.00'), beds=1, baths=1, capacity=2,
+        )
+        self.booking = Booking.objects.create(
+            booked_property=prop, guest_name='Robin', guest_email='robin@example.com',
+            check_in=date.today() + timedelta(days=5), check_out=date.today() + timedelta(days=8),
+            total_price=Decimal('270.00'), status='confirmed',
+        )
+
+    def test_new_receipt_is_not_read_back(self):
+        """Test that a freshly generated PDF is attached from memory, matching what was stored."""
+        import base64
+        from unittest.mock import patch
+        from django.db.models.fields.files import FieldFile
+        from .utils import build_receipt_message
+        with patch.object(FieldFile, 'open', autospec=True, side_effect=AssertionError('read back')):
+            message = build_receipt_message(self.booking)
+        attached = base64.b64decode(message['Attachments'][0]['Base64Content'])
+        self.assertTrue(attached.startswith(b'%PDF'))
+        with self.booking.receipt_pdf.open('rb') as f:
+            self.assertEqual(f.read(), attached)
+        # An existing receipt is read from storage instead
+        self.assertEqual(build_receipt_message(self.booking)['Attachments'][0]['Base64Content'],
+                         message['Attachments'][0]['Base64Content'])
+
+    def test_receipt_template_is_built_once(self):
+        """Test that receipts replay the process-wide template's forms without laying them out again."""
+        from unittest.mock import Mock, patch
+        from .receipts import ReceiptTemplate, get_template, render_receipt
+        first = render_receipt(self.booking)
+        template = get_template()
+        laid_out = AssertionError('laid out again')
+        with patch.multiple(ReceiptTemplate, draw=Mock(side_effect=laid_out), draw_footer=Mock(side_effect=laid_out)):
+            second = render_receipt(self.booking)
+        self.assertIs(get_template(), template)
+        for pdf in (first, second):
+            self.assertTrue(pdf.startswith(b'%PDF'))
+            self.assertIn(b'/FormXob.receiptStatic', pdf)
+            self.assertIn(b'/FormXob.receiptFooter', pdf)
+            self.assertIn(b'/Subtype /Image', pdf)
+
+    def test_long_receipt_continues_on_new_pages(self):
+        """Test that content which would run into the footer is moved onto further pages."""
+        import re
+        from unittest.mock import patch
+        from reportlab.pdfgen.canvas import Canvas
+        from .receipts import CONTENT_BOTTOM, FOOTER_LINES, render_receipt
+        self.booking.is_company_booking = True
+        self.booking.company_name = 'Acme Relocations Ltd'
+        self.booking.company_address = '\n'.join(f'Address line {i}' for i in range(40))
+        self.booking.booked_property.title = 'Riverside Apartment ' * 30
+
+        drawn = []
+        original = Canvas.drawString
+
+        def record(canvas, x, y, text, *args, **kwargs):
+            drawn.append((canvas.getPageNumber(), y, text))
+            return original(canvas, x, y, text, *args, **kwargs)
+
+        with patch.object(Canvas, 'drawString', autospec=True, side_effect=record):
+            pdf = render_receipt(self.booking)
+        self.assertGreaterEqual(len(re.findall(rb'/Type /Page\b(?!s)', pdf)), 2)
+        self.assertIn(b'/FormXob.receiptFooter', pdf)
+        body = [(page, y, text) for page, y, text in drawn if text not in FOOTER_LINES]
+        self.assertTrue(all(y >= CONTENT_BOTTOM for _, y, _ in body))
+        self.assertIn((2, 'Address line 39'), {(page, text) for page, _, text in body})
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_receipt_page_revalidates(self):
+        """Test that the receipt page is generated off-request, cached and answered with 304 when unchanged."""
+        from django.contrib.auth.models import User
+        user = User.objects.create_user('robin', 'robin@example.com', 'pw-123456')
+        self.booking.user = user
+        self.booking.save()
+        self.client.force_login(user)
+        url = reverse('booking_receipt', args=[self.booking.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.receipt_pdf)
+
+        # Generating the PDF changed the booking, so the old validator is stale
+        stale = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=stale)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], stale)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
@@ -19,6 +19,7 @@ from .security import (
     InputValidator, 
     FileUploadValidator, 
     RateLimiter,
+    rate_limit,
     get_client_ip,
 )
 
@@ -465,6 +466,23 @@ class RateLimiterTests(TestCase):
         is_allowed, info = limiter.is_allowed('test-user-block')
         self.assertFalse(is_allowed)
         self.assertTrue(info['retry_after'] > 0)
+    
+    def test_async_views_are_limited(self):
+        """Test that rate_limit wraps async views with an async wrapper."""
+        import asyncio
+        from asgiref.sync import async_to_sync, iscoroutinefunction
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        
+        @rate_limit(key='test-async', max_requests=2, window=60)
+        async def view(request):
+            await asyncio.sleep(0)
+            return HttpResponse('ok')
+        
+        self.assertTrue(iscoroutinefunction(view))
+        request = RequestFactory().get('/', REMOTE_ADDR='10.9.8.7')
+        statuses = [async_to_sync(view)(request).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
 
 
 # =============================================================================
@@ -0,0 +1,176 @@
+"""
+Cache Versioning for Safe Let Stays
+Generation counters kept in the cache, so anything cached or validated in
+front of the catalogue can tell whether it is stale without a query.
+
+Every tracked model has a counter, bumped whenever one of its rows is saved
+or deleted, plus a global counter bumped with each of them. Writes that skip
+model signals (bulk_create/bulk_update, queryset update()) call bump()
+themselves; catalogue operations are covered through catalogue_changed.
+Counters can also be scoped to a single owner by name, as each visitor's
+recent searches are.
+
+Like the pricing calendar versions, counters are seeded from the clock, so
+one that is evicted never restarts below a value still embedded in a key.
+Inside a transaction the bump happens at once and again on commit, so
+nothing cached from the old rows while it was open survives.
+
+Usage:
+    key = cache_key('similar', property_obj.pk, models=[Property])
+    etag = make_etag('page:home', request.user.pk, models=[Property, Destination])
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, Tuple, Union
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import quote_etag
+
+logger = logging.getLogger(__name__)
+
+# Counter and last-change time for a model label or scoped name
+VERSION_KEY = "version:{name}"
+CHANGED_KEY = "version:{name}:changed"
+
+# Bumped along with every other counter
+GLOBAL = 'all'
+
+# Longer keys are hashed (memcached's limit is 250 bytes)
+MAX_KEY_LENGTH = 200
+
+Model = Union[type, str]
+
+
+def _name(model: Model) -> str:
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def _seed() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def get_versions(*models: Model) -> Tuple[int, ...]:
+    """
+    Current generation of each model (or scoped name), in one cache round trip.
+
+    Args:
+        *models: Model classes or counter names (default: the global counter)
+
+    Returns:
+        One version per model, in the order given
+    """
+    names = [_name(model) for model in models] or [GLOBAL]
+    keys = [VERSION_KEY.format(name=name) for name in names]
+    found = cache.get_many(keys)
+    return tuple(
+        found[key] if key in found else cache.get_or_set(key, _seed(), timeout=None)
+        for key in keys
+    )
+
+
+def last_changed(*models: Model) -> datetime:
+    """
+    When any of the models last changed (now, if that is no longer known).
+
+    Args:
+        *models: Model classes or counter names (default: the global counter)
+    """
+    names = [_name(model) for model in models] or [GLOBAL]
+    keys = [CHANGED_KEY.format(name=name) for name in names]
+    found = cache.get_many(keys)
+    latest = max(
+        found[key] if key in found else cache.get_or_set(key, time.time(), timeout=None)
+        for key in keys
+    )
+    return datetime.fromtimestamp(latest, tz=dt_timezone.utc)
+
+
+def _bump(names: Iterable[str]) -> None:
+    now = time.time()
+    for name in names:
+        key = VERSION_KEY.format(name=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, _seed(), timeout=None):
+                cache.incr(key)
+    cache.set_many({CHANGED_KEY.format(name=name): now for name in names}, timeout=None)
+
+
+def bump(*models: Model) -> None:
+    """
+    Orphan everything keyed on these models' versions (and the global one).
+
+    Call after writes that bypass model signals. Inside a transaction the
+    counters are bumped again once it commits.
+    """
+    names = list(dict.fromkeys([_name(model) for model in models] + [GLOBAL]))
+    _bump(names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def cache_key(namespace: str, *parts, models: Iterable[Model] = None) -> str:
+    """
+    Cache key for `parts` under `namespace` that changes with the models.
+
+    Args:
+        namespace: Key prefix, e.g. 'page:home'
+        *parts: Whatever else identifies the entry (ids, user, date, ...)
+        models: Model classes or counter names the entry is built from
+            (default: the global counter)
+
+    Returns:
+        e.g. 'page:home:7:v1712345678901.1712345679005'
+    """
+    versions = '.'.join(str(version) for version in get_versions(*(models or ())))
+    key = ':'.join([namespace, *(str(part) for part in parts), f"v{versions}"])
+    if len(key) > MAX_KEY_LENGTH or any(c.isspace() for c in key):
+        key = f"{namespace}:{hashlib.md5(key.encode()).hexdigest()}"
+    return key
+
+
+def make_etag(namespace: str, *parts, models: Iterable[Model] = None) -> str:
+    """Quoted ETag for the same inputs as cache_key()."""
+    key = cache_key(namespace, *parts, models=models)
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+# =============================================================================
+# RECEIVERS
+# =============================================================================
+
+def searches_name(user_id: int = None, session_key: str = None) -> str:
+    """Counter name for one visitor's recent searches."""
+    return f"searches:user:{user_id}" if user_id else f"searches:session:{session_key}"
+
+
+def _model_changed(sender, **kwargs):
+    bump(sender)
+
+
+def _searches_changed(sender, instance, **kwargs):
+    bump(searches_name(instance.user_id, instance.session_key))
+
+
+def _catalogue_changed(sender, property_ids, action, **kwargs):
+    bump(sender)
+    logger.debug(f"Catalogue {action}: bumped versions for {len(property_ids)} properties")
+
+
+def install() -> None:
+    """Bump versions on tracked model writes (called from AppConfig.ready)."""
+    from .models import Booking, Destination, Property, RateOverride, RecentSearch
+    from .signals import catalogue_changed
+
+    for model in (Property, Destination, Booking, RateOverride):
+        for signal in (post_save, post_delete):
+            signal.connect(_model_changed, sender=model, dispatch_uid=f'versioning_{model._meta.model_name}')
+    for signal in (post_save, post_delete):
+        signal.connect(_searches_changed, sender=RecentSearch, dispatch_uid='versioning_searches')
+    catalogue_changed.connect(_catalogue_changed, dispatch_uid='versioning_catalogue')
@@ -1,26 +1,42 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.forms import AuthenticationForm
 from django.db.models import Q
-from django.db import transaction
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods, require_POST
+from django.views.decorators.http import require_http_methods, require_GET, require_POST
 from django.core.exceptions import PermissionDenied
 from django.core.signing import Signer, BadSignature
 from django.utils.html import escape
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.core.cache import cache
+from django.template.loader import render_to_string
 import stripe
 import logging
+from asgiref.sync import sync_to_async
 import json
-from datetime import datetime
-from .models import Property, Booking, Destination, RecentSearch
+from datetime import datetime, timedelta
+from .models import Property, Booking, Destination, Profile, RecentSearch, RateOverride
 from .forms import PropertyForm, CheckoutForm, BookingSearchForm
-from .utils import generate_receipt_pdf, send_receipt_email
+from .utils import generate_receipt_in_background
+from .mail import enqueue_email, aenqueue_email
 from .security import rate_limit, get_client_ip, InputValidator, SecurityLogger
+from .guesty_integration import GuestyWebhookHandler, enqueue_webhook
+from .pricing import get_quote, quote_many, from_pence
+from .analytics import get_performance, ANALYTICS_DEFAULT_DAYS
+from .pagination import keyset_paginate
+from .catalogue import CatalogueError, parse_import_file, import_properties, adjust_prices, reorder_homepage
+from .telemetry import timed, collect, render_prometheus, metrics_token_authorized
+from .exports import booking_export_queryset, iter_booking_rows, iter_csv_lines, parse_export_filters, export_filename
+from .availability import (
+    aget_booked_ranges, serialize_availability, MAX_BATCH_PROPERTIES, MAX_RANGE_NIGHTS
+)
+from . import payments, versioning
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +45,22 @@ HOMEPAGE_TOP_PROPERTIES_COUNT = 3
 SIMILAR_PROPERTIES_COUNT = 3
 RECENT_SEARCHES_COUNT = 3
 
+# Staff panel property table page size
+STAFF_PANEL_PAGE_SIZE = 25
+
+# Staff panel analytics periods (days)
+STAFF_ANALYTICS_PERIODS = ('7', '30', '90', '365')
+
+# Property list sort options (ordering used when no stay dates are given)
+PROPERTY_SORTS = {
+    'price_asc': 'price_from',
+    'price_desc': '-price_from',
+}
+
+# Rendered receipt pages, keyed on the page's ETag
+RECEIPT_HTML_CACHE_KEY = "receipt:html:{etag}"
+RECEIPT_HTML_CACHE_TTL = 3600  # 1 hour
+
 # Signer for secure URL tokens
 booking_signer = Signer(salt='booking-payment')
 
@@ -50,8 +82,54 @@ def get_common_context():
         'business_address': getattr(settings, 'BUSINESS_ADDRESS', '123 Sheffield Street, Sheffield, S1 1AA'),
     }
 
+def conditional_page(request, namespace, *parts, models, last_modified=None):
+    """
+    Validators for a page built from `models` (and `parts`) for this viewer, today.
+    
+    The ETag embeds the models' cached versions (see versioning.py), so no
+    query is needed to check it. The navbar makes the page per user and
+    dates are rendered relative to today, so both go into the ETag too (the
+    CSRF secret only rotates on login, which changes the user).
+    
+    Args:
+        request: The current request
+        namespace: Page name, e.g. 'page:home'
+        *parts: Anything else the page depends on (ids, path, ...)
+        models: Models or version names the page is built from
+        last_modified: Latest change to data not covered by `models`
+    
+    Returns:
+        (response, etag, last_modified): response is a 304/412 when the
+        client's copy is current, else None and the view renders as usual
+    """
+    today = timezone.localdate()
+    etag = versioning.make_etag(namespace, *parts, request.user.pk, today.isoformat(), models=models)
+    start_of_day = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    changed = [versioning.last_changed(*models), start_of_day, last_modified]
+    last_modified = int(max(filter(None, changed)).timestamp())
+    return get_conditional_response(request, etag=etag, last_modified=last_modified), etag, last_modified
+
+def set_page_validators(request, response, etag, last_modified):
+    """Send conditional_page()'s validators; caches must revalidate each use."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
 def homepage(request):
     """Render the homepage with database context data."""
+    # Catalogue plus this visitor's recent searches decide the page
+    models = [Property, Destination]
+    if request.user.is_authenticated or request.session.session_key:
+        models.append(versioning.searches_name(request.user.pk, request.session.session_key))
+    response, etag, last_modified = conditional_page(request, 'page:home', models=models)
+    if response is not None:
+        return set_page_validators(request, response, etag, last_modified)
+    
     context = get_common_context()
     
     # Optimized query: Get all needed properties in fewer queries
@@ -98,7 +176,7 @@ def homepage(request):
         })
     context['recent_searches_json'] = json.dumps(recent_list)
     
-    return render(request, 'homepage.html', context)
+    return set_page_validators(request, render(request, 'homepage.html', context), etag, last_modified)
 
 def properties_view(request):
     context = get_common_context()
@@ -176,6 +254,40 @@ def properties_view(request):
                 properties = properties.filter(beds=beds_val)
         except ValueError:
             logger.debug(f"Invalid beds value: {beds}")
+    
+    sort = request.GET.get('sort', '')
+    if sort not in PROPERTY_SORTS:
+        sort = ''
+    
+    # With dates, price every card for the stay in one pass (see pricing.quote_many)
+    stay_dates = None
+    try:
+        if check_in and check_out:
+            stay_dates = (
+                datetime.strptime(check_in, settings.DATE_FORMAT_ISO).date(),
+                datetime.strptime(check_out, settings.DATE_FORMAT_ISO).date(),
+            )
+    except ValueError:
+        logger.debug(f"Invalid stay dates: {check_in} - {check_out}")
+    
+    # Stay prices also depend on rate overrides (see pricing.py)
+    response, etag, last_modified = conditional_page(
+        request, 'page:properties', request.get_full_path(), models=[Property, RateOverride]
+    )
+    if response is not None:
+        return set_page_validators(request, response, etag, last_modified)
+    
+    if stay_dates and stay_dates[0] < stay_dates[1]:
+        properties = list(properties)
+        quotes = quote_many(properties, *stay_dates)
+        for property_obj in properties:
+            quote = quotes[property_obj.pk]
+            property_obj.stay_total = from_pence(quote.total)
+            property_obj.stay_nights = quote.nights
+        if sort:
+            properties.sort(key=lambda p: p.stay_total, reverse=(sort == 'price_desc'))
+    elif sort:
+        properties = properties.order_by(PROPERTY_SORTS[sort])
             
     context['properties'] = properties
     context['search_params'] = {
@@ -184,8 +296,9 @@ def properties_view(request):
         'check_in': check_in,
         'check_out': check_out,
         'location': location,
+        'sort': sort,
     }
-    return render(request, 'properties.html', context)
+    return set_page_validators(request, render(request, 'properties.html', context), etag, last_modified)
 
 def hosts_view(request):
     context = get_common_context()
@@ -201,6 +314,11 @@ def about_view(request):
 
 def property_detail_view(request, slug):
     """Display a single property with all its details."""
+    # Similar properties come from the whole catalogue, so any change counts
+    response, etag, last_modified = conditional_page(request, 'page:property', slug, models=[Property])
+    if response is not None:
+        return set_page_validators(request, response, etag, last_modified)
+    
     context = get_common_context()
     property_obj = get_object_or_404(Property, slug=slug)
     
@@ -221,25 +339,48 @@ def property_detail_view(request, slug):
     
     context['property'] = property_obj
     context['similar_properties'] = similar_properties
-    return render(request, 'property_detail.html', context)
+    return set_page_validators(request, render(request, 'property_detail.html', context), etag, last_modified)
 
 # Staff Panel Views
 @staff_member_required
 def staff_panel_view(request):
-    from django.db.models import Avg, Sum
-    properties = Property.objects.all().order_by('-created_at')
+    from django.db.models import Avg, Count, Sum
+    
+    # Calculate stats for the dashboard in one conditional aggregate
+    stats = Property.objects.aggregate(
+        total=Count('id'),
+        featured=Count('id', filter=Q(is_featured=True)),
+        capacity=Sum('capacity'),
+        avg_price=Avg('price_from'),
+    )
+    avg_price = round(stats['avg_price']) if stats['avg_price'] else 0
+    
+    # Keyset-paginated property table (newest first)
+    page = keyset_paginate(
+        Property.objects.all(),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        size=STAFF_PANEL_PAGE_SIZE,
+    )
     
-    # Calculate stats for the dashboard
-    featured_count = properties.filter(is_featured=True).count()
-    total_capacity = properties.aggregate(total=Sum('capacity'))['total'] or 0
-    avg_price = properties.aggregate(avg=Avg('price_from'))['avg']
-    avg_price = round(avg_price) if avg_price else 0
+    # Occupancy/ADR/RevPAR from the daily rollups (O(days) rows)
+    days = request.GET.get('days', '')
+    days = int(days) if days in STAFF_ANALYTICS_PERIODS else ANALYTICS_DEFAULT_DAYS
+    today = timezone.localdate()
+    performance = get_performance(
+        today - timedelta(days=days - 1), today + timedelta(days=1), available_per_day=stats['total']
+    )
     
     context = {
-        'properties': properties,
-        'featured_count': featured_count,
-        'total_capacity': total_capacity,
+        'properties': page.items,
+        'page': page,
+        'property_count': stats['total'],
+        'featured_count': stats['featured'],
+        'total_capacity': stats['capacity'] or 0,
         'avg_price': avg_price,
+        'performance': performance,
+        'performance_days': days,
+        'performance_periods': STAFF_ANALYTICS_PERIODS,
     }
     return render(request, 'staff/panel.html', context)
 
@@ -292,6 +433,201 @@ def delete_property_view(request, pk):
     messages.success(request, f'Property "{property_title}" has been deleted.')
     return redirect('staff_panel')
 
+@staff_member_required
+@require_GET
+def export_bookings_csv(request):
+    """
+    Stream bookings as CSV for accounting.
+    
+    Query params: start, end (check-in dates, YYYY-MM-DD) and status
+    (repeatable). Rows are streamed from a server-side cursor, so the
+    download starts immediately and memory stays flat however many
+    bookings match.
+    """
+    try:
+        start, end, statuses = parse_export_filters(
+            request.GET.get('start'), request.GET.get('end'), request.GET.getlist('status')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    bookings = booking_export_queryset(start, end, statuses)
+    response = StreamingHttpResponse(iter_csv_lines(iter_booking_rows(bookings)), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(start, end)}"'
+    response['Cache-Control'] = 'no-store'
+    logger.info(f"Booking export started by user: {request.user.username} "
+                f"({start} to {end}, statuses={statuses or 'all'})")
+    return response
+
+
+def _metrics_response():
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def _staff_metrics(request):
+    return _metrics_response()
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Request and component timings from every worker, in Prometheus text format.
+    
+    Staff only; a scraper can instead send TELEMETRY_METRICS_TOKEN as a
+    bearer token.
+    """
+    if metrics_token_authorized(request):
+        return _metrics_response()
+    return _staff_metrics(request)
+
+
+# =============================================================================
+# BULK CATALOGUE OPERATIONS
+# =============================================================================
+def _catalogue_error_response(error):
+    """400 response for a rejected bulk operation."""
+    return JsonResponse({'error': str(error), 'errors': error.errors}, status=400)
+
+
+def _parse_property_ids(request):
+    """Property ids posted as repeated 'ids' values (None if none were posted)."""
+    values = request.POST.getlist('ids')
+    if not values:
+        return None
+    return [int(value) for value in values]
+
+
+@staff_member_required
+@require_POST
+def bulk_import_properties(request):
+    """
+    Create many properties from an uploaded CSV or JSON file.
+    
+    Columns/keys are Property field names (title, short_description,
+    description, area, price_from, beds, baths, capacity, ...). All rows are
+    validated first and created in one transaction, or none are.
+    """
+    upload = request.FILES.get('file')
+    if not upload:
+        return JsonResponse({'error': 'Upload a CSV or JSON file as "file".'}, status=400)
+    
+    try:
+        rows = parse_import_file(upload.read(), upload.name)
+        created = import_properties(rows)
+    except CatalogueError as e:
+        return _catalogue_error_response(e)
+    
+    logger.info(f"Bulk import of {len(created)} properties by user: {request.user.username}")
+    return JsonResponse({'status': 'ok', 'created': len(created), 'ids': [p.pk for p in created]})
+
+
+@staff_member_required
+@require_POST
+def bulk_update_prices(request):
+    """
+    Change price_from by a percentage for an area and/or a list of properties.
+    
+    POST: percent (e.g. 10 or -5), area (optional), ids (optional, repeatable)
+    """
+    try:
+        property_ids = _parse_property_ids(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid property id.'}, status=400)
+    
+    try:
+        count = adjust_prices(
+            request.POST.get('percent', ''),
+            area=request.POST.get('area', '').strip() or None,
+            property_ids=property_ids,
+        )
+    except CatalogueError as e:
+        return _catalogue_error_response(e)
+    
+    logger.info(f"Bulk price change of {request.POST.get('percent')}% on {count} properties "
+                f"by user: {request.user.username}")
+    return JsonResponse({'status': 'ok', 'updated': count})
+
+
+@staff_member_required
+@require_POST
+def bulk_reorder_homepage(request):
+    """
+    Set the homepage Top Properties list and order.
+    
+    POST: ids (repeatable, in display order). Properties not listed are
+    removed from the homepage.
+    """
+    try:
+        property_ids = _parse_property_ids(request) or []
+    except ValueError:
+        return JsonResponse({'error': 'Invalid property id.'}, status=400)
+    
+    try:
+        count = reorder_homepage(property_ids)
+    except CatalogueError as e:
+        return _catalogue_error_response(e)
+    
+    logger.info(f"Homepage reordered ({len(property_ids)} properties) by user: {request.user.username}")
+    return JsonResponse({'status': 'ok', 'updated': count})
+
+
+# =============================================================================
+# AVAILABILITY API
+# =============================================================================
+
+@require_http_methods(["GET"])
+@rate_limit(key='availability', max_requests=60, window=60)
+async def api_batch_availability(request):
+    """
+    Booked nights for many properties over one date range, in one query.
+    
+    GET /api/properties/availability/?ids=1,2,3&start=YYYY-MM-DD&end=YYYY-MM-DD[&format=bitset]
+    
+    Returns:
+        {
+            "start": "2025-01-01",
+            "end": "2025-01-08",
+            "nights": 7,
+            "format": "ranges",
+            "properties": {
+                "1": {"available": true, "booked": []},
+                "2": {"available": false, "booked": [["2025-01-03", "2025-01-05"]]}
+            }
+        }
+    """
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'ids must be a comma-separated list of property ids'}, status=400)
+    if not ids:
+        return JsonResponse({'error': 'ids parameter required'}, status=400)
+    if len(ids) > MAX_BATCH_PROPERTIES:
+        return JsonResponse({'error': f'At most {MAX_BATCH_PROPERTIES} properties per request'}, status=400)
+    
+    try:
+        start = datetime.strptime(request.GET.get('start', ''), settings.DATE_FORMAT_ISO).date()
+        end = datetime.strptime(request.GET.get('end', ''), settings.DATE_FORMAT_ISO).date()
+    except ValueError:
+        return JsonResponse({'error': 'start and end date parameters required (YYYY-MM-DD format)'}, status=400)
+    
+    nights = (end - start).days
+    if not 0 < nights <= MAX_RANGE_NIGHTS:
+        return JsonResponse({'error': f'end must be 1 to {MAX_RANGE_NIGHTS} nights after start'}, status=400)
+    
+    fmt = request.GET.get('format', 'ranges')
+    if fmt not in ('ranges', 'bitset'):
+        return JsonResponse({'error': 'format must be ranges or bitset'}, status=400)
+    
+    ranges = await aget_booked_ranges(ids, start, end)
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'nights': nights,
+        'format': fmt,
+        'properties': serialize_availability(ranges, start, end, fmt),
+    })
+
 
 # =============================================================================
 # GUESTY API VIEWS (Uncomment when ready to use)
@@ -455,65 +791,7 @@ def delete_property_view(request, pk):
 #         }, status=500)
 # 
 # 
-# @csrf_exempt
-# @require_http_methods(["POST"])
-# def guesty_webhook(request):
-#     """
-#     Webhook endpoint for Guesty events.
-#     
-#     POST /api/webhooks/guesty/
-#     
-#     Configure this URL in Guesty dashboard:
-#     1. Go to Integrations > Webhooks
-#     2. Add webhook URL: https://yourdomain.com/api/webhooks/guesty/
-#     3. Select events: reservation.created, reservation.updated, 
-#        reservation.canceled, calendar.updated
-#     """
-#     from django.conf import settings
-#     
-#     # Verify webhook signature if secret is configured
-#     webhook_secret = getattr(settings, 'GUESTY_WEBHOOK_SECRET', '')
-#     
-#     if webhook_secret:
-#         signature = request.headers.get('X-Guesty-Signature', '')
-#         
-#         if not GuestyWebhookHandler.verify_signature(
-#             request.body, 
-#             signature, 
-#             webhook_secret
-#         ):
-#             return JsonResponse({
-#                 'error': 'Invalid webhook signature'
-#             }, status=401)
-#     
-#     try:
-#         payload = json.loads(request.body)
-#     except json.JSONDecodeError:
-#         return JsonResponse({'error': 'Invalid JSON payload'}, status=400)
-#     
-#     event_type = payload.get('event')
-#     event_data = payload.get('data', {})
-#     
-#     if not event_type:
-#         return JsonResponse({'error': 'Missing event type'}, status=400)
-#     
-#     # Process the webhook
-#     try:
-#         GuestyWebhookHandler.process_webhook(event_type, event_data)
-#         return JsonResponse({
-#             'status': 'received',
-#             'event': event_type
-#         })
-#     except Exception as e:
-#         # Log error but still return success to prevent retries
-#         import logging
-#         logger = logging.getLogger(__name__)
-#         logger.error(f"Error processing Guesty webhook: {str(e)}")
-#         
-#         return JsonResponse({
-#             'status': 'received',
-#             'warning': 'Event received but processing encountered an error'
-#         })
+# guesty_webhook is live below (stores events in the GuestyWebhookEvent inbox).
 # 
 # =============================================================================
 
@@ -523,9 +801,16 @@ def delete_property_view(request, pk):
 
 @require_POST
 @rate_limit(key='checkout', max_requests=10, window=60)
-def create_checkout_session(request, property_id):
-    property_obj = get_object_or_404(Property, pk=property_id)
-    stripe.api_key = settings.STRIPE_SECRET_KEY
+async def create_checkout_session(request, property_id):
+    """
+    Create a pending booking and send the guest to Stripe Checkout.
+    
+    Async so that, under ASGI, waiting on Stripe does not hold a worker.
+    The booking is created before the Stripe call and deleted again if it
+    fails, rather than holding a database transaction open across the API
+    round trip.
+    """
+    property_obj = await aget_object_or_404(Property, pk=property_id)
     
     # Validate input using form
     form = CheckoutForm(request.POST)
@@ -550,6 +835,8 @@ def create_checkout_session(request, property_id):
     if guests > property_obj.capacity:
         return JsonResponse({'error': f'Maximum capacity is {property_obj.capacity} guests'}, status=400)
     
+    quote = await sync_to_async(get_quote)(property_obj, checkin, checkout)
+    
     # Format dates for description using settings constants
     date_format = getattr(settings, 'DATE_FORMAT_DISPLAY', '%d %b %Y')
     date_range = f"{checkin.strftime(date_format)} - {checkout.strftime(date_format)}"
@@ -560,10 +847,11 @@ def create_checkout_session(request, property_id):
     full_description = " • ".join(description_parts)
     
     # Get guest details (sanitized)
-    if request.user.is_authenticated:
-        guest_name = escape(request.user.get_full_name() or request.user.username)
-        guest_email = request.user.email
-        guest_phone = getattr(request.user.profile, 'phone_number', '') if hasattr(request.user, 'profile') else ''
+    user = await request.auser()
+    if user.is_authenticated:
+        guest_name = escape(user.get_full_name() or user.username)
+        guest_email = user.email
+        guest_phone = await Profile.objects.filter(user=user).values_list('phone_number', flat=True).afirst() or ''
     else:
         guest_name = escape(form.cleaned_data.get('guest_name') or 'Guest')
         guest_email = form.cleaned_data.get('guest_email') or ''
@@ -575,46 +863,48 @@ def create_checkout_session(request, property_id):
     company_address = escape(form.cleaned_data.get('company_address') or '')
     company_vat = escape(form.cleaned_data.get('company_vat') or '')
 
+    booking = None
     try:
-        # Use atomic transaction to prevent race conditions (HIGH-04)
-        with transaction.atomic():
-            # Create pending booking (using booked_property to avoid shadowing builtin)
-            booking = Booking.objects.create(
-                booked_property=property_obj,
-                user=request.user if request.user.is_authenticated else None,
-                guest_name=guest_name,
-                guest_email=guest_email,
-                guest_phone=guest_phone,
-                is_company_booking=is_company_booking,
-                company_name=company_name,
-                company_address=company_address,
-                company_vat=company_vat,
-                check_in=checkin,
-                check_out=checkout,
-                guests=guests,
-                nightly_rate=property_obj.price_from,
-                total_price=property_obj.price_from * nights,
-                status='awaiting_payment'
-            )
+        # Create pending booking (using booked_property to avoid shadowing builtin)
+        booking = await Booking.objects.acreate(
+            booked_property=property_obj,
+            user=user if user.is_authenticated else None,
+            guest_name=guest_name,
+            guest_email=guest_email,
+            guest_phone=guest_phone,
+            is_company_booking=is_company_booking,
+            company_name=company_name,
+            company_address=company_address,
+            company_vat=company_vat,
+            check_in=checkin,
+            check_out=checkout,
+            guests=guests,
+            nightly_rate=from_pence(quote.average_nightly),
+            cleaning_fee=from_pence(quote.cleaning_fee),
+            discount=from_pence(quote.discount),
+            total_price=from_pence(quote.total),
+            status='awaiting_payment'
+        )
 
-            # Create signed token for secure callback URLs (CRIT-04)
-            signed_booking_id = booking_signer.sign(str(booking.id))
+        # Create signed token for secure callback URLs (CRIT-04)
+        signed_booking_id = booking_signer.sign(str(booking.id))
 
-            # Construct image URL if available
-            images = []
-            if property_obj.image:
-                image_url = request.build_absolute_uri(property_obj.image.url)
-                # Only add image if it's likely accessible (not localhost)
-                if 'localhost' not in image_url and '127.0.0.1' not in image_url:
-                    images = [image_url]
+        # Construct image URL if available
+        images = []
+        if property_obj.image:
+            image_url = request.build_absolute_uri(property_obj.image.url)
+            # Only add image if it's likely accessible (not localhost)
+            if 'localhost' not in image_url and '127.0.0.1' not in image_url:
+                images = [image_url]
 
-            checkout_session = stripe.checkout.Session.create(
+        with timed('stripe'):
+            checkout_session = await payments.create_checkout_session(
                 payment_method_types=['card'],
                 line_items=[
                     {
                         'price_data': {
                             'currency': 'gbp',
-                            'unit_amount': int(property_obj.price_from * nights * 100),
+                            'unit_amount': quote.total,
                             'product_data': {
                                 'name': f"Stay at {property_obj.title}",
                                 'description': full_description,
@@ -638,21 +928,29 @@ def create_checkout_session(request, property_id):
                     'nights': nights
                 }
             )
-            
-            # Update booking with session ID
-            booking.stripe_session_id = checkout_session.id
-            booking.save()
+        
+        # Update booking with session ID
+        booking.stripe_session_id = checkout_session.id
+        await booking.asave()
         
         logger.info(f"Checkout session created for booking {booking.id}")
         return redirect(checkout_session.url, code=303)
         
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error during checkout: {str(e)}")
+        await _discard_pending_booking(booking)
         return JsonResponse({'error': 'Payment processing error. Please try again.'}, status=500)
     except Exception as e:
         logger.error(f"Error creating checkout session: {str(e)}")
+        await _discard_pending_booking(booking)
         return JsonResponse({'error': 'An error occurred. Please try again.'}, status=500)
 
+
+async def _discard_pending_booking(booking):
+    """Remove a booking whose Stripe session was never created."""
+    if booking is not None and booking.pk and not booking.stripe_session_id:
+        await booking.adelete()
+
 def payment_success(request):
     """Handle payment success callback with signed token verification."""
     signed_token = request.GET.get('token')
@@ -686,20 +984,21 @@ def payment_success(request):
                     should_send_email = True
                     logger.info(f"Booking {booking_id} confirmed via payment success view.")
                 elif booking.status == 'confirmed':
-                    # If confirmed but no receipt PDF, try sending again
+                    # If confirmed but no receipt PDF, make sure the email is queued
                     if not booking.receipt_pdf:
                         should_send_email = True
-                        logger.debug(f"Booking {booking_id} already confirmed but PDF missing. Retrying email.")
+                        logger.debug(f"Booking {booking_id} already confirmed but PDF missing. Queueing email.")
                     else:
                         success_message = "Booking confirmed. Receipt already sent."
 
                 if should_send_email:
-                    logger.debug(f"Sending receipt email for booking {booking_id}...")
+                    # Queued for the deliver_emails worker (deduplicated per booking)
+                    logger.debug(f"Queueing receipt email for booking {booking_id}...")
                     try:
-                        send_receipt_email(booking)
-                        success_message = "Receipt sent successfully!"
+                        enqueue_email(booking, 'receipt')
+                        success_message = "Booking confirmed! Your receipt is on its way by email."
                     except Exception as e:
-                        logger.error(f"Error sending receipt email for booking {booking_id}: {e}")
+                        logger.error(f"Error queueing receipt email for booking {booking_id}: {e}")
                         error_message = "Booking confirmed, but failed to send email. Please contact support."
                      
         except BadSignature:
@@ -746,8 +1045,7 @@ def payment_cancel(request):
 
 @login_required
 def booking_receipt(request, booking_id):
-    context = get_common_context()
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('booked_property'), id=booking_id)
     
     # Security check: ensure user owns this booking
     if booking.user != request.user and booking.guest_email != request.user.email:
@@ -755,15 +1053,30 @@ def booking_receipt(request, booking_id):
         SecurityLogger.log_access_denied(request, "Attempted to access another user's booking receipt")
         raise PermissionDenied("You don't have permission to view this receipt.")
         
-    # Generate PDF if it doesn't exist
+    # Generate PDF if it doesn't exist (in the background: saving it bumps
+    # updated_at, so the next view gets a fresh page with the download link)
     if not booking.receipt_pdf:
         try:
-            generate_receipt_pdf(booking)
+            generate_receipt_in_background(booking)
         except Exception as e:
-            logger.error(f"Error generating receipt PDF for booking {booking_id}: {e}")
-        
-    context['booking'] = booking
-    return render(request, 'receipt.html', context)
+            logger.error(f"Error scheduling receipt PDF for booking {booking_id}: {e}")
+    
+    # The page shows the booking and its property's details
+    response, etag, last_modified = conditional_page(
+        request, 'page:receipt', booking.id, booking.updated_at.timestamp(),
+        models=[Property], last_modified=booking.updated_at,
+    )
+    if response is None:
+        cache_key = RECEIPT_HTML_CACHE_KEY.format(etag=etag.strip('"'))
+        html = cache.get(cache_key)
+        if html is None:
+            context = get_common_context()
+            context['booking'] = booking
+            html = render_to_string('receipt.html', context, request=request)
+            cache.set(cache_key, html, RECEIPT_HTML_CACHE_TTL)
+        response = HttpResponse(html)
+    
+    return set_page_validators(request, response, etag, last_modified)
 
 @login_required
 def my_bookings_view(request):
@@ -829,10 +1142,11 @@ def signup(request):
 @csrf_exempt
 @require_POST
 @rate_limit(key='stripe_webhook', max_requests=100, window=60)
-def stripe_webhook(request):
+async def stripe_webhook(request):
     """
     Handle Stripe webhook events securely.
     Rate limited to prevent abuse while allowing legitimate Stripe traffic.
+    Async, with the receipt (PDF + email) built in a worker thread.
     """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
@@ -861,12 +1175,13 @@ def stripe_webhook(request):
 
     # Handle the event
     if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
+        # StripeObjects are not dicts (stripe>=14): convert before using .get()
+        session = event['data']['object'].to_dict()
         booking_id = session.get('client_reference_id')
         
         if booking_id:
             try:
-                booking = Booking.objects.get(id=int(booking_id))
+                booking = await Booking.objects.aget(id=int(booking_id))
                 # Verify the Stripe session ID matches
                 if booking.stripe_session_id != session.get('id'):
                     logger.warning(f"Stripe session ID mismatch for booking {booking_id}")
@@ -875,15 +1190,15 @@ def stripe_webhook(request):
                 # Confirm if not already confirmed
                 if booking.status == 'awaiting_payment':
                     booking.status = 'confirmed'
-                    booking.save()
+                    await booking.asave()
                     logger.info(f"Booking {booking_id} confirmed via Stripe webhook.")
                     
-                # Send receipt if not already generated
+                # Queue the receipt if not already generated (deduplicated per booking)
                 if not booking.receipt_pdf:
                     try:
-                        send_receipt_email(booking)
+                        await aenqueue_email(booking, 'receipt')
                     except Exception as e:
-                        logger.error(f"Error sending email in webhook for booking {booking_id}: {e}")
+                        logger.error(f"Error queueing email in webhook for booking {booking_id}: {e}")
                         
             except Booking.DoesNotExist:
                 logger.warning(f"Stripe webhook for non-existent booking: {booking_id}")
@@ -891,3 +1206,39 @@ def stripe_webhook(request):
                 logger.error(f"Error processing Stripe webhook: {e}")
 
     return HttpResponse(status=200)
+
+
+@csrf_exempt
+@require_POST
+@rate_limit(key='guesty_webhook', max_requests=300, window=60)
+def guesty_webhook(request):
+    """
+    Receive Guesty webhook events.
+    
+    POST /api/webhooks/guesty/
+    
+    Verified deliveries are stored in the GuestyWebhookEvent inbox and
+    acknowledged immediately; the process_guesty_webhooks command applies
+    them in batches.
+    """
+    webhook_secret = settings.GUESTY_WEBHOOK_SECRET
+    if not webhook_secret:
+        logger.error("GUESTY_WEBHOOK_SECRET not configured")
+        return HttpResponse(status=500)
+    
+    signature = request.headers.get('X-Guesty-Signature', '')
+    if not GuestyWebhookHandler.verify_signature(request.body, signature, webhook_secret):
+        logger.warning(f"Invalid Guesty webhook signature from IP: {get_client_ip(request)}")
+        return JsonResponse({'error': 'Invalid webhook signature'}, status=401)
+    
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON payload'}, status=400)
+    
+    event_type = payload.get('event') if isinstance(payload, dict) else None
+    if not event_type:
+        return JsonResponse({'error': 'Missing event type'}, status=400)
+    
+    event = enqueue_webhook(event_type, payload.get('data', {}))
+    return JsonResponse({'status': 'queued', 'event': event_type, 'id': event.id})